@@ -2,10 +2,20 @@ from __future__ import annotations
 import hashlib
 import json
 import os
-from typing import Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 REDIS_URL = os.getenv("REDIS_URL", "").strip()
 
+# tier 1: LRU local per proces, mărginit ca număr de intrări și ca bytes (JSON)
+LOCAL_CACHE_MAX_ITEMS = int(os.getenv("LOCAL_CACHE_MAX_ITEMS", "256"))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# cât poate servi un worker din memorie fără să se uite în Redis
+LOCAL_CACHE_TTL_SECONDS = int(os.getenv("LOCAL_CACHE_TTL_SECONDS", "30"))
+
 redis_client = None
 redis_ok = False
 
@@ -25,6 +35,10 @@ def _hash(s: str) -> str:
     return hashlib.sha1(s.encode("utf-8")).hexdigest()
 
 
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
 def build_cache_key(prefix: str, payload: dict) -> str:
     # chei scurte + stabile
     raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
@@ -46,4 +60,314 @@ def cache_get(key: str) -> Optional[Any]:
 def cache_set(key: str, value: Any, ttl_seconds: int = 60) -> None:
     if not redis_client:
         return
-    redis_client.setex(key, ttl_seconds, json.dumps(value, separators=(",", ":")))
+    redis_client.setex(key, ttl_seconds, _dumps(value))
+
+
+class LocalLRU:
+    """
+    LRU in-process cu TTL per intrare, evicție după număr de intrări și bytes.
+    Thread-safe (un worker uvicorn poate servi request-uri pe mai multe thread-uri).
+    """
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max(1, max_items)
+        self.max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value)
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float, size: int) -> None:
+        if ttl_seconds <= 0 or size > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (time.monotonic() + ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._data) > self.max_items or self._bytes > self.max_bytes:
+                _, (_, old_size, _) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+local_cache = LocalLRU(LOCAL_CACHE_MAX_ITEMS, LOCAL_CACHE_MAX_BYTES)
+
+
+def tiered_cache_get(key: str) -> Optional[Any]:
+    """
+    Citește întâi din LRU-ul local, apoi din Redis (partajat între workeri).
+    Un hit în Redis repopulează LRU-ul local pentru LOCAL_CACHE_TTL_SECONDS.
+    Erorile Redis sunt tratate ca miss.
+    """
+    v = local_cache.get(key)
+    if v is not None:
+        return v
+
+    if not redis_client:
+        return None
+    try:
+        raw = redis_client.get(key)
+    except Exception:
+        return None
+    if not raw:
+        return None
+    try:
+        v = json.loads(raw)
+    except Exception:
+        return None
+
+    local_cache.set(key, v, LOCAL_CACHE_TTL_SECONDS, len(raw))
+    return v
+
+
+def tiered_cache_set(key: str, value: Any, ttl_seconds: int = 60) -> None:
+    raw = _dumps(value)
+    local_cache.set(key, value, min(ttl_seconds, LOCAL_CACHE_TTL_SECONDS) if redis_client else ttl_seconds, len(raw))
+
+    if not redis_client:
+        return
+    try:
+        redis_client.setex(key, ttl_seconds, raw)
+    except Exception:
+        pass
+
+
+def tiered_cache_delete(key: str) -> None:
+    local_cache.delete(key)
+    if not redis_client:
+        return
+    try:
+        redis_client.delete(key)
+    except Exception:
+        pass
+
+
+# --------------------------
+# stale-while-revalidate
+# --------------------------
+#
+# Intrările SWR sunt salvate ca {"v": value, "soft": epoch}; TTL-ul Redis e hard TTL.
+# Până la soft -> proaspăt; între soft și hard -> se servește valoarea veche și se
+# programează un refresh în fundal prin funcția înregistrată pentru prefixul cheii.
+
+SWR_HARD_TTL_FACTOR = int(os.getenv("SWR_HARD_TTL_FACTOR", "10"))
+SWR_REFRESH_WORKERS = int(os.getenv("SWR_REFRESH_WORKERS", "2"))
+SWR_REFRESH_LOCK_SECONDS = int(os.getenv("SWR_REFRESH_LOCK_SECONDS", "60"))
+
+
+class _Refresher:
+    def __init__(self, prefix: str, fn: Callable[[str], Any], soft_ttl: int, hard_ttl: int):
+        self.prefix = prefix
+        self.fn = fn
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+
+
+_refreshers: Dict[str, _Refresher] = {}
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+
+def hard_ttl_for(soft_ttl: int) -> int:
+    return soft_ttl * max(1, SWR_HARD_TTL_FACTOR)
+
+
+def register_refresher(
+    prefix: str,
+    fn: Callable[[str], Any],
+    *,
+    soft_ttl: int,
+    hard_ttl: Optional[int] = None,
+) -> None:
+    """
+    fn(key) recalculează valoarea pentru orice cheie care începe cu prefix.
+    La lookup se folosește prefixul cel mai lung care se potrivește.
+    """
+    _refreshers[prefix] = _Refresher(prefix, fn, soft_ttl, hard_ttl or hard_ttl_for(soft_ttl))
+
+
+def _find_refresher(key: str) -> Optional[_Refresher]:
+    best: Optional[_Refresher] = None
+    for prefix, r in _refreshers.items():
+        if key.startswith(prefix) and (best is None or len(prefix) > len(best.prefix)):
+            best = r
+    return best
+
+
+def _read_envelope(key: str, *, local: bool = True) -> Optional[dict]:
+    env = tiered_cache_get(key) if local else cache_get_safe(key)
+    if not isinstance(env, dict) or "v" not in env or "soft" not in env:
+        return None
+    return env
+
+
+def cache_get_safe(key: str) -> Optional[Any]:
+    try:
+        return cache_get(key)
+    except Exception:
+        return None
+
+
+def swr_lookup(key: str) -> Tuple[Optional[Any], bool]:
+    """
+    Returnează (valoare, is_stale). (None, False) la miss / după hard TTL.
+    """
+    env = _read_envelope(key)
+    if env is None:
+        return None, False
+    return env["v"], float(env["soft"]) <= time.time()
+
+
+def swr_set(key: str, value: Any, *, soft_ttl: int, hard_ttl: Optional[int] = None) -> None:
+    hard_ttl = max(soft_ttl, hard_ttl or hard_ttl_for(soft_ttl))
+    tiered_cache_set(key, {"v": value, "soft": time.time() + soft_ttl}, ttl_seconds=hard_ttl)
+
+
+def swr_get(key: str, compute: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+    """
+    Ca tiered_cache_get, dar o valoare stale e servită imediat și declanșează
+    un refresh în fundal (compute dat sau refresher-ul înregistrat pentru prefix).
+    """
+    value, stale = swr_lookup(key)
+    if value is not None and stale:
+        schedule_refresh(key, compute)
+    return value
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _refresh_executor
+    if _refresh_executor is None:
+        with _refreshing_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(
+                    max_workers=max(1, SWR_REFRESH_WORKERS),
+                    thread_name_prefix="swr-refresh",
+                )
+    return _refresh_executor
+
+
+def _run_refresh(key: str, compute: Callable[[], Any], soft_ttl: int, hard_ttl: int) -> None:
+    lock = None
+    try:
+        # alt worker poate să fi reîmprospătat deja cheia (copia locală e mai veche)
+        env = _read_envelope(key, local=False)
+        if env is not None and float(env["soft"]) > time.time():
+            local_cache.set(key, env, min(hard_ttl, LOCAL_CACHE_TTL_SECONDS), len(_dumps(env)))
+            return
+
+        if redis_client:
+            try:
+                lock = redis_client.lock(f"lock:{key}", timeout=SWR_REFRESH_LOCK_SECONDS, blocking=False)
+                if not lock.acquire():
+                    lock = None
+                    return
+            except Exception:
+                lock = None
+
+        swr_set(key, compute(), soft_ttl=soft_ttl, hard_ttl=hard_ttl)
+    except Exception:
+        # refresh eșuat: valoarea stale rămâne servită până la hard TTL
+        pass
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except Exception:
+                pass
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def schedule_refresh(
+    key: str,
+    compute: Optional[Callable[[], Any]] = None,
+    *,
+    soft_ttl: Optional[int] = None,
+    hard_ttl: Optional[int] = None,
+) -> bool:
+    """
+    Programează (o singură dată per cheie și proces) recalcularea în fundal.
+    Fără compute, se folosește refresher-ul înregistrat; fără niciunul -> False.
+    """
+    refresher = _find_refresher(key)
+    if compute is None:
+        if refresher is None:
+            return False
+        compute = lambda: refresher.fn(key)  # noqa: E731
+    if soft_ttl is None:
+        if refresher is None:
+            return False
+        soft_ttl = refresher.soft_ttl
+        hard_ttl = hard_ttl or refresher.hard_ttl
+    hard_ttl = hard_ttl or hard_ttl_for(soft_ttl)
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return True
+        _refreshing.add(key)
+
+    try:
+        _executor().submit(_run_refresh, key, compute, soft_ttl, hard_ttl)
+    except Exception:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        return False
+    return True
+
+
+def refresh_key(key: str) -> Any:
+    """
+    Recalculează sincron o cheie prin refresher-ul înregistrat (ex: job de warm-up).
+    """
+    refresher = _find_refresher(key)
+    if refresher is None:
+        raise KeyError(f"no refresher registered for {key}")
+    value = refresher.fn(key)
+    swr_set(key, value, soft_ttl=refresher.soft_ttl, hard_ttl=refresher.hard_ttl)
+    return value
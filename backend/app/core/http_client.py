@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# clienți HTTP partajați (keep-alive) pentru toate apelurile externe
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "25"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "1").strip() not in ("0", "false", "False")
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+try:
+    import h2  # noqa: F401  # httpx[http2]
+
+    _http2 = HTTP_HTTP2
+except ImportError:
+    _http2 = False
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+# --------------------------
+# clients
+# --------------------------
+
+_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+# un AsyncClient e legat de event loop-ul în care a fost creat
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client() -> httpx.Client:
+    """
+    httpx.Client per proces (recreat după fork, ca la pool-ul DB).
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = httpx.Client(timeout=HTTP_TIMEOUT, limits=_limits(), http2=_http2)
+            _client_pid = pid
+        return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    httpx.AsyncClient per event loop (asyncio.run() din joburi creează loop-uri noi).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=_limits(), http2=_http2)
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """
+    Închide clientul loop-ului curent (de apelat înainte ca asyncio.run() să se termine).
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# --------------------------
+# metrics
+# --------------------------
+
+_LATENCY_SAMPLES = 256
+_MAX_ENDPOINTS = 200
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    def as_dict(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))] if samples else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p95_ms": round(p95, 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+_stats: Dict[str, _EndpointStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _endpoint(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}" if parts.netloc else parts.path
+
+
+def _record(url: str, elapsed_ms: float, *, error: bool = False, retry: bool = False) -> None:
+    key = _endpoint(url)
+    with _stats_lock:
+        st = _stats.get(key)
+        if st is None:
+            if len(_stats) >= _MAX_ENDPOINTS:
+                return
+            st = _stats[key] = _EndpointStats()
+        st.count += 1
+        st.errors += int(error)
+        st.retries += int(retry)
+        st.total_ms += elapsed_ms
+        st.max_ms = max(st.max_ms, elapsed_ms)
+        st.samples.append(elapsed_ms)
+
+
+def http_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        endpoints = {k: v.as_dict() for k, v in _stats.items()}
+    return {"http2": _http2, "endpoints": endpoints}
+
+
+# --------------------------
+# retry
+# --------------------------
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After în secunde sau ca dată HTTP; None dacă lipsește / e invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+def _backoff(attempt: int, resp: Optional[httpx.Response] = None) -> float:
+    if resp is not None:
+        ra = retry_after_seconds(resp.headers.get("retry-after"))
+        if ra is not None:
+            # plafonat: un Retry-After lung nu ține un worker blocat minute întregi;
+            # joburile care trebuie să aștepte cota trec prin limiter (penalize)
+            return min(ra, HTTP_BACKOFF_MAX)
+    # full jitter: uniform(0, min(max, base * 2^attempt))
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    retries: int = HTTP_RETRIES,
+    timeout: Optional[float] = None,
+) -> httpx.Response:
+    """
+    Request prin clientul partajat. Reîncearcă erorile de transport și
+    statusurile din RETRY_STATUSES (Retry-After sau backoff cu jitter, ambele
+    plafonate la HTTP_BACKOFF_MAX); ultimul răspuns se întoarce așa cum e
+    (raise_for_status rămâne la caller). Din handler-e web: retries=0.
+    """
+    client = get_client()
+    kwargs: Dict[str, Any] = {"params": params, "headers": headers}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    for attempt in range(retries + 1):
+        last = attempt >= retries
+        t0 = time.perf_counter()
+        try:
+            resp = client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            _record(url, 1000.0 * (time.perf_counter() - t0), error=True, retry=not last)
+            if last:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+
+        retry = resp.status_code in RETRY_STATUSES and not last
+        _record(url, 1000.0 * (time.perf_counter() - t0), error=resp.status_code >= 400, retry=retry)
+        if not retry:
+            return resp
+        time.sleep(_backoff(attempt, resp))
+
+    raise AssertionError("unreachable")
+
+
+async def arequest(
+    method: str,
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    retries: int = HTTP_RETRIES,
+    timeout: Optional[float] = None,
+) -> httpx.Response:
+    """Varianta async a lui request(), pe clientul async al loop-ului curent."""
+    client = get_async_client()
+    kwargs: Dict[str, Any] = {"params": params, "headers": headers}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    for attempt in range(retries + 1):
+        last = attempt >= retries
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            _record(url, 1000.0 * (time.perf_counter() - t0), error=True, retry=not last)
+            if last:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+            continue
+
+        retry = resp.status_code in RETRY_STATUSES and not last
+        _record(url, 1000.0 * (time.perf_counter() - t0), error=resp.status_code >= 400, retry=retry)
+        if not retry:
+            return resp
+        await asyncio.sleep(_backoff(attempt, resp))
+
+    raise AssertionError("unreachable")
+
+
+def get_json(url: str, **kwargs: Any) -> Any:
+    resp = request("GET", url, **kwargs)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def aget_json(url: str, **kwargs: Any) -> Any:
+    resp = await arequest("GET", url, **kwargs)
+    resp.raise_for_status()
+    return resp.json()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.cache import hard_ttl_for, redis_client, schedule_refresh, swr_lookup, swr_set
+
+# cât ține lock-ul Redis dacă liderul moare în timpul recalculării
+SINGLE_FLIGHT_LOCK_SECONDS = int(os.getenv("SINGLE_FLIGHT_LOCK_SECONDS", "60"))
+# cât așteaptă un alt worker rezultatul liderului înainte să calculeze singur
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "20"))
+
+_POLL_SECONDS = 0.1
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _store(key: str, value: Any, ttl_seconds: int, hard_ttl_seconds: int) -> None:
+    swr_set(key, value, soft_ttl=ttl_seconds, hard_ttl=hard_ttl_seconds)
+
+
+def _compute_across_workers(
+    key: str,
+    compute: Callable[[], Any],
+    ttl_seconds: int,
+    hard_ttl_seconds: int,
+) -> Any:
+    """
+    Liderul din proces ia și lock-ul Redis; dacă îl ține alt worker, așteaptă
+    ca valoarea să apară în cache (sau calculează singur după timeout).
+    """
+    if not redis_client:
+        value = compute()
+        _store(key, value, ttl_seconds, hard_ttl_seconds)
+        return value
+
+    try:
+        lock = redis_client.lock(f"lock:{key}", timeout=SINGLE_FLIGHT_LOCK_SECONDS, blocking=False)
+        acquired = lock.acquire()
+    except Exception:
+        lock, acquired = None, True  # Redis indisponibil: calculăm local
+
+    if acquired:
+        try:
+            value = compute()
+            _store(key, value, ttl_seconds, hard_ttl_seconds)
+            return value
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except Exception:
+                    pass
+
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        value, _ = swr_lookup(key)
+        if value is not None:
+            return value
+
+    value = compute()
+    _store(key, value, ttl_seconds, hard_ttl_seconds)
+    return value
+
+
+def single_flight(
+    key: str,
+    compute: Callable[[], Any],
+    *,
+    ttl_seconds: int,
+    hard_ttl_seconds: Optional[int] = None,
+) -> Any:
+    """
+    Cache lookup cu coalescing per cheie.
+    - proaspăt (sub ttl_seconds): se întoarce direct
+    - stale (între ttl_seconds și hard TTL): se întoarce imediat, refresh în fundal
+    - miss: un singur caller recalculează (în proces prin Event, între workeri
+      prin lock Redis); ceilalți primesc rezultatul lui
+    Excepțiile liderului se propagă la toți cei care îl așteaptă și nu se cache-uiesc.
+    """
+    hard_ttl_seconds = hard_ttl_seconds or hard_ttl_for(ttl_seconds)
+
+    value, stale = swr_lookup(key)
+    if value is not None:
+        if stale:
+            schedule_refresh(key, compute, soft_ttl=ttl_seconds, hard_ttl=hard_ttl_seconds)
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _compute_across_workers(key, compute, ttl_seconds, hard_ttl_seconds)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
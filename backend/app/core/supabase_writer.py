@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SUPABASE_WRITE_CHUNK = int(os.getenv("SUPABASE_WRITE_CHUNK", "500"))
+SUPABASE_WRITE_RETRIES = int(os.getenv("SUPABASE_WRITE_RETRIES", "3"))
+SUPABASE_WRITE_BACKOFF = float(os.getenv("SUPABASE_WRITE_BACKOFF", "0.5"))
+
+
+class SupabaseWriteError(RuntimeError):
+    pass
+
+
+class SupabaseBatchWriter:
+    """
+    Upsert-uri PostgREST în bucăți (chunk_size rânduri per request).
+    - rândurile sunt unice pe cheia on_conflict în toată rularea (ultimul câștigă,
+      unul singur per request - altfel Postgres refuză "affect row a second time")
+    - un chunk eșuat se reîncearcă cu backoff și jitter; dacă tot eșuează,
+      rândurile sunt numărate în failed, iar eroarea în errors
+    Folosire: with SupabaseBatchWriter(client, "fixtures", "provider_fixture_id") as w: w.add(row)
+    """
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        on_conflict: str,
+        *,
+        chunk_size: int = SUPABASE_WRITE_CHUNK,
+        retries: int = SUPABASE_WRITE_RETRIES,
+        raise_on_error: bool = False,
+    ):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.key_columns = tuple(c.strip() for c in on_conflict.split(","))
+        self.chunk_size = max(1, chunk_size)
+        self.retries = max(0, retries)
+        self.raise_on_error = raise_on_error
+
+        self._buffer: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._written_keys: set = set()
+
+        self.written = 0
+        self.failed = 0
+        self.requests = 0
+        self.errors: List[str] = []
+
+    def __enter__(self) -> "SupabaseBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+    def _key(self, row: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(row.get(c) for c in self.key_columns)
+
+    def add(self, row: Dict[str, Any], *, once: bool = False) -> None:
+        """
+        once=True: ignoră rândul dacă cheia a fost deja scrisă în rularea asta
+        (ex: aceeași ligă pentru fiecare meci).
+        """
+        key = self._key(row)
+        if once and (key in self._written_keys or key in self._buffer):
+            return
+        self._buffer.pop(key, None)
+        self._buffer[key] = row
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        rows = list(self._buffer.values())
+        keys = list(self._buffer.keys())
+        self._buffer.clear()
+
+        for i in range(0, len(rows), self.chunk_size):
+            self._write_chunk(rows[i:i + self.chunk_size])
+        self._written_keys.update(keys)
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> None:
+        last_err: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            try:
+                self.requests += 1
+                self.client.table(self.table).upsert(chunk, on_conflict=self.on_conflict).execute()
+                self.written += len(chunk)
+                return
+            except Exception as e:
+                last_err = e
+                if attempt < self.retries:
+                    time.sleep(random.uniform(0, SUPABASE_WRITE_BACKOFF * (2 ** attempt)))
+
+        self.failed += len(chunk)
+        self.errors.append(f"{self.table}: chunk of {len(chunk)} failed: {last_err}")
+
+    def close(self) -> None:
+        self.flush()
+        if self.raise_on_error and self.errors:
+            raise SupabaseWriteError("; ".join(self.errors[:5]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "written": self.written,
+            "failed": self.failed,
+            "requests": self.requests,
+        }
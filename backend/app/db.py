@@ -1,7 +1,12 @@
 import os
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 from supabase import create_client, Client
 
@@ -9,21 +14,242 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+# pool per proces (per worker uvicorn / RQ)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # secunde de așteptare la checkout
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # reciclează conexiunile vechi
+DB_POOL_CHECK_IDLE = float(os.getenv("DB_POOL_CHECK_IDLE", "30"))  # ping dacă a stat idle mai mult
+
 supabase_client: Client | None = None
 
 if SUPABASE_URL and SUPABASE_KEY:
     supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
-@contextmanager
-def get_conn():
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexiuni psycopg2.
+    - checkout blocant cu timeout când toate cele max_size conexiuni sunt ocupate
+    - health check (SELECT 1) pentru conexiunile care au stat idle
+    - conexiunile mai vechi de max_lifetime sunt închise și recreate
+    - la return se face rollback dacă a rămas o tranzacție deschisă
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 10.0,
+        max_lifetime: float = 1800.0,
+        check_idle: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+
+        self._cond = threading.Condition()
+        # (conn, created_at, last_used)
+        self._idle: Deque[Tuple[Any, float, float]] = deque()
+        self._created_at: Dict[int, float] = {}
+        self._size = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+
+        for _ in range(self.min_size):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._opened += 1
+        return conn
+
+    def _close(self, conn) -> None:
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_lifetime > 0 and (now - created_at) > self.max_lifetime
+
+    def _healthy(self, conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        start = time.monotonic()
+        entry: Optional[Tuple[Any, float, float]] = None
+
+        with self._cond:
+            waited_once = False
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"DB pool exhausted: {self._in_use}/{self.max_size} in use after {self.timeout}s"
+                    )
+                waited_once = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            waited = time.monotonic() - start
+            if waited_once:
+                self._waits += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if entry is not None:
+                conn, created_at, last_used = entry
+                now = time.monotonic()
+                stale = conn.closed or self._expired(created_at, now)
+                if not stale and (now - last_used) > self.check_idle:
+                    stale = not self._healthy(conn)
+                if not stale:
+                    return conn
+                self._close(conn)
+                with self._cond:
+                    self._discarded += 1
+
+            return self._connect()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn) -> None:
+        now = time.monotonic()
+        created_at = self._created_at.get(id(conn), now)
+
+        keep = not conn.closed and not self._expired(created_at, now)
+        if keep and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # nu lăsa tranzacții deschise / eșuate pentru următorul caller
+            try:
+                conn.rollback()
+            except Exception:
+                keep = False
+
+        if not keep:
+            self._close(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((conn, created_at, now))
+            else:
+                self._size -= 1
+                self._discarded += 1
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._close(conn)
+                self._size -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_avg_ms": round(1000.0 * self._wait_total / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(1000.0 * self._wait_max, 3),
+                "timeouts": self._timeouts,
+                "opened": self._opened,
+                "discarded": self._discarded,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool, _pool_pid
+
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is missing")
-    conn = psycopg2.connect(DATABASE_URL)
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            # după fork (RQ worker) conexiunile părintelui nu se refolosesc
+            _pool = ConnectionPool(
+                DATABASE_URL,
+                min_size=DB_POOL_MIN,
+                max_size=DB_POOL_MAX,
+                timeout=DB_POOL_TIMEOUT,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                check_idle=DB_POOL_CHECK_IDLE,
+            )
+            _pool_pid = pid
+        return _pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    if _pool is None or _pool_pid != os.getpid():
+        return {"initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+@contextmanager
+def get_conn():
+    pool = _get_pool()
+    conn = pool.getconn()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.putconn(conn)
 
 
 def dict_cursor(conn):
@@ -12,7 +12,7 @@ from __future__ import annotations
 
 import os
 import time
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, List, Dict
 
 from app.db import get_conn
 
@@ -165,6 +165,113 @@ def _ensure_indexes(cur):
     cur.execute('CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures(fixture_date);')
 
 
+# --------------------------
+# hot-path indexes (CONCURRENTLY)
+# --------------------------
+#
+# (nume, coloane necesare, definiție). Se creează doar dacă tabela are coloanele
+# (schema de aici folosește fixture_date/api_fixture_id, cea din Supabase kickoff_at/
+# provider_fixture_id). "Terminat" = home_goals/away_goals NOT NULL, ca în query-urile
+# de istoric din routes/predictions.py.
+_HOT_INDEXES: List[Tuple[str, Tuple[str, ...], str]] = [
+    (
+        "idx_fixtures_league_kickoff",
+        ("league_id", "kickoff_at", "id"),
+        "ON fixtures (league_id, kickoff_at, id)",
+    ),
+    (
+        "idx_fixtures_kickoff_id",
+        ("kickoff_at", "id"),
+        "ON fixtures (kickoff_at, id)",
+    ),
+    (
+        "idx_fixtures_finished_league_kickoff",
+        ("league_id", "kickoff_at", "home_team_id", "away_team_id", "home_goals", "away_goals"),
+        "ON fixtures (league_id, kickoff_at) INCLUDE (home_team_id, away_team_id, home_goals, away_goals) "
+        "WHERE home_goals IS NOT NULL AND away_goals IS NOT NULL",
+    ),
+    (
+        "idx_fixtures_provider_fixture_id",
+        ("provider_fixture_id",),
+        "ON fixtures (provider_fixture_id)",
+    ),
+]
+
+
+def _index_state(cur, name: str) -> Optional[bool]:
+    """None dacă indexul nu există, altfel indisvalid (False după un CONCURRENTLY eșuat)."""
+    cur.execute(
+        """
+        SELECT i.indisvalid AS valid
+        FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relname = %s
+        """,
+        (name,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return bool(_scalar(row, key="valid"))
+
+
+def _has_index_leading_on(cur, table: str, column: str) -> bool:
+    """Există deja un index (ex: UNIQUE) care începe cu coloana dată?"""
+    cur.execute(
+        """
+        SELECT EXISTS(
+          SELECT 1
+          FROM pg_index i
+          JOIN pg_class t ON t.oid = i.indrelid
+          JOIN pg_namespace n ON n.oid = t.relnamespace
+          JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+          WHERE n.nspname = 'public' AND t.relname = %s AND a.attname = %s AND i.indisvalid
+        ) AS exists
+        """,
+        (table, column),
+    )
+    return bool(_scalar(cur.fetchone(), key="exists"))
+
+
+def _ensure_hot_indexes() -> Dict[str, str]:
+    """
+    CREATE INDEX CONCURRENTLY nu blochează scrierile, dar nu poate rula într-o
+    tranzacție -> conexiune separată în autocommit. Un index rămas INVALID
+    (build întrerupt) e șters și recreat.
+    """
+    out: Dict[str, str] = {}
+
+    with get_conn() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                for name, columns, definition in _HOT_INDEXES:
+                    if not all(_column_exists(cur, "fixtures", c) for c in columns):
+                        out[name] = "skipped (missing columns)"
+                        continue
+
+                    state = _index_state(cur, name)
+                    if state is True:
+                        out[name] = "exists"
+                        continue
+                    if state is False:
+                        cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";')
+                    elif len(columns) == 1 and _has_index_leading_on(cur, "fixtures", columns[0]):
+                        out[name] = "skipped (covered by existing index)"
+                        continue
+
+                    cur.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" {definition};')
+                    out[name] = "created"
+
+                cur.execute("ANALYZE fixtures;")
+        finally:
+            # conexiunea se întoarce în pool
+            conn.autocommit = False
+
+    return out
+
+
 # --------------------------
 # migrations / compatibility
 # --------------------------
@@ -238,6 +345,12 @@ def init_db() -> dict:
     Creează schema + face migrarea astfel încât sync/fixtures să funcționeze.
     Returnează dict pentru endpoint /admin/db/init.
     """
+    result = _init_schema()
+    result["indexes"] = _ensure_hot_indexes()
+    return result
+
+
+def _init_schema() -> dict:
     force_recreate = os.getenv("FORCE_RECREATE_FIXTURES", "1").strip() not in ("0", "false", "False")
 
     with get_conn() as conn:
@@ -1,9 +1,8 @@
 from __future__ import annotations
 import os
-import time
 from typing import Dict, Any, Optional
 
-import httpx
+from app.core.http_client import get_json
 
 # IMPORTANT: aici imporți funcțiile tale reale de DB/upsert
 # adaptează importurile la proiectul tău:
@@ -27,18 +26,11 @@ def _headers() -> Dict[str, str]:
 
 
 def _get_with_retry(url: str, params: dict, tries: int = 4) -> dict:
-    last_err: Optional[Exception] = None
-    for i in range(tries):
-        try:
-            with httpx.Client(timeout=DEFAULT_TIMEOUT) as client:
-                r = client.get(url, headers=_headers(), params=params)
-                r.raise_for_status()
-                return r.json()
-        except Exception as e:
-            last_err = e
-            # backoff: 1s, 2s, 4s, 8s
-            time.sleep(2**i)
-    raise RuntimeError(f"API request failed after retries: {last_err}")
+    # client partajat (keep-alive) + retry cu backoff și jitter
+    try:
+        return get_json(url, headers=_headers(), params=params, retries=tries - 1, timeout=DEFAULT_TIMEOUT)
+    except Exception as e:
+        raise RuntimeError(f"API request failed after retries: {e}")
 
 
 def run_fixtures_sync_job(
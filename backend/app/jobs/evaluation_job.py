@@ -1,21 +1,546 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any, Dict
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from psycopg2.extras import Json
+
+from app.db import get_conn
+from app.services.calibration import (
+    fit_isotonic_binary,
+    fit_platt_binary,
+    fit_platt_ovr,
+    serialize_calibration,
+)
+from app.services.calibration_registry import invalidate_calibration
+from app.services.evaluation_metrics import BinaryAccumulator, MulticlassAccumulator
+from app.services.prediction_engine import (
+    MODEL_VERSION,
+    expected_goals_for_fixture,
+    predict_markets_batch,
+)
+from app.utils.job_logger import log_job
+
+# procese pentru ligi (replay-ul e CPU-bound); 1 -> totul în procesul jobului
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+EVAL_FETCH_SIZE = int(os.getenv("EVAL_FETCH_SIZE", "5000"))
+
+# aceiași parametri ca predictions_job
+PAST_WINDOW = 1200
+HALF_LIFE_MATCHES = 20.0
+HOME_ADV = 1.10
+
+# ultimele 30% din eșantioane (cronologic) evaluează calibrarea fitată pe primele 70%
+CALIBRATION_HOLDOUT = 0.3
+
+BINARY_MARKETS = ("gg", "ou25")
+CLASSES_1X2 = ("1", "X", "2")
+
+
+class WalkForwardStrengths:
+    """
+    Starea incrementală a unei ligi pentru replay: aceleași valori ca
+    LeagueStrengthTable(ultimele meciuri, half_life_matches) și
+    predictions_job._league_avg_goals, dar actualizate în O(1) per meci.
+
+    Ponderea 2^(-age/half_life) e ținută ca pondere crescătoare (scale *= 2^(1/half_life)
+    la fiecare meci nou); raportul sumelor e același. Meciurile mai vechi de fereastră
+    rămân cu ponderi < 2^-60, neglijabile.
+    """
+
+    def __init__(self, window: int = PAST_WINDOW, half_life_matches: float = HALF_LIFE_MATCHES):
+        self._growth = 2.0 ** (1.0 / max(1e-6, half_life_matches))
+        self._scale = 1.0
+        self._agg: Dict[int, List[float]] = {}
+        self._goals: deque = deque(maxlen=window)
+        self._goals_sum = 0
+
+    def add(self, home_id: Any, away_id: Any, hg: int, ag: int) -> None:
+        if len(self._goals) == self._goals.maxlen:
+            self._goals_sum -= self._goals[0]
+        self._goals.append(hg + ag)
+        self._goals_sum += hg + ag
+
+        # vârsta se numără pe toate meciurile ligii, ca în LeagueStrengthTable
+        self._scale *= self._growth
+        if self._scale > 1e200:
+            # renormalizare ca să nu depășim float-ul pe istorii lungi
+            for agg in self._agg.values():
+                agg[0] /= self._scale
+                agg[1] /= self._scale
+                agg[2] /= self._scale
+            self._scale = 1.0
+
+        try:
+            h = int(home_id)
+            a = int(away_id)
+        except Exception:
+            return
+
+        self._add(h, self._scale, hg, ag)
+        if a != h:
+            self._add(a, self._scale, ag, hg)
+
+    def _add(self, team_id: int, w: float, scored: int, conceded: int) -> None:
+        agg = self._agg.get(team_id)
+        if agg is None:
+            agg = self._agg[team_id] = [0.0, 0.0, 0.0]
+        agg[0] += w
+        agg[1] += w * scored
+        agg[2] += w * conceded
+
+    def get(self, team_id: int) -> Tuple[float, float, float]:
+        agg = self._agg.get(team_id)
+        if agg is None or agg[0] <= 0:
+            return 0.0, 0.0, 0.0
+        w_sum, s_scored, s_conceded = agg
+        return s_scored / w_sum, s_conceded / w_sum, w_sum / self._scale
+
+    def league_avg_goals(self) -> float:
+        if not self._goals:
+            return 2.6
+        return max(1.8, min(3.4, self._goals_sum / len(self._goals)))
+
+
+def _outcome(hg: int, ag: int) -> str:
+    if hg > ag:
+        return "1"
+    if hg == ag:
+        return "X"
+    return "2"
+
+
+def _replay_league(league_id: Any, eval_from: datetime) -> Dict[str, Any]:
+    """
+    Replay cronologic al meciurilor terminate dintr-o ligă (cursor server-side).
+    Meciurile cu kickoff >= eval_from primesc o predicție out-of-sample din starea
+    de dinainte; meciurile cu același kickoff nu se văd între ele.
+    """
+    state = WalkForwardStrengths()
+    expected: List[Tuple[float, float, Dict[str, Any]]] = []
+    results: List[Tuple[int, int]] = []
+    kickoffs: List[datetime] = []
+    skipped = 0
+
+    def flush(group: List[tuple]) -> None:
+        nonlocal skipped
+        if group[0][0] >= eval_from:
+            league_avg = state.league_avg_goals()
+            for kickoff_at, home_id, away_id, hg, ag in group:
+                try:
+                    e = expected_goals_for_fixture(
+                        {"home_team_id": home_id, "away_team_id": away_id},
+                        [],
+                        league_avg_goals=league_avg,
+                        league_scored_avg=league_avg / 2.0,
+                        home_adv=HOME_ADV,
+                        strengths=state,
+                    )
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                expected.append(e)
+                results.append((hg, ag))
+                kickoffs.append(kickoff_at)
+        for _, home_id, away_id, hg, ag in group:
+            state.add(home_id, away_id, hg, ag)
+
+    with get_conn() as conn:
+        with conn.cursor(name="eval_replay") as cur:
+            cur.itersize = EVAL_FETCH_SIZE
+            cur.execute(
+                """
+                select kickoff_at, home_team_id, away_team_id, home_goals, away_goals
+                from fixtures
+                where league_id = %s::uuid
+                  and home_goals is not null
+                  and away_goals is not null
+                  and kickoff_at is not null
+                order by kickoff_at, id
+                """,
+                (league_id,),
+            )
+            group: List[tuple] = []
+            for kickoff_at, home_id, away_id, hg, ag in cur:
+                if group and kickoff_at != group[0][0]:
+                    flush(group)
+                    group = []
+                group.append((kickoff_at, home_id, away_id, int(hg), int(ag)))
+            if group:
+                flush(group)
+
+    probs = predict_markets_batch([e[0] for e in expected], [e[1] for e in expected])
+
+    part = {
+        "league_id": str(league_id),
+        "skipped": skipped,
+        # per eșantion, ca setul global să fie ordonat cronologic înainte de holdout
+        "kickoff_at": kickoffs,
+        "gg": (
+            [p["gg"]["GG"] for p in probs],
+            [1 if hg > 0 and ag > 0 else 0 for hg, ag in results],
+        ),
+        "ou25": (
+            [p["ou25"]["O2.5"] for p in probs],
+            [1 if hg + ag > 2 else 0 for hg, ag in results],
+        ),
+        "1x2": (
+            [p["1x2"] for p in probs],
+            [_outcome(hg, ag) for hg, ag in results],
+        ),
+    }
+    # metricile raw se agregă în worker; părintele doar face merge
+    part["raw"] = _accumulate(part)
+    return part
+
+
+def _accumulate(data: Dict[str, Any]) -> Dict[str, Any]:
+    raw: Dict[str, Any] = {}
+    for market in BINARY_MARKETS:
+        raw[market] = _binary_acc(*data[market])
+    raw["1x2"] = _multiclass_acc(*data["1x2"])
+    return raw
+
+
+def _binary_acc(preds: List[float], labels: List[int]) -> BinaryAccumulator:
+    acc = BinaryAccumulator()
+    acc.add_batch(preds, labels)
+    return acc
+
+
+def _multiclass_acc(probs: List[Dict[str, float]], labels: List[str]) -> MulticlassAccumulator:
+    acc = MulticlassAccumulator(CLASSES_1X2)
+    if probs:
+        acc.add_batch([[p.get(k, 0.0) for k in CLASSES_1X2] for p in probs], labels)
+    return acc
+
+
+def _binary_metrics(preds: List[float], labels: List[int]) -> Dict[str, Any]:
+    return _binary_acc(preds, labels).result()
+
+
+def _multiclass_metrics(probs: List[Dict[str, float]], labels: List[str]) -> Dict[str, Any]:
+    return _multiclass_acc(probs, labels).result()
+
+
+def _fit_binary(preds: List[float], labels: List[int], holdout: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Platt vs isotonic: câștigă cel cu logloss mai mic pe holdout (fitat pe restul);
+    modelul păstrat e refitat pe toate eșantioanele.
+    """
+    split = len(preds) - holdout
+    train_p, train_y = preds[:split], labels[:split]
+    test_p, test_y = preds[split:], labels[split:]
+
+    report: Dict[str, Any] = {"raw": _binary_metrics(test_p, test_y)}
+    best_name, best_ll = None, math.inf
+    for name, fit in (("platt", fit_platt_binary), ("isotonic", fit_isotonic_binary)):
+        if len(set(train_y)) < 2:
+            break
+        model = fit(train_p, train_y)
+        m = _binary_metrics(model.apply_batch(np.asarray(test_p, dtype=float)), test_y)
+        report[name] = m
+        if m["logloss"] < best_ll:
+            best_name, best_ll = name, m["logloss"]
+
+    if best_name is None or best_ll >= report["raw"]["logloss"]:
+        # calibrarea nu ajută out-of-sample: nu o salvăm
+        return None, report
+    report["selected"] = best_name
+    fit = fit_platt_binary if best_name == "platt" else fit_isotonic_binary
+    return fit(preds, labels), report
+
+
+def _fit_1x2(probs: List[Dict[str, float]], labels: List[str], holdout: int) -> Tuple[Any, Dict[str, Any]]:
+    split = len(probs) - holdout
+    train_p, train_y = probs[:split], labels[:split]
+    test_p, test_y = probs[split:], labels[split:]
+
+    report: Dict[str, Any] = {"raw": _multiclass_metrics(test_p, test_y)}
+    model = fit_platt_ovr(train_p, train_y)
+    report["platt"] = _multiclass_metrics([model.apply_probs(p) for p in test_p], test_y)
+    if report["platt"]["logloss"] >= report["raw"]["logloss"]:
+        # calibrarea nu ajută out-of-sample: nu o salvăm
+        return None, report
+    report["selected"] = "platt"
+    return fit_platt_ovr(probs, labels), report
+
+
+def _evaluate(data: Dict[str, Any], min_samples: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Metrici raw pe toate eșantioanele (din acumulatori, cu reliability bins) +
+    raport de calibrare pe holdout. Returnează (metrics, params) - params e None sub min_samples.
+    """
+    n = len(data["1x2"][0])
+    metrics: Dict[str, Any] = {
+        "samples": n,
+        "raw": {market: acc.result(with_bins=True) for market, acc in data["raw"].items()},
+    }
+    if n < min_samples:
+        return metrics, None
+
+    holdout = max(1, int(n * CALIBRATION_HOLDOUT))
+    calibration: Dict[str, Any] = {}
+    cal_binary = {}
+    for market in BINARY_MARKETS:
+        model, calibration[market] = _fit_binary(*data[market], holdout)
+        if model is not None:
+            cal_binary[market] = model
+    cal_ovr, calibration["1x2"] = _fit_1x2(*data["1x2"], holdout)
+
+    metrics["calibration_holdout"] = calibration
+    return metrics, serialize_calibration(cal_binary, cal_ovr)
+
+
+def _merge_data(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Concatenează ligile și ordonează eșantioanele după kickoff_at, ca holdout-ul
+    global (ultimele CALIBRATION_HOLDOUT) să fie cele mai recente meciuri din
+    toate ligile, nu ultimele ligi din listă. Acumulatorii nu depind de ordine.
+    """
+    markets = BINARY_MARKETS + ("1x2",)
+    concat: Dict[str, Any] = {m: ([], []) for m in markets}
+    kickoffs: List[datetime] = []
+    raw = _accumulate(concat)
+    for part in parts:
+        kickoffs.extend(part["kickoff_at"])
+        for market, (preds, labels) in concat.items():
+            preds.extend(part[market][0])
+            labels.extend(part[market][1])
+        for market, acc in raw.items():
+            acc.merge(part["raw"][market])
+
+    # sort stabil: la același kickoff rămâne ordinea ligilor (determinist)
+    order = sorted(range(len(kickoffs)), key=kickoffs.__getitem__)
+    merged: Dict[str, Any] = {
+        m: ([concat[m][0][i] for i in order], [concat[m][1][i] for i in order]) for m in markets
+    }
+    merged["kickoff_at"] = [kickoffs[i] for i in order]
+    merged["raw"] = raw
+    return merged
+
+
+def _fetch_league_ids(eval_from: datetime, league_id: Any, provider_league_id: Any = None) -> List[Any]:
+    """
+    fixtures.league_id e uuid (leagues.id): o ligă cerută după id-ul din API-Football
+    e mapată prin leagues; fără filtre -> toate ligile cu meciuri terminate în fereastră.
+    """
+    if league_id is not None:
+        return [str(league_id)]
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if provider_league_id is not None:
+                cur.execute(
+                    "select id from leagues where provider_league_id::int = %s",
+                    (int(provider_league_id),),
+                )
+                row = cur.fetchone()
+                if row is None:
+                    raise ValueError(f"league with provider_league_id {provider_league_id} not found")
+                return [str(row[0])]
+
+            cur.execute(
+                """
+                select distinct league_id
+                from fixtures
+                where home_goals is not null
+                  and away_goals is not null
+                  and kickoff_at >= %s
+                  and league_id is not null
+                """,
+                (eval_from,),
+            )
+            return [str(r[0]) for r in cur.fetchall()]
+
+
+def _ensure_evaluation_table(cur) -> None:
+    cur.execute(
+        """
+        create table if not exists model_evaluation (
+          id bigserial primary key,
+          model_version text not null,
+          league_id text,
+          days_back int,
+          samples int not null,
+          metrics jsonb not null,
+          created_at timestamptz not null default now()
+        )
+        """
+    )
+    cur.execute(
+        """
+        create index if not exists idx_model_evaluation_latest
+        on model_evaluation (model_version, league_id, created_at desc)
+        """
+    )
+
+
+def _save(
+    days_back: int,
+    global_metrics: Dict[str, Any],
+    league_metrics: Dict[str, Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+    *,
+    league_only: bool = False,
+    keep_global: bool = False,
+) -> None:
+    """
+    Metricile într-un rând per ligă + unul global (league_id null); calibrarea
+    globală în params, cele per ligă în params["leagues"], pe rândul model_version.
+    league_only: fără rând global, iar ligile evaluate se adaugă peste calibrarea existentă.
+    keep_global: binary / ovr globale salvate rămân, se înlocuiește doar params["leagues"].
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            _ensure_evaluation_table(cur)
+
+            rows = ([] if league_only else [(None, global_metrics)]) + sorted(league_metrics.items())
+            for lid, metrics in rows:
+                cur.execute(
+                    """
+                    insert into model_evaluation (model_version, league_id, days_back, samples, metrics)
+                    values (%s, %s, %s, %s, %s)
+                    """,
+                    (MODEL_VERSION, lid, days_back, metrics["samples"], Json(metrics)),
+                )
+
+            if params is not None and (league_only or keep_global):
+                cur.execute(
+                    "select params from model_calibration where model_version = %s for update",
+                    (MODEL_VERSION,),
+                )
+                row = cur.fetchone()
+                existing = (row[0] if row else None) or {"binary": {}, "ovr": None}
+                if league_only:
+                    existing.setdefault("leagues", {}).update(params.get("leagues") or {})
+                else:
+                    existing["leagues"] = params.get("leagues") or {}
+                params = existing
+
+            if params is not None:
+                cur.execute(
+                    "update model_calibration set params = %s, updated_at = now() where model_version = %s",
+                    (Json(params), MODEL_VERSION),
+                )
+                if cur.rowcount == 0:
+                    cur.execute(
+                        "insert into model_calibration (model_version, params, updated_at) values (%s, %s, now())",
+                        (MODEL_VERSION, Json(params)),
+                    )
+
+        conn.commit()
+
+    if params is not None:
+        invalidate_calibration()
 
 
 def run_evaluation_and_calibration_job(
     days_back: int = 120,
     min_samples: int = 120,
-    league_id: int | None = None,
+    league_id: str | None = None,
+    provider_league_id: int | None = None,
 ) -> Dict[str, Any]:
+    """
+    Backtest walk-forward: fiecare ligă e reluată cronologic (în paralel, pe procese),
+    cu predicții out-of-sample pentru meciurile din ultimele days_back zile.
+    Apoi metrici, alegerea calibrării pe holdout și salvarea lor.
+    league_id e uuid-ul din leagues; alternativ provider_league_id (API-Football).
+    """
+    job = "evaluation"
+    started = datetime.now(timezone.utc)
+    eval_from = started - timedelta(days=days_back)
 
-    return {
-        "ok": True,
-        "status": "disabled_temporarily",
-        "message": "evaluation job disabled for now",
-        "days_back": days_back,
-        "min_samples": min_samples,
-        "league_id": league_id,
-        "finished_at": datetime.now(timezone.utc).isoformat(),
-    }
+    try:
+        league_ids = _fetch_league_ids(eval_from, league_id, provider_league_id)
+
+        parts: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        workers = min(EVAL_WORKERS, len(league_ids))
+        if workers <= 1:
+            for lid in league_ids:
+                try:
+                    parts.append(_replay_league(lid, eval_from))
+                except Exception as e:
+                    errors.append(f"league {lid}: {e}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_replay_league, lid, eval_from): lid for lid in league_ids}
+                for fut in as_completed(futures):
+                    try:
+                        parts.append(fut.result())
+                    except Exception as e:
+                        errors.append(f"league {futures[fut]}: {e}")
+
+        if league_ids and len(errors) == len(league_ids):
+            # nicio ligă reluată: nu raportăm ok cu 0 ligi
+            raise RuntimeError(f"all {len(errors)} leagues failed; first: {errors[0]}")
+
+        parts = [p for p in parts if p["1x2"][0]]
+        parts.sort(key=lambda p: p["league_id"])
+
+        league_metrics: Dict[str, Dict[str, Any]] = {}
+        league_params: Dict[str, Dict[str, Any]] = {}
+        for part in parts:
+            metrics, params = _evaluate(part, min_samples)
+            metrics["skipped"] = part["skipped"]
+            league_metrics[part["league_id"]] = metrics
+            if params is not None:
+                league_params[part["league_id"]] = params
+
+        global_metrics, params = _evaluate(_merge_data(parts), min_samples)
+        global_metrics["leagues"] = len(parts)
+
+        # un backtest pe o singură ligă nu înlocuiește calibrarea globală; nici un
+        # set global sub min_samples (rămâne cea salvată, se înlocuiesc doar ligile)
+        league_only = league_id is not None or provider_league_id is not None
+        keep_global = False
+        if league_only:
+            params = {"leagues": league_params} if league_params else None
+        elif params is not None:
+            params["leagues"] = league_params
+        elif league_params:
+            params = {"leagues": league_params}
+            keep_global = True
+
+        _save(
+            days_back,
+            global_metrics,
+            league_metrics,
+            params,
+            league_only=league_only,
+            keep_global=keep_global,
+        )
+
+        finished = datetime.now(timezone.utc)
+        log_job(
+            job,
+            "success",
+            f"{global_metrics['samples']} fixtures, {len(parts)} leagues, "
+            f"{len(errors)} errors in {(finished - started).total_seconds():.1f}s",
+        )
+        return {
+            "ok": True,
+            "model_version": MODEL_VERSION,
+            "days_back": days_back,
+            "min_samples": min_samples,
+            "league_id": league_id,
+            "provider_league_id": provider_league_id,
+            "league_ids": league_ids if league_only else None,
+            "leagues": len(parts),
+            "samples": global_metrics["samples"],
+            "calibration_saved": params is not None,
+            "calibrated_leagues": sorted(league_params) if params is not None else [],
+            "errors_count": len(errors),
+            "errors_preview": errors[:10],
+            "metrics": global_metrics,
+            "finished_at": finished.isoformat(),
+        }
+
+    except Exception as e:
+        log_job(job, "failed", str(e))
+        raise
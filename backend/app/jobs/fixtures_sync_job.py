@@ -1,2 +1,103 @@
-def run_fixtures_sync_job():
-    return {"status": "sync started"}
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.core.supabase_writer import SupabaseBatchWriter
+from app.db import supabase_client
+from app.services.football_fetcher import fetch_next_fixtures
+from app.utils.job_logger import log_job
+
+
+def run_fixtures_sync_job(
+    season: int,
+    next_count: int = 10,
+    leagues: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Job RQ pentru /fixtures/admin-sync: fetch concurent (token bucket pe cota
+    API-Football), apoi upsert în Supabase în bucăți. Rezumatul e rezultatul jobului.
+    """
+    # import lazy: ruta importă acest modul pentru enqueue
+    from app.routes.fixtures_sync import DEFAULT_LEAGUES, _extract_fixture_row, _league_row
+
+    league_ids = list(leagues or DEFAULT_LEAGUES)
+
+    leagues_done = 0
+    inserted = 0
+    updated = 0
+    skipped = 0
+    errors: List[str] = []
+    debug_preview: List[Dict[str, Any]] = []
+
+    leagues_writer = SupabaseBatchWriter(supabase_client, "leagues", "provider_league_id")
+    fixtures_writer = SupabaseBatchWriter(supabase_client, "fixtures", "provider_fixture_id")
+
+    try:
+        results = asyncio.run(fetch_next_fixtures(league_ids, season, next_count))
+
+        for league_provider_id in league_ids:
+            fixtures = results.get(league_provider_id)
+            if isinstance(fixtures, BaseException):
+                errors.append(f"league {league_provider_id}: {fixtures}")
+                continue
+
+            try:
+                debug_preview.append(
+                    {
+                        "league": league_provider_id,
+                        "season": season,
+                        "count": len(fixtures),
+                    }
+                )
+
+                if not fixtures:
+                    skipped += 1
+                    continue
+
+                for item in fixtures:
+                    league_row = _league_row(item.get("league", {}) or {})
+                    if league_row is not None:
+                        # o ligă se scrie o singură dată pe rulare
+                        leagues_writer.add(league_row, once=True)
+
+                    row = _extract_fixture_row(item)
+                    if not row.get("provider_fixture_id"):
+                        skipped += 1
+                        continue
+
+                    fixtures_writer.add(row)
+
+                leagues_done += 1
+
+            except Exception as e:
+                errors.append(f"league {league_provider_id}: {e}")
+
+        # ligile înaintea meciurilor care le referă
+        leagues_writer.close()
+        fixtures_writer.close()
+        inserted = fixtures_writer.written
+        errors.extend(leagues_writer.errors + fixtures_writer.errors)
+
+        summary = {
+            "ok": True,
+            "season": season,
+            "leagues": leagues_done,
+            "inserted": inserted,
+            "updated": updated,
+            "skipped": skipped,
+            "errors_count": len(errors),
+            "errors_preview": errors[:10],
+            "debug_preview": debug_preview[:20],
+            "writes": [leagues_writer.stats(), fixtures_writer.stats()],
+        }
+        log_job(
+            "fixtures_sync",
+            "success",
+            f"season={season} leagues={leagues_done} inserted={inserted} errors={len(errors)}",
+        )
+        return summary
+
+    except Exception as e:
+        log_job("fixtures_sync", "failed", str(e))
+        raise
@@ -3,12 +3,15 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List
 
+from app.core.supabase_writer import SupabaseBatchWriter
 from app.db import supabase_client
-from app.services.predictions_engine import (
+from app.services.prediction_engine import (
     MODEL_VERSION,
-    compute_prediction_for_fixture,
+    LeagueStrengthTable,
+    expected_goals_for_fixture,
+    predictions_from_expected_goals,
 )
-from app.services.calibration import load_calibration
+from app.services.calibration_registry import get_calibration_snapshot
 
 
 def _utc_now() -> datetime:
@@ -17,22 +20,12 @@ def _utc_now() -> datetime:
 def _iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat()
 
-def _fetch_calibration():
-    res = (
-        supabase_client.table("model_calibration")
-        .select("model_version, params, updated_at")
-        .eq("model_version", MODEL_VERSION)
-        .limit(1)
-        .execute()
-        .data
-    )
-    if not res:
-        return {}, None
-    params = res[0].get("params") or {}
-    cal_binary, cal_ovr = load_calibration(params)
-    return cal_binary, cal_ovr
-
-def _fetch_upcoming_fixtures(from_dt: datetime, to_dt: datetime, league_id: int | None = None) -> List[Dict[str, Any]]:
+def _fetch_upcoming_fixtures(
+    from_dt: datetime,
+    to_dt: datetime,
+    league_id: int | None = None,
+    team_ids: List[Any] | None = None,
+) -> List[Dict[str, Any]]:
     q = supabase_client.table("fixtures").select(
         "id, league_id, kickoff_at, home_team_id, away_team_id, status"
     ).gte("kickoff_at", _iso(from_dt)).lte("kickoff_at", _iso(to_dt))
@@ -40,6 +33,11 @@ def _fetch_upcoming_fixtures(from_dt: datetime, to_dt: datetime, league_id: int
     if league_id is not None:
         q = q.eq("league_id", league_id)
 
+    if team_ids:
+        # doar meciurile în care joacă una dintre echipe (ex: live sync după un meci terminat)
+        ids = ",".join(str(t) for t in team_ids)
+        q = q.or_(f"home_team_id.in.({ids}),away_team_id.in.({ids})")
+
     res = q.order("kickoff_at", desc=False).limit(1200).execute().data or []
     out = []
     for f in res:
@@ -82,56 +80,81 @@ def _league_avg_goals(past: List[Dict[str, Any]]) -> float:
 def _league_scored_avg(past: List[Dict[str, Any]]) -> float:
     return _league_avg_goals(past) / 2.0
 
-def _upsert_prediction(fixture_id: int, payload: Dict[str, Any]) -> None:
-    row = {
+def _prediction_row(fixture_id: Any, payload: Dict[str, Any], computed_at: str) -> Dict[str, Any]:
+    return {
         "fixture_id": fixture_id,
         "model_version": payload["model_version"],
         "inputs": payload["inputs"],
         "probs": payload["probs"],
         "picks": payload["picks"],
         "metrics": payload["metrics"],
-        "computed_at": _iso(_utc_now()),
+        "computed_at": computed_at,
     }
-    supabase_client.table("predictions").upsert(row, on_conflict="fixture_id,model_version").execute()
 
 def run_predictions_job(
     days_ahead: int = 2,
     past_limit_per_league: int = 1200,
     league_id: int | None = None,
+    team_ids: List[Any] | None = None,
 ) -> Dict[str, Any]:
     now = _utc_now()
     from_dt = now - timedelta(hours=1)
     to_dt = now + timedelta(days=days_ahead)
 
-    fixtures = _fetch_upcoming_fixtures(from_dt, to_dt, league_id=league_id)
+    fixtures = _fetch_upcoming_fixtures(from_dt, to_dt, league_id=league_id, team_ids=team_ids)
 
-    by_league: Dict[int, List[Dict[str, Any]]] = {}
+    # id-urile rămân în forma din DB (uuid), ca predictions.fixture_id să facă join cu fixtures.id
+    by_league: Dict[Any, List[Dict[str, Any]]] = {}
     for f in fixtures:
-        by_league.setdefault(int(f["league_id"]), []).append(f)
+        by_league.setdefault(f["league_id"], []).append(f)
 
-    cal_binary, cal_ovr = _fetch_calibration()
+    # calibrarea per ligă (fallback la cea globală) din registry, verificată la start
+    calibration = get_calibration_snapshot(force=True)
 
-    total = 0
+    batch_fixtures: List[Dict[str, Any]] = []
+    batch_expected = []
+    batch_calibrations = []
     leagues = 0
+    calibrated_leagues = 0
 
     for lg_id, fx_list in by_league.items():
         leagues += 1
         past = _fetch_past_matches_for_league(lg_id, before_dt=now, limit=past_limit_per_league)
         league_avg = _league_avg_goals(past)
         league_scored = _league_scored_avg(past)
+        strengths = LeagueStrengthTable(past, half_life_matches=20.0)
+        league_cal = calibration.for_league(MODEL_VERSION, lg_id)
+        if league_cal[0] or league_cal[1]:
+            calibrated_leagues += 1
 
         for fx in fx_list:
-            pred = compute_prediction_for_fixture(
-                fixture=fx,
-                past_matches=past,
-                league_avg_goals=league_avg,
-                league_scored_avg=league_scored,
-                home_adv=1.10,
-                cal_binary=cal_binary,
-                cal_ovr=cal_ovr,
+            batch_fixtures.append(fx)
+            batch_calibrations.append(league_cal)
+            batch_expected.append(
+                expected_goals_for_fixture(
+                    fx,
+                    past,
+                    league_avg_goals=league_avg,
+                    league_scored_avg=league_scored,
+                    home_adv=1.10,
+                    strengths=strengths,
+                )
             )
-            _upsert_prediction(int(fx["id"]), pred)
-            total += 1
+
+    # scorare vectorizată pentru toate meciurile din rulare
+    preds = predictions_from_expected_goals(batch_expected, calibrations=batch_calibrations)
+
+    # upsert-uri în bucăți (SUPABASE_WRITE_CHUNK), nu un request per meci
+    computed_at = _iso(_utc_now())
+    with SupabaseBatchWriter(
+        supabase_client,
+        "predictions",
+        "fixture_id,model_version",
+        raise_on_error=True,
+    ) as writer:
+        for fx, pred in zip(batch_fixtures, preds):
+            writer.add(_prediction_row(fx["id"], pred, computed_at))
+    total = writer.written
 
     return {
         "ok": True,
@@ -140,5 +163,7 @@ def run_predictions_job(
         "leagues": leagues,
         "range": {"from": _iso(from_dt), "to": _iso(to_dt)},
         "league_id": league_id,
-        "calibration_loaded": bool(cal_binary or cal_ovr),
+        "team_ids": team_ids,
+        "calibration_loaded": bool(calibration.entries),
+        "calibrated_leagues": calibrated_leagues,
     }
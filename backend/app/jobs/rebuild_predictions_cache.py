@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+from app.core.cache import refresh_key
 from app.utils.job_logger import log_job
 
+# cheile folosite de app.routes.predictions pentru listele încălzite aici
+WARM_KEYS = ("predictions:100", "predictions:today", "predictions:top:20")
+
 
 def run() -> None:
     try:
-        from app.routes.predictions import list_predictions, list_predictions_today, list_top_predictions
+        # importul înregistrează refresher-ul pentru prefixul predictions:
+        import app.routes.predictions  # noqa: F401
 
-        list_predictions(limit=100)
-        list_predictions_today()
-        list_top_predictions(limit=20)
+        # recalculează prin refresher-ul SWR și scrie în Redis (vizibil tuturor workerilor)
+        for key in WARM_KEYS:
+            refresh_key(key)
 
         log_job("rebuild_predictions_cache", "success", "prediction cache refreshed")
 
@@ -1,14 +1,19 @@
-from app.services.elo_service import rebuild_team_elo
+from app.services.elo_service import rebuild_team_elo, update_team_elo
 from app.utils.job_logger import log_job
 
 
-def run():
+def run(changed_fixture_ids=None, full: bool = False):
+    """
+    Implicit incremental (de la checkpoint-ul din team_elo); full=True sau un
+    rezultat corectat din trecut -> rebuild complet.
+    """
 
     job = "rebuild_team_elo"
 
     try:
-        rebuild_team_elo()
-        log_job(job, "success", "team_elo rebuilt")
+        result = rebuild_team_elo() if full else update_team_elo(changed_fixture_ids)
+        log_job(job, "success", f"team_elo {result['mode']}: {result['matches_applied']} matches applied")
+        return result
 
     except Exception as e:
         log_job(job, "failed", str(e))
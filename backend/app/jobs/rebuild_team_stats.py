@@ -1,14 +1,25 @@
-from app.services.stats_service import rebuild_team_stats
+from app.services.stats_services import rebuild_team_stats, update_team_stats
 from app.utils.job_logger import log_job
 
 
-def run():
+def run(changed_fixture_ids=None, full: bool = False, extra_groups=None):
+    """
+    Cu changed_fixture_ids doar grupurile (team, league, season) atinse, plus
+    extra_groups (grupurile vechi ale meciurilor mutate de sync_fixtures);
+    fără (sau full=True) -> toate grupurile, tot fără golirea tabelei.
+    """
 
     job = "rebuild_team_stats"
 
     try:
-        rebuild_team_stats()
-        log_job(job, "success", "team_stats rebuilt")
+        result = rebuild_team_stats() if full else update_team_stats(changed_fixture_ids, extra_groups)
+        log_job(
+            job,
+            "success",
+            f"team_stats {result['mode']}: {result['inserted']} inserted, "
+            f"{result['updated']} updated, {result['deleted']} deleted",
+        )
+        return result
 
     except Exception as e:
         log_job(job, "failed", str(e))
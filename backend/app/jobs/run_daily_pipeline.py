@@ -5,10 +5,16 @@ from app.jobs.rebuild_team_elo import run as run_rebuild_team_elo
 
 
 def run():
-    run_sync_fixtures()
-    run_sync_results()
-    run_rebuild_team_stats()
-    run_rebuild_team_elo()
+    fixtures = run_sync_fixtures()
+    results = run_sync_results()
+
+    # stats și Elo incremental; meciurile modificate decid ce se recalculează
+    changed = set(fixtures["changed_fixture_ids"]) | set(results["changed_fixture_ids"])
+    run_rebuild_team_stats(
+        changed_fixture_ids=sorted(changed),
+        extra_groups=fixtures["stale_stats_groups"],
+    )
+    run_rebuild_team_elo(changed_fixture_ids=sorted(changed))
 
 
 if __name__ == "__main__":
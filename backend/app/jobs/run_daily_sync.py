@@ -1,35 +1,32 @@
 from __future__ import annotations
 
+from app.jobs.sync_fixtures import run as run_sync_fixtures
+from app.jobs.sync_leagues import run as run_sync_leagues
+from app.jobs.sync_results import run as run_sync_results
+from app.jobs.sync_teams import run as run_sync_teams
+from app.services.elo_service import update_team_elo
+from app.services.stats_services import update_team_stats
 from app.utils.job_logger import log_job
 
 
 def run() -> None:
     try:
-        from app.routes.fixtures_sync import run_fixtures_sync
-        from app.routes.teams_sync import run_teams_sync
-        from app.routes.leagues_sync import run_leagues_sync
+        run_sync_leagues()
+        run_sync_teams()
+        fixtures = run_sync_fixtures()
+        results = run_sync_results()
 
-        try:
-            from app.routes.team_stats import rebuild_team_stats
-        except Exception:
-            rebuild_team_stats = None
+        changed = set(fixtures["changed_fixture_ids"]) | set(results["changed_fixture_ids"])
 
-        try:
-            from app.routes.evaluation import rebuild_team_elo
-        except Exception:
-            rebuild_team_elo = None
+        # doar grupurile (team, league, season) ale meciurilor modificate,
+        # plus grupurile vechi ale meciurilor mutate în altă ligă / sezon
+        update_team_stats(sorted(changed), fixtures["stale_stats_groups"])
 
-        run_leagues_sync()
-        run_teams_sync()
-        run_fixtures_sync()
+        # incremental de la checkpoint-ul din team_elo; meciurile modificate
+        # decid dacă trebuie rebuild complet
+        update_team_elo(sorted(changed))
 
-        if rebuild_team_stats:
-            rebuild_team_stats()
-
-        if rebuild_team_elo:
-            rebuild_team_elo()
-
-        log_job("run_daily_sync", "success", "daily sync completed")
+        log_job("run_daily_sync", "success", f"daily sync completed, {len(changed)} fixtures changed")
 
     except Exception as e:
         log_job("run_daily_sync", "failed", str(e))
@@ -1,48 +1,178 @@
 from __future__ import annotations
 
+import os
+import sys
+import time
+from typing import Any, Dict, List, Set
+
+from app.core.cache import tiered_cache_delete
+from app.db import get_conn
+from app.jobs.sync_results import _apply_results, _create_staging, _extract_results
+from app.services.football_api import get_fixtures_by_ids
 from app.utils.job_logger import log_job
 
+# statusuri API-Football
+LIVE_STATUSES = ["1H", "HT", "2H", "ET", "BT", "P", "INT", "SUSP", "LIVE"]
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+# meciuri care nu se mai schimbă (nu le mai interogăm)
+DONE_STATUSES = FINISHED_STATUSES + ["PST", "CANC", "ABD", "AWD", "WO"]
 
-def run() -> None:
-    try:
-        from app.routes.fixtures_sync import run_fixtures_sync
-        from app.routes.teams_sync import run_teams_sync
-        from app.routes.leagues_sync import run_leagues_sync
+# cât în urmă (de la kickoff) considerăm un meci posibil în desfășurare
+LIVE_LOOKBACK_HOURS = int(os.getenv("LIVE_LOOKBACK_HOURS", "4"))
+LIVE_SYNC_INTERVAL = int(os.getenv("LIVE_SYNC_INTERVAL", "60"))
+_IDS_PER_REQUEST = 20
 
-        try:
-            from app.routes.odds import run_odds_sync
-        except Exception:
-            run_odds_sync = None
 
-        try:
-            from app.routes.team_stats import rebuild_team_stats
-        except Exception:
-            rebuild_team_stats = None
+def _fetch_live_candidates(cur) -> List[str]:
+    """
+    provider_fixture_id pentru meciurile în desfășurare sau începute recent
+    și neterminate. Restul tabelei nu e atins.
+    """
+    cur.execute(
+        """
+        select provider_fixture_id
+        from fixtures
+        where provider_fixture_id is not null
+          and (
+            status = any(%(live)s)
+            or (
+              kickoff_at >= now() - make_interval(hours => %(hours)s)
+              and kickoff_at <= now() + interval '5 minutes'
+              and coalesce(status, 'NS') <> all(%(done)s)
+            )
+          )
+        """,
+        {"live": LIVE_STATUSES, "hours": LIVE_LOOKBACK_HOURS, "done": DONE_STATUSES},
+    )
+    return [str(r[0]) for r in cur.fetchall()]
 
-        try:
-            from app.routes.evaluation import rebuild_team_elo
-        except Exception:
-            rebuild_team_elo = None
 
-        run_leagues_sync()
-        run_teams_sync()
-        run_fixtures_sync()
+def _fetch_api_results(provider_ids: List[str]) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    for i in range(0, len(provider_ids), _IDS_PER_REQUEST):
+        payload = get_fixtures_by_ids(provider_ids[i:i + _IDS_PER_REQUEST])
+        items.extend(payload.get("response", []) or [])
+    return items
+
+
+def _affected(cur, changed_ids: List[str]) -> Dict[str, Any]:
+    """
+    Din meciurile modificate: ligile atinse și, pentru meciurile nou terminate,
+    echipele lor (și grupate pe ligă, pentru predicții).
+    """
+    cur.execute(
+        """
+        select id, league_id, home_team_id, away_team_id, status
+        from fixtures
+        where id = any(%s::uuid[])
+        """,
+        (changed_ids,),
+    )
+    leagues: Set[str] = set()
+    teams: Set[str] = set()
+    teams_by_league: Dict[str, Set[str]] = {}
+    finished: List[str] = []
+    for fixture_id, league_id, home_id, away_id, status in cur.fetchall():
+        leagues.add(str(league_id))
+        if status in FINISHED_STATUSES:
+            finished.append(str(fixture_id))
+            teams.update((str(home_id), str(away_id)))
+            teams_by_league.setdefault(str(league_id), set()).update((str(home_id), str(away_id)))
+    return {"leagues": leagues, "teams": teams, "teams_by_league": teams_by_league, "finished": finished}
+
+
+def _recompute_downstream(changed_ids: List[str], affected: Dict[str, Any]) -> None:
+    """
+    Recalculări doar pentru ce s-a schimbat:
+    - cache-ul de predicții per meci pentru meciurile modificate (și scor live)
+    - Elo, stats și predicții doar pentru meciurile nou terminate: un scor parțial
+      nu intră în Elo / team_stats / formă
+    - predicțiile doar pentru meciurile viitoare ale echipelor afectate
+    """
+    for fixture_id in changed_ids:
+        tiered_cache_delete(f"predictions:fixture:{fixture_id}")
+
+    finished = affected["finished"]
+    if not finished:
+        return
 
-        if run_odds_sync:
-            run_odds_sync()
+    from app.jobs.predictions_job import run_predictions_job
+    from app.services.elo_service import update_team_elo
+    from app.services.stats_services import update_team_stats
 
-        if rebuild_team_stats:
-            rebuild_team_stats()
+    update_team_elo(finished)
+    update_team_stats(finished)
 
-        if rebuild_team_elo:
-            rebuild_team_elo()
+    for league_id, team_ids in sorted(affected["teams_by_league"].items()):
+        run_predictions_job(league_id=league_id, team_ids=sorted(team_ids))
 
-        log_job("run_live_sync", "success", "15-minute sync completed")
+
+def run() -> Dict[str, Any]:
+    """
+    Un tick de live sync: doar meciurile live / recente, delte de scor și status.
+    Fără meciuri candidate nu face niciun request extern.
+    """
+    job_name = "run_live_sync"
+
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                provider_ids = _fetch_live_candidates(cur)
+
+        if not provider_ids:
+            return {"candidates": 0, "changed_fixture_ids": []}
+
+        rows = _extract_results(_fetch_api_results(provider_ids))
+
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                _create_staging(cur)
+                changed_ids = _apply_results(cur, rows) if rows else []
+                affected = _affected(cur, changed_ids) if changed_ids else {
+                    "leagues": set(),
+                    "teams": set(),
+                    "teams_by_league": {},
+                    "finished": [],
+                }
+            conn.commit()
+
+        if changed_ids:
+            _recompute_downstream(changed_ids, affected)
+
+        log_job(
+            job_name,
+            "success",
+            f"{len(provider_ids)} live candidates, {len(changed_ids)} changed, "
+            f"{len(affected['finished'])} finished",
+        )
+        return {
+            "candidates": len(provider_ids),
+            "changed_fixture_ids": sorted(changed_ids),
+            "finished_fixture_ids": sorted(affected["finished"]),
+            "affected_teams": sorted(affected["teams"]),
+        }
 
     except Exception as e:
-        log_job("run_live_sync", "failed", str(e))
+        log_job(job_name, "failed", str(e))
         raise
 
 
+def run_forever(interval_seconds: int = LIVE_SYNC_INTERVAL) -> None:
+    """
+    Polling continuu (ex: proces dedicat în zilele cu meciuri). Un tick eșuat
+    e logat de run() și nu oprește bucla.
+    """
+    while True:
+        started = time.monotonic()
+        try:
+            run()
+        except Exception:
+            pass
+        time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+
 if __name__ == "__main__":
-    run()
+    if "--loop" in sys.argv:
+        run_forever()
+    else:
+        run()
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from typing import Any, Dict, List, Set, Tuple
+
+from psycopg2.extras import execute_values
+
 from app.db import get_conn
 from app.services.football_api import get_fixtures
 from app.utils.dates import today_str, days_from_today
@@ -20,18 +24,18 @@ def _fetch_active_leagues():
             return cur.fetchall()
 
 
-def _find_team_id_by_provider(cur, provider_team_id: str):
+def _load_team_map(cur) -> Dict[str, Any]:
+    """
+    provider_team_id -> teams.id, încărcat o singură dată pe rulare.
+    """
     cur.execute(
         """
-        select id
+        select provider_team_id, id
         from teams
-        where provider_team_id = %s
-        limit 1
-        """,
-        (provider_team_id,),
+        where provider_team_id is not null
+        """
     )
-    row = cur.fetchone()
-    return row[0] if row else None
+    return {str(provider_id): team_id for provider_id, team_id in cur.fetchall()}
 
 
 def _find_or_create_season(cur, league_id, season_year: int):
@@ -71,7 +75,156 @@ def _find_or_create_season(cur, league_id, season_year: int):
     return new_row[0]
 
 
-def run(season: int = 2026, days_ahead: int = 14):
+# coloanele scrise de sync (aceeași ordine în staging, merge și tuple-uri)
+_FIXTURE_COLUMNS = (
+    "provider_fixture_id",
+    "league_id",
+    "home_team_id",
+    "away_team_id",
+    "kickoff_at",
+    "status",
+    "season_id",
+    "round",
+    "home_goals",
+    "away_goals",
+)
+_COLS = ", ".join(_FIXTURE_COLUMNS)
+_UPDATE_COLS = [c for c in _FIXTURE_COLUMNS if c != "provider_fixture_id"]
+
+
+def _create_staging(cur) -> None:
+    # aceleași tipuri ca în fixtures; dispare la commit
+    cur.execute(
+        f"""
+        create temp table if not exists _stage_fixtures
+        on commit drop
+        as select {_COLS} from fixtures with no data
+        """
+    )
+
+
+def _extract_rows(
+    items: List[Dict[str, Any]],
+    league_id,
+    season_id,
+    team_map: Dict[str, Any],
+) -> Tuple[List[tuple], int]:
+    """
+    Rândurile API -> tuple-uri pentru staging (unice pe provider_fixture_id).
+    Returnează (rows, skipped).
+    """
+    by_fixture: Dict[str, tuple] = {}
+    skipped = 0
+
+    for item in items:
+        fixture = item.get("fixture", {}) or {}
+        league = item.get("league", {}) or {}
+        teams = item.get("teams", {}) or {}
+        goals = item.get("goals", {}) or {}
+
+        home = teams.get("home", {}) or {}
+        away = teams.get("away", {}) or {}
+
+        provider_home_id = home.get("id")
+        provider_away_id = away.get("id")
+        provider_fixture_id = fixture.get("id")
+
+        if not provider_home_id or not provider_away_id or not provider_fixture_id:
+            skipped += 1
+            continue
+
+        home_team_id = team_map.get(str(provider_home_id))
+        away_team_id = team_map.get(str(provider_away_id))
+
+        if not home_team_id or not away_team_id:
+            skipped += 1
+            continue
+
+        # ON CONFLICT nu poate atinge același rând de două ori în același statement
+        by_fixture[str(provider_fixture_id)] = (
+            str(provider_fixture_id),
+            league_id,
+            home_team_id,
+            away_team_id,
+            fixture.get("date"),
+            (fixture.get("status", {}) or {}).get("short", "NS"),
+            season_id,
+            league.get("round"),
+            goals.get("home"),
+            goals.get("away"),
+        )
+
+    return list(by_fixture.values()), skipped
+
+
+def _stale_stats_groups(cur) -> Set[Tuple[Any, Any, Any]]:
+    """
+    Grupurile (team, league, season) vechi ale meciurilor cu scor care își schimbă
+    echipa, liga sau sezonul: după upsert meciul nu mai e în ele, deci trebuie
+    recalculate și ele în team_stats. Citite din fixtures înainte de upsert.
+    """
+    cur.execute(
+        """
+        select f.home_team_id, f.away_team_id, f.league_id, f.season_id
+        from fixtures f
+        join _stage_fixtures s on s.provider_fixture_id = f.provider_fixture_id
+        where f.home_goals is not null
+          and (f.home_team_id, f.away_team_id, f.league_id, f.season_id)
+              is distinct from (s.home_team_id, s.away_team_id, s.league_id, s.season_id)
+        """
+    )
+    groups: Set[Tuple[Any, Any, Any]] = set()
+    for home_id, away_id, league_id, season_id in cur.fetchall():
+        for team_id in (home_id, away_id):
+            if team_id is not None:
+                groups.add(tuple(None if v is None else str(v) for v in (team_id, league_id, season_id)))
+    return groups
+
+
+def _merge_staged(cur, rows: List[tuple]) -> Tuple[List[str], List[str], Set[Tuple[Any, Any, Any]]]:
+    """
+    Staging (execute_values) + un singur INSERT ... SELECT ... ON CONFLICT.
+    Rândurile identice nu se rescriu. Returnează (ids inserate, ids modificate,
+    grupurile team_stats vechi ale meciurilor mutate).
+    """
+    cur.execute("truncate _stage_fixtures")
+    execute_values(
+        cur,
+        f"insert into _stage_fixtures ({_COLS}) values %s",
+        rows,
+        page_size=1000,
+    )
+
+    stale_groups = _stale_stats_groups(cur)
+
+    set_sql = ",\n                ".join(f"{c} = excluded.{c}" for c in _UPDATE_COLS)
+    current = ", ".join(f"fixtures.{c}" for c in _UPDATE_COLS)
+    incoming = ", ".join(f"excluded.{c}" for c in _UPDATE_COLS)
+
+    cur.execute(
+        f"""
+        insert into fixtures ({_COLS})
+        select {_COLS} from _stage_fixtures
+        on conflict (provider_fixture_id)
+        do update set
+                {set_sql}
+        where ({current}) is distinct from ({incoming})
+        returning id, (xmax = 0) as inserted
+        """
+    )
+    inserted_ids: List[str] = []
+    updated_ids: List[str] = []
+    for fixture_id, was_inserted in cur.fetchall():
+        (inserted_ids if was_inserted else updated_ids).append(str(fixture_id))
+    return inserted_ids, updated_ids, stale_groups
+
+
+def run(season: int = 2026, days_ahead: int = 14) -> Dict[str, Any]:
+    """
+    Returnează contoarele, changed_fixture_ids (inserate sau modificate) și
+    stale_stats_groups (grupuri team_stats părăsite de meciuri mutate), pentru
+    recalculări incrementale în aval.
+    """
     job_name = "sync_fixtures"
 
     try:
@@ -79,38 +232,18 @@ def run(season: int = 2026, days_ahead: int = 14):
         from_date = today_str()
         to_date = days_from_today(days_ahead)
 
-        fixture_sql = """
-            insert into fixtures (
-                provider_fixture_id,
-                league_id,
-                home_team_id,
-                away_team_id,
-                kickoff_at,
-                status,
-                season_id,
-                round,
-                home_goals,
-                away_goals
-            )
-            values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            on conflict (provider_fixture_id)
-            do update set
-                league_id = excluded.league_id,
-                home_team_id = excluded.home_team_id,
-                away_team_id = excluded.away_team_id,
-                kickoff_at = excluded.kickoff_at,
-                status = excluded.status,
-                season_id = excluded.season_id,
-                round = excluded.round,
-                home_goals = excluded.home_goals,
-                away_goals = excluded.away_goals
-        """
-
-        imported = 0
+        inserted = 0
+        updated = 0
+        unchanged = 0
         skipped = 0
+        changed_ids: Set[str] = set()
+        stale_groups: Set[Tuple[Any, Any, Any]] = set()
 
         with get_conn() as conn:
             with conn.cursor() as cur:
+                team_map = _load_team_map(cur)
+                _create_staging(cur)
+
                 for league_id, provider_league_id, league_name in leagues:
                     payload = get_fixtures(
                         str(provider_league_id),
@@ -119,62 +252,41 @@ def run(season: int = 2026, days_ahead: int = 14):
                         to_date,
                     )
 
-                    rows = payload.get("response", []) or []
+                    items = payload.get("response", []) or []
+                    if not items:
+                        continue
 
                     season_id = _find_or_create_season(cur, league_id, season)
 
-                    for item in rows:
-                        fixture = item.get("fixture", {}) or {}
-                        league = item.get("league", {}) or {}
-                        teams = item.get("teams", {}) or {}
-                        goals = item.get("goals", {}) or {}
-
-                        home = teams.get("home", {}) or {}
-                        away = teams.get("away", {}) or {}
-
-                        provider_home_id = home.get("id")
-                        provider_away_id = away.get("id")
-                        provider_fixture_id = fixture.get("id")
-
-                        if not provider_home_id or not provider_away_id or not provider_fixture_id:
-                            skipped += 1
-                            continue
-
-                        home_team_id = _find_team_id_by_provider(cur, str(provider_home_id))
-                        away_team_id = _find_team_id_by_provider(cur, str(provider_away_id))
-
-                        if not home_team_id or not away_team_id:
-                            skipped += 1
-                            continue
-
-                        kickoff_at = fixture.get("date")
-                        status = (fixture.get("status", {}) or {}).get("short", "NS")
-                        round_name = league.get("round")
-
-                        cur.execute(
-                            fixture_sql,
-                            (
-                                str(provider_fixture_id),
-                                league_id,
-                                home_team_id,
-                                away_team_id,
-                                kickoff_at,
-                                status,
-                                season_id,
-                                round_name,
-                                goals.get("home"),
-                                goals.get("away"),
-                            ),
-                        )
-                        imported += 1
+                    rows, league_skipped = _extract_rows(items, league_id, season_id, team_map)
+                    skipped += league_skipped
+                    if not rows:
+                        continue
+
+                    inserted_ids, updated_ids, league_stale = _merge_staged(cur, rows)
+                    inserted += len(inserted_ids)
+                    updated += len(updated_ids)
+                    unchanged += len(rows) - len(inserted_ids) - len(updated_ids)
+                    changed_ids.update(inserted_ids)
+                    changed_ids.update(updated_ids)
+                    stale_groups.update(league_stale)
 
             conn.commit()
 
+        summary = {
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": unchanged,
+            "skipped": skipped,
+            "changed_fixture_ids": sorted(changed_ids),
+            "stale_stats_groups": [list(g) for g in sorted(stale_groups, key=str)],
+        }
         log_job(
             job_name,
             "success",
-            f"Imported/updated {imported} fixtures, skipped {skipped}",
+            f"Inserted {inserted}, updated {updated}, unchanged {unchanged}, skipped {skipped} fixtures",
         )
+        return summary
 
     except Exception as e:
         log_job(job_name, "failed", str(e))
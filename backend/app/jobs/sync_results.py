@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from typing import Any, Dict, List, Set, Tuple
+
+from psycopg2.extras import execute_values
+
 from app.db import get_conn
 from app.services.football_api import get_fixtures
 from app.utils.dates import days_from_today
@@ -19,7 +23,81 @@ def _fetch_active_leagues():
             return [r[0] for r in cur.fetchall()]
 
 
-def run(season: int = 2026):
+def _create_staging(cur) -> None:
+    # aceleași tipuri ca în fixtures; dispare la commit
+    cur.execute(
+        """
+        create temp table if not exists _stage_results
+        on commit drop
+        as select provider_fixture_id, status, home_goals, away_goals
+        from fixtures with no data
+        """
+    )
+
+
+def _extract_results(items: List[Dict[str, Any]]) -> List[tuple]:
+    by_fixture: Dict[str, tuple] = {}
+    for item in items:
+        fixture = item.get("fixture", {}) or {}
+        goals = item.get("goals", {}) or {}
+
+        provider_fixture_id = fixture.get("id")
+        if not provider_fixture_id:
+            continue
+
+        by_fixture[str(provider_fixture_id)] = (
+            str(provider_fixture_id),
+            (fixture.get("status", {}) or {}).get("short", "NS"),
+            goals.get("home"),
+            goals.get("away"),
+        )
+    return list(by_fixture.values())
+
+
+def _apply_results(cur, rows: List[tuple]) -> Tuple[List[str], int]:
+    """
+    Scrie doar meciurile al căror status/scor s-a schimbat (IS DISTINCT FROM,
+    deci și tranzițiile NULL -> scor). Returnează (id-urile modificate, câte
+    rânduri din API au un meci în fixtures); restul nu există încă în DB.
+    """
+    cur.execute("truncate _stage_results")
+    execute_values(
+        cur,
+        "insert into _stage_results (provider_fixture_id, status, home_goals, away_goals) values %s",
+        rows,
+        page_size=1000,
+    )
+    cur.execute(
+        """
+        select count(*)
+        from _stage_results s
+        where exists (select 1 from fixtures f where f.provider_fixture_id = s.provider_fixture_id)
+        """
+    )
+    matched = int(cur.fetchone()[0])
+    cur.execute(
+        """
+        update fixtures f
+        set
+            status = s.status,
+            home_goals = s.home_goals,
+            away_goals = s.away_goals
+        from _stage_results s
+        where f.provider_fixture_id = s.provider_fixture_id
+          and (f.status, f.home_goals, f.away_goals)
+              is distinct from (s.status, s.home_goals, s.away_goals)
+        returning f.id
+        """
+    )
+    return [str(r[0]) for r in cur.fetchall()], matched
+
+
+def run(season: int = 2026) -> Dict[str, Any]:
+    """
+    Returnează contoarele și changed_fixture_ids (meciurile cu status/scor
+    modificat), pentru recalculări incrementale în aval. unchanged = meciuri
+    găsite în fixtures dar identice; skipped = rânduri din API fără meci în DB.
+    """
     job_name = "sync_results"
 
     try:
@@ -27,10 +105,14 @@ def run(season: int = 2026):
         from_date = days_from_today(-7)
         to_date = days_from_today(1)
 
-        updated = 0
+        unchanged = 0
+        skipped = 0
+        changed_ids: Set[str] = set()
 
         with get_conn() as conn:
             with conn.cursor() as cur:
+                _create_staging(cur)
+
                 for provider_league_id in leagues:
                     payload = get_fixtures(
                         str(provider_league_id),
@@ -39,41 +121,29 @@ def run(season: int = 2026):
                         to_date,
                     )
 
-                    rows = payload.get("response", []) or []
-
-                    for item in rows:
-                        fixture = item.get("fixture", {}) or {}
-                        goals = item.get("goals", {}) or {}
-
-                        provider_fixture_id = fixture.get("id")
-                        status = (fixture.get("status", {}) or {}).get("short", "NS")
-                        home_goals = goals.get("home")
-                        away_goals = goals.get("away")
-
-                        if not provider_fixture_id:
-                            continue
-
-                        cur.execute(
-                            """
-                            update fixtures
-                            set
-                                status = %s,
-                                home_goals = %s,
-                                away_goals = %s
-                            where provider_fixture_id = %s
-                            """,
-                            (
-                                status,
-                                home_goals,
-                                away_goals,
-                                str(provider_fixture_id),
-                            ),
-                        )
-                        updated += 1
+                    rows = _extract_results(payload.get("response", []) or [])
+                    if not rows:
+                        continue
+
+                    league_changed, matched = _apply_results(cur, rows)
+                    changed_ids.update(league_changed)
+                    unchanged += matched - len(league_changed)
+                    skipped += len(rows) - matched
 
             conn.commit()
 
-        log_job(job_name, "success", f"Updated {updated} fixture results")
+        log_job(
+            job_name,
+            "success",
+            f"Updated {len(changed_ids)} fixture results, {unchanged} unchanged, "
+            f"skipped {skipped} (fixture not in DB)",
+        )
+        return {
+            "updated": len(changed_ids),
+            "unchanged": unchanged,
+            "skipped": skipped,
+            "changed_fixture_ids": sorted(changed_ids),
+        }
 
     except Exception as e:
         log_job(job_name, "failed", str(e))
@@ -5,6 +5,9 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.cache import local_cache
+from app.core.http_client import http_stats
+from app.db import pool_stats
 from app.routes.value import router as value_router
 from app.routes.predictions import router as predictions_router
 from app.routes.fixtures_sync import router as fixtures_router
@@ -48,4 +51,7 @@ def health():
     return {
         "ok": True,
         "status": "healthy",
+        "db_pool": pool_stats(),
+        "local_cache": local_cache.stats(),
+        "http": http_stats(),
     }
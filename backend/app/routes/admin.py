@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
 import os
-import requests
 from datetime import datetime, timedelta
+from app.core.http_client import request
 from app.db import get_conn
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -39,7 +39,7 @@ def sync_fixtures(days_ahead: int = 7, _: str = Depends(check_token)):
             "to": str(date_to),
         }
 
-        r = requests.get(url, headers=headers, params=params)
+        r = request("GET", url, headers=headers, params=params, retries=0)
         data = r.json()
 
         for item in data.get("response", []):
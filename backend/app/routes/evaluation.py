@@ -1,28 +1,54 @@
 from __future__ import annotations
 
 import os
+import uuid
+from typing import Any, Dict
 
 from fastapi import APIRouter, Header, HTTPException, Query
 
 from app.core.queue import queue
+from app.db import get_conn
 from app.jobs.evaluation_job import run_evaluation_and_calibration_job
+from app.services.prediction_engine import MODEL_VERSION
 
 router = APIRouter(prefix="/evaluation", tags=["Evaluation"])
 
 SYNC_TOKEN = os.getenv("SYNC_TOKEN", "surepredict123")
-MODEL_VERSION = "disabled-temporarily"
+
+
+def _evaluation_item(row) -> Dict[str, Any]:
+    league_id, days_back, samples, metrics, created_at = row
+    return {
+        "league_id": league_id,
+        "days_back": days_back,
+        "samples": samples,
+        "metrics": metrics,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+
+
+def _evaluation_table_exists(cur) -> bool:
+    cur.execute("select to_regclass('public.model_evaluation') is not null")
+    return bool(cur.fetchone()[0])
 
 
 @router.post("/admin-run")
 def admin_run_eval(
     days_back: int = Query(120, ge=30, le=365),
     min_samples: int = Query(120, ge=30, le=5000),
-    league_id: int | None = Query(None),
+    league_id: str | None = Query(None, description="UUID din tabela leagues"),
+    provider_league_id: int | None = Query(None, description="ID liga din API-Football (ex: 39, 140)"),
     x_sync_token: str | None = Header(None, alias="X-Sync-Token"),
 ):
     if x_sync_token != SYNC_TOKEN:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    if league_id is not None:
+        try:
+            league_id = str(uuid.UUID(league_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid league_id (uuid)")
+
     if not queue:
         raise HTTPException(status_code=500, detail="Queue not configured")
 
@@ -31,6 +57,7 @@ def admin_run_eval(
         days_back=days_back,
         min_samples=min_samples,
         league_id=league_id,
+        provider_league_id=provider_league_id,
         result_ttl=6 * 3600,
         ttl=6 * 3600,
         job_timeout=1800,
@@ -46,20 +73,58 @@ def admin_run_eval(
 
 @router.get("/latest")
 def latest_eval(model_version: str = Query(MODEL_VERSION)):
-    return {
-        "ok": True,
-        "exists": False,
-        "model_version": model_version,
-        "message": "latest eval disabled for now",
-    }
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                row = None
+                if _evaluation_table_exists(cur):
+                    cur.execute(
+                        """
+                        select league_id, days_back, samples, metrics, created_at
+                        from model_evaluation
+                        where model_version = %s and league_id is null
+                        order by created_at desc
+                        limit 1
+                        """,
+                        (model_version,),
+                    )
+                    row = cur.fetchone()
+
+        if row is None:
+            return {"ok": True, "exists": False, "model_version": model_version}
+        return {"ok": True, "exists": True, "model_version": model_version, **_evaluation_item(row)}
+
+    except Exception as e:
+        raise HTTPException(500, f"Internal Server Error: {e}")
 
 
 @router.get("/latest-league")
 def latest_eval_leagues(model_version: str = Query(MODEL_VERSION)):
-    return {
-        "ok": True,
-        "exists": False,
-        "model_version": model_version,
-        "items": [],
-        "message": "latest league eval disabled for now",
-    }
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                rows = []
+                if _evaluation_table_exists(cur):
+                    # ultima evaluare a fiecărei ligi (index model_version, league_id, created_at desc)
+                    cur.execute(
+                        """
+                        select distinct on (league_id) league_id, days_back, samples, metrics, created_at
+                        from model_evaluation
+                        where model_version = %s and league_id is not null
+                        order by league_id, created_at desc
+                        """,
+                        (model_version,),
+                    )
+                    rows = cur.fetchall()
+
+        items = [_evaluation_item(r) for r in rows]
+        return {
+            "ok": True,
+            "exists": bool(items),
+            "model_version": model_version,
+            "count": len(items),
+            "items": items,
+        }
+
+    except Exception as e:
+        raise HTTPException(500, f"Internal Server Error: {e}")
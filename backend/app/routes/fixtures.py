@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timedelta, timezone, date
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, Query, HTTPException
 
+from app.core.cache import register_refresher
+from app.core.singleflight import single_flight
 from app.db import get_conn
+from app.utils.dates import utc_day_range
+from app.utils.pagination import cached_count, decode_cursor, encode_cursor, keyset_clause
 
 router = APIRouter(tags=["fixtures"])
 
+_CACHE_PREFIX = "fixtures:list:"
+_CACHE_TTL_SECONDS = 60
+
 
 def _default_window_utc() -> tuple[date, date]:
     today = datetime.now(timezone.utc).date()
@@ -23,6 +31,171 @@ def _parse_date(value: Optional[str]) -> Optional[date]:
     return datetime.fromisoformat(value).date()
 
 
+def _fixtures_cache_key(args: Dict[str, Any]) -> str:
+    # argumentele brute (nu fereastra rezolvată), ca refresher-ul să poată reconstrui pagina
+    return _CACHE_PREFIX + json.dumps(args, sort_keys=True, separators=(",", ":"))
+
+
+def _refresh_fixtures_key(key: str) -> Dict[str, Any]:
+    return _build_fixtures_page(**json.loads(key[len(_CACHE_PREFIX):]))
+
+
+def _build_fixtures_page(
+    page: int,
+    per_page: int,
+    provider_league_id: Optional[int],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    order: str,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+) -> Dict[str, Any]:
+    frm = _parse_date(date_from)
+    to = _parse_date(date_to)
+
+    if frm is None or to is None:
+        dfrm, dto = _default_window_utc()
+        frm = frm or dfrm
+        to = to or dto
+
+    # cu cursor se paginează keyset pe (kickoff_at, id); page rămâne pentru clienții vechi
+    offset = 0 if cursor else (page - 1) * per_page
+    order_sql = "ASC" if order == "asc" else "DESC"
+
+    # [frm, to] inclusiv pe zi, ca interval semi-deschis (index pe kickoff_at)
+    start_ts, end_ts = utc_day_range(frm, to)
+    where_clauses: List[str] = [
+        "f.kickoff_at >= %(start_ts)s",
+        "f.kickoff_at < %(end_ts)s",
+    ]
+    params: Dict[str, Any] = {
+        "start_ts": start_ts,
+        "end_ts": end_ts,
+    }
+
+    if provider_league_id is not None:
+        where_clauses.append("l.provider_league_id = %(provider_league_id)s")
+        params["provider_league_id"] = provider_league_id
+
+    # count-ul depinde doar de filtre, nu de pagină
+    count_where_sql = " AND ".join(where_clauses)
+    count_params = dict(params)
+
+    if cursor:
+        params["cursor_kickoff"], params["cursor_id"] = decode_cursor(cursor)
+        where_clauses.append(keyset_clause(order))
+
+    where_sql = " AND ".join(where_clauses)
+    # un rând în plus ca să știm dacă există pagina următoare
+    params["limit"] = per_page + 1
+    params["offset"] = offset
+
+    count_sql = f"""
+        SELECT COUNT(*)
+        FROM fixtures f
+        JOIN leagues l ON l.id = f.league_id
+        JOIN teams ht ON ht.id = f.home_team_id
+        JOIN teams at ON at.id = f.away_team_id
+        WHERE {count_where_sql}
+    """
+
+    data_sql = f"""
+        SELECT
+            f.id,
+            f.league_id,
+            l.provider_league_id,
+            l.name AS league_name,
+            l.country AS league_country,
+            f.provider_fixture_id,
+            f.kickoff_at,
+            f.status,
+
+            ht.id AS home_team_id,
+            ht.provider_team_id AS home_provider_team_id,
+            ht.name AS home_team_name,
+            ht.short_name AS home_team_short,
+            ht.logo_url AS home_team_logo,
+
+            at.id AS away_team_id,
+            at.provider_team_id AS away_provider_team_id,
+            at.name AS away_team_name,
+            at.short_name AS away_team_short,
+            at.logo_url AS away_team_logo,
+
+            f.season_id,
+            f.round
+        FROM fixtures f
+        JOIN leagues l ON l.id = f.league_id
+        JOIN teams ht ON ht.id = f.home_team_id
+        JOIN teams at ON at.id = f.away_team_id
+        WHERE {where_sql}
+        ORDER BY f.kickoff_at {order_sql}, f.id {order_sql}
+        LIMIT %(limit)s OFFSET %(offset)s
+    """
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            total = (
+                cached_count(cur, count_sql, count_params, key_prefix="fixtures:count")
+                if include_total
+                else None
+            )
+
+            cur.execute(data_sql, params)
+            rows = cur.fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1][6], rows[-1][0]) if has_more else None
+
+    items: List[Dict[str, Any]] = []
+    for r in rows:
+        kickoff_value = r[6].isoformat() if hasattr(r[6], "isoformat") else str(r[6])
+
+        items.append(
+            {
+                "id": str(r[0]),
+                "league_id": str(r[1]),
+                "provider_league_id": r[2],
+                "league_name": r[3],
+                "league_country": r[4],
+                "provider_fixture_id": r[5],
+                "kickoff_at": kickoff_value,
+                "status": r[7],
+                "home_team": {
+                    "id": str(r[8]),
+                    "provider_team_id": r[9],
+                    "name": r[10],
+                    "short": r[11],
+                    "logo": r[12],
+                },
+                "away_team": {
+                    "id": str(r[13]),
+                    "provider_team_id": r[14],
+                    "name": r[15],
+                    "short": r[16],
+                    "logo": r[17],
+                },
+                "season": str(r[18]) if r[18] is not None else None,
+                "round": r[19],
+            }
+        )
+
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "from": str(frm),
+        "to": str(to),
+        "order": order,
+        "next_cursor": next_cursor,
+        "items": items,
+    }
+
+
+register_refresher(_CACHE_PREFIX, _refresh_fixtures_key, soft_ttl=_CACHE_TTL_SECONDS)
+
+
 @router.get("/fixtures")
 def list_fixtures(
     page: int = Query(1, ge=1),
@@ -31,129 +204,32 @@ def list_fixtures(
     date_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor din răspunsul anterior"),
+    include_total: bool = Query(True, description="total din COUNT memorat în cache"),
 ) -> Dict[str, Any]:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    args = {
+        "page": page,
+        "per_page": per_page,
+        "provider_league_id": provider_league_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "order": order,
+        "cursor": cursor,
+        "include_total": include_total,
+    }
     try:
-        frm = _parse_date(date_from)
-        to = _parse_date(date_to)
-
-        if frm is None or to is None:
-            dfrm, dto = _default_window_utc()
-            frm = frm or dfrm
-            to = to or dto
-
-        offset = (page - 1) * per_page
-        order_sql = "ASC" if order == "asc" else "DESC"
-
-        where_clauses: List[str] = [
-            "f.kickoff_at::date >= %(frm)s",
-            "f.kickoff_at::date <= %(to)s",
-        ]
-        params: Dict[str, Any] = {
-            "frm": frm,
-            "to": to,
-            "limit": per_page,
-            "offset": offset,
-        }
-
-        if provider_league_id is not None:
-            where_clauses.append("l.provider_league_id = %(provider_league_id)s")
-            params["provider_league_id"] = provider_league_id
-
-        where_sql = " AND ".join(where_clauses)
-
-        count_sql = f"""
-            SELECT COUNT(*)
-            FROM fixtures f
-            JOIN leagues l ON l.id = f.league_id
-            JOIN teams ht ON ht.id = f.home_team_id
-            JOIN teams at ON at.id = f.away_team_id
-            WHERE {where_sql}
-        """
-
-        data_sql = f"""
-            SELECT
-                f.id,
-                f.league_id,
-                l.provider_league_id,
-                l.name AS league_name,
-                l.country AS league_country,
-                f.provider_fixture_id,
-                f.kickoff_at,
-                f.status,
-
-                ht.id AS home_team_id,
-                ht.provider_team_id AS home_provider_team_id,
-                ht.name AS home_team_name,
-                ht.short_name AS home_team_short,
-                ht.logo_url AS home_team_logo,
-
-                at.id AS away_team_id,
-                at.provider_team_id AS away_provider_team_id,
-                at.name AS away_team_name,
-                at.short_name AS away_team_short,
-                at.logo_url AS away_team_logo,
-
-                f.season_id,
-                f.round
-            FROM fixtures f
-            JOIN leagues l ON l.id = f.league_id
-            JOIN teams ht ON ht.id = f.home_team_id
-            JOIN teams at ON at.id = f.away_team_id
-            WHERE {where_sql}
-            ORDER BY f.kickoff_at {order_sql}
-            LIMIT %(limit)s OFFSET %(offset)s
-        """
-
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(count_sql, params)
-                total = int(cur.fetchone()[0])
-
-                cur.execute(data_sql, params)
-                rows = cur.fetchall()
-
-        items: List[Dict[str, Any]] = []
-        for r in rows:
-            kickoff_value = r[6].isoformat() if hasattr(r[6], "isoformat") else str(r[6])
-
-            items.append(
-                {
-                    "id": str(r[0]),
-                    "league_id": str(r[1]),
-                    "provider_league_id": r[2],
-                    "league_name": r[3],
-                    "league_country": r[4],
-                    "provider_fixture_id": r[5],
-                    "kickoff_at": kickoff_value,
-                    "status": r[7],
-                    "home_team": {
-                        "id": str(r[8]),
-                        "provider_team_id": r[9],
-                        "name": r[10],
-                        "short": r[11],
-                        "logo": r[12],
-                    },
-                    "away_team": {
-                        "id": str(r[13]),
-                        "provider_team_id": r[14],
-                        "name": r[15],
-                        "short": r[16],
-                        "logo": r[17],
-                    },
-                    "season": str(r[18]) if r[18] is not None else None,
-                    "round": r[19],
-                }
-            )
-
-        return {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "from": str(frm),
-            "to": str(to),
-            "order": order,
-            "items": items,
-        }
-
+        return single_flight(
+            _fixtures_cache_key(args),
+            lambda: _build_fixtures_page(**args),
+            ttl_seconds=_CACHE_TTL_SECONDS,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
@@ -6,6 +6,8 @@ from typing import Optional, List, Dict, Any, Tuple
 from fastapi import APIRouter, Query, HTTPException
 
 from app.db import get_conn
+from app.utils.dates import utc_day_range
+from app.utils.pagination import cached_count, decode_cursor, encode_cursor, keyset_clause
 
 router = APIRouter(tags=["fixtures"])
 
@@ -38,6 +40,8 @@ def list_fixtures(
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=200),
     order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor din raspunsul anterior (keyset pe kickoff_at, id)"),
+    include_total: bool = Query(True, description="total din COUNT memorat in cache"),
 ) -> Dict[str, Any]:
     try:
         frm = _parse_date(date_from)
@@ -53,20 +57,21 @@ def list_fixtures(
             if not status_list:
                 status_list = None
 
-        offset = (page - 1) * per_page
+        # cu cursor nu mai folosim OFFSET; page ramane pentru clientii vechi
+        offset = 0 if cursor else (page - 1) * per_page
 
         # IMPORTANT:
-        # folosim ::date pentru interval inclusiv pe zi
+        # interval semi-deschis pe timestamptz (inclusiv pe zi, UTC); fara ::date,
+        # altfel Postgres nu poate folosi indexul pe kickoff_at
+        start_ts, end_ts = utc_day_range(frm, to)
         where_clauses = [
-            "f.kickoff_at::date >= %(frm)s",
-            "f.kickoff_at::date <= %(to)s",
+            "f.kickoff_at >= %(start_ts)s",
+            "f.kickoff_at < %(end_ts)s",
         ]
 
         params: Dict[str, Any] = {
-            "frm": frm,
-            "to": to,
-            "limit": per_page,
-            "offset": offset,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
         }
 
         if league_uuid:
@@ -82,14 +87,27 @@ def list_fixtures(
             where_clauses.append("f.status = ANY(%(status_list)s)")
             params["status_list"] = status_list
 
+        count_where_sql = " AND ".join(where_clauses)
+        count_params = dict(params)
+
+        if cursor:
+            try:
+                params["cursor_kickoff"], params["cursor_id"] = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            where_clauses.append(keyset_clause(order))
+
         where_sql = " AND ".join(where_clauses)
+        # un rand in plus ca sa stim daca exista pagina urmatoare
+        params["limit"] = per_page + 1
+        params["offset"] = offset
         order_sql = "ASC" if order == "asc" else "DESC"
 
         count_sql = f"""
             SELECT COUNT(*)
             FROM fixtures f
             JOIN leagues l ON l.id = f.league_id
-            WHERE {where_sql}
+            WHERE {count_where_sql}
         """
 
         data_sql = f"""
@@ -111,19 +129,26 @@ def list_fixtures(
             FROM fixtures f
             JOIN leagues l ON l.id = f.league_id
             WHERE {where_sql}
-            ORDER BY f.kickoff_at {order_sql}
+            ORDER BY f.kickoff_at {order_sql}, f.id {order_sql}
             LIMIT %(limit)s OFFSET %(offset)s
         """
 
         # FIX: acelasi nume la variabila (conn)
         with get_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute(count_sql, params)
-                total = int(cur.fetchone()[0])
+                total = (
+                    cached_count(cur, count_sql, count_params, key_prefix="fixtures:count:by-league")
+                    if include_total
+                    else None
+                )
 
                 cur.execute(data_sql, params)
                 rows = cur.fetchall()
 
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1][6], rows[-1][0]) if has_more else None
+
         items: List[Dict[str, Any]] = []
         for r in rows:
             items.append(
@@ -152,6 +177,7 @@ def list_fixtures(
             "from": str(frm),
             "to": str(to),
             "order": order,
+            "next_cursor": next_cursor,
             "items": items,
         }
 
@@ -169,6 +195,8 @@ def list_fixtures_by_league(
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=200),
     order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
 ) -> Dict[str, Any]:
     """
     Shortcut: fixtures pentru o liga (provider_league_id) cu paginare.
@@ -183,4 +211,6 @@ def list_fixtures_by_league(
         page=page,
         per_page=per_page,
         order=order,
-                    )
+        cursor=cursor,
+        include_total=include_total,
+    )
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import os
-import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
-import requests
 from fastapi import APIRouter, Header, HTTPException, Query
 
-from app.db import supabase_client
+from app.core.http_client import request
+from app.core.queue import queue
+from app.jobs.fixtures_sync_job import run_fixtures_sync_job
 
 router = APIRouter(prefix="/fixtures", tags=["Fixtures Sync"])
 
@@ -56,7 +56,7 @@ def debug_status() -> Dict[str, Any]:
         }
 
     url = f"{FOOTBALL_API_BASE_URL.rstrip('/')}/status"
-    resp = requests.get(url, headers=_api_headers(), timeout=30)
+    resp = request("GET", url, headers=_api_headers(), timeout=30, retries=0)
 
     return {
         "status_code": resp.status_code,
@@ -64,76 +64,12 @@ def debug_status() -> Dict[str, Any]:
     }
 
 
-def _api_get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    if not FOOTBALL_API_KEY:
-        raise HTTPException(status_code=500, detail="FOOTBALL_API_KEY lipsește")
-
-    url = f"{FOOTBALL_API_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
-
-    resp = requests.get(
-        url,
-        headers=_api_headers(),
-        params=params,
-        timeout=30,
-    )
-
-    if resp.status_code == 429:
-        raise HTTPException(
-            status_code=500,
-            detail="Football API error 429: Too many requests",
-        )
-
-    if resp.status_code >= 400:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Football API error {resp.status_code}: {resp.text}",
-        )
-
-    data = resp.json()
-    if not isinstance(data, dict):
-        raise HTTPException(status_code=500, detail="Răspuns invalid de la Football API")
-
-    return data
-
-
-def _fetch_next_fixtures_for_league(
-    league_id: int,
-    season: int,
-    next_count: int = 10,
-) -> List[Dict[str, Any]]:
-
-    fixtures: List[Dict[str, Any]] = []
-
-    for page in range(1, 4):
-        payload = _api_get(
-            "/fixtures",
-            {
-                "league": league_id,
-                "season": season,
-                "status": "NS",
-                "from": datetime.now(timezone.utc).date().isoformat(),
-                "page": page,
-            },
-        )
-
-        data = payload.get("response", [])
-        if not data:
-            break
-
-        fixtures.extend(data)
-
-        if len(fixtures) >= next_count:
-            return fixtures[:next_count]
-
-    return fixtures[:next_count]
-
-
-def _ensure_league(league_block: Dict[str, Any]) -> None:
+def _league_row(league_block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     league_id = league_block.get("id")
     if not league_id:
-        return
+        return None
 
-    row = {
+    return {
         "provider_league_id": league_id,
         "name": league_block.get("name"),
         "country": league_block.get("country"),
@@ -142,11 +78,6 @@ def _ensure_league(league_block: Dict[str, Any]) -> None:
         "updated_at": _utc_now().isoformat(),
     }
 
-    supabase_client.table("leagues").upsert(
-        row,
-        on_conflict="provider_league_id",
-    ).execute()
-
 
 def _extract_fixture_row(item: Dict[str, Any]) -> Dict[str, Any]:
     fixture = item.get("fixture", {}) or {}
@@ -173,13 +104,6 @@ def _extract_fixture_row(item: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _upsert_fixture(row: Dict[str, Any]) -> None:
-    supabase_client.table("fixtures").upsert(
-        row,
-        on_conflict="provider_fixture_id",
-    ).execute()
-
-
 @router.post("/admin-sync")
 def admin_sync_fixtures(
     season: Optional[int] = Query(None),
@@ -189,64 +113,26 @@ def admin_sync_fixtures(
     if x_sync_token != SYNC_TOKEN:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    if not queue:
+        raise HTTPException(status_code=500, detail="Queue not configured")
+
     now = _utc_now()
     active_season = season or (now.year if now.month >= 7 else now.year - 1)
 
-    leagues_done = 0
-    inserted = 0
-    updated = 0
-    skipped = 0
-    errors: List[str] = []
-    debug_preview: List[Dict[str, Any]] = []
-
-    for league_provider_id in DEFAULT_LEAGUES:
-        try:
-            fixtures = _fetch_next_fixtures_for_league(
-                league_id=league_provider_id,
-                season=active_season,
-                next_count=next_count,
-            )
-
-            debug_preview.append(
-                {
-                    "league": league_provider_id,
-                    "season": active_season,
-                    "count": len(fixtures),
-                }
-            )
-
-            if not fixtures:
-                skipped += 1
-                time.sleep(1.0)
-                continue
-
-            for item in fixtures:
-                league_block = item.get("league", {}) or {}
-                _ensure_league(league_block)
-
-                row = _extract_fixture_row(item)
-                if not row.get("provider_fixture_id"):
-                    skipped += 1
-                    continue
-
-                _upsert_fixture(row)
-                inserted += 1
-
-            leagues_done += 1
-            time.sleep(1.0)
-
-        except Exception as e:
-            errors.append(f"league {league_provider_id}: {e}")
-            time.sleep(1.5)
+    # fetch-ul (concurent, limitat de cota API) și upsert-ul rulează în worker
+    job = queue.enqueue(
+        run_fixtures_sync_job,
+        season=active_season,
+        next_count=next_count,
+        leagues=DEFAULT_LEAGUES,
+        result_ttl=6 * 3600,
+        ttl=6 * 3600,
+        job_timeout=1800,
+    )
 
     return {
         "ok": True,
         "season": active_season,
-        "leagues": leagues_done,
-        "inserted": inserted,
-        "updated": updated,
-        "skipped": skipped,
-        "errors_count": len(errors),
-        "errors_preview": errors[:10],
-        "debug_preview": debug_preview[:20],
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
     }
@@ -3,9 +3,9 @@ from __future__ import annotations
 import os
 from typing import Optional, Dict, Any, List, Tuple
 
-import requests
 from fastapi import APIRouter, HTTPException, Query, Header
 
+from app.core.http_client import request
 from app.db import get_conn
 
 router = APIRouter(tags=["leagues"])
@@ -30,7 +30,8 @@ def _api_get_leagues(page: int = 1) -> Dict[str, Any]:
     params = {"page": page}
 
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=30)
+        # request-ul web nu așteaptă retry-uri; eroarea ajunge la client ca 502
+        resp = request("GET", url, headers=headers, params=params, timeout=30, retries=0)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"API request failed: {e}")
 
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.cache import register_refresher
+from app.core.singleflight import single_flight
 from app.db import get_conn
-from app.services.prediction_engine import MODEL_VERSION, compute_prediction_for_fixture
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_clause
+from app.services.prediction_engine import (
+    MODEL_VERSION,
+    LeagueStrengthTable,
+    expected_goals_for_fixture,
+    predictions_from_expected_goals,
+)
+from app.services.calibration_registry import get_calibration_snapshot
 
 router = APIRouter(prefix="/predictions", tags=["Predictions"])
 
@@ -15,27 +25,10 @@ router = APIRouter(prefix="/predictions", tags=["Predictions"])
 # HELPERS
 # =========================================================
 
-_CACHE: Dict[str, Dict[str, Any]] = {}
+# cache în două niveluri (LRU local + Redis) cu single-flight per cheie
 _CACHE_TTL_SECONDS = 180
 
 
-def _cache_get(key: str):
-    item = _CACHE.get(key)
-    if not item:
-        return None
-    if (datetime.now(timezone.utc).timestamp() - item["ts"]) > _CACHE_TTL_SECONDS:
-        del _CACHE[key]
-        return None
-    return item["data"]
-
-
-def _cache_set(key: str, value: Any):
-    _CACHE[key] = {
-        "ts": datetime.now(timezone.utc).timestamp(),
-        "data": value,
-    }
-
-
 def _round1(v: float) -> float:
     return round(float(v), 1)
 
@@ -142,56 +135,90 @@ def _best_market_pick(pred: Dict[str, Any]) -> Dict[str, Any]:
 # DATABASE READS
 # =========================================================
 
-def _league_baselines(cur, league_id: str) -> Dict[str, float]:
+_DEFAULT_BASELINES = {"league_avg_goals": 2.60, "league_scored_avg": 1.30}
+_PAST_MATCHES_LIMIT = 400
+
+
+def _fetch_league_baselines(cur, league_ids: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Baseline-urile pentru toate ligile dintr-un request, într-un singur query.
+    Ligile fără meciuri terminate primesc valorile implicite.
+    """
+    out: Dict[str, Dict[str, float]] = {lid: dict(_DEFAULT_BASELINES) for lid in league_ids}
+    if not league_ids:
+        return out
+
     cur.execute(
         """
         SELECT
+            league_id,
             COALESCE(AVG(home_goals + away_goals), 2.60) AS avg_total_goals,
             COALESCE(AVG((home_goals + away_goals) / 2.0), 1.30) AS avg_scored_per_team
         FROM fixtures
-        WHERE league_id = %s
+        WHERE league_id = ANY(%s::uuid[])
           AND home_goals IS NOT NULL
           AND away_goals IS NOT NULL
+        GROUP BY league_id
         """,
-        (league_id,),
+        (list(league_ids),),
     )
-    row = cur.fetchone()
-    if not row:
-        return {"league_avg_goals": 2.60, "league_scored_avg": 1.30}
+    for row in cur.fetchall():
+        out[str(row[0])] = {
+            "league_avg_goals": _safe_float(row[1], 2.60),
+            "league_scored_avg": _safe_float(row[2], 1.30),
+        }
+    return out
 
-    return {
-        "league_avg_goals": _safe_float(row[0], 2.60),
-        "league_scored_avg": _safe_float(row[1], 1.30),
-    }
 
+# Rândurile de fixture vin împreună cu predicția stocată de predictions_job
+# (LEFT JOIN pe (fixture_id, model_version)); coloanele p.* sunt NULL dacă lipsește.
+_FIXTURE_ROW_SQL = """
+    SELECT
+        f.id,
+        f.provider_fixture_id,
+        f.kickoff_at,
+        f.status,
+        f.round,
+        f.league_id,
+        f.season_id,
+        l.name AS league_name,
+        l.country AS league_country,
+        ht.id AS home_team_id,
+        ht.name AS home_name,
+        ht.short_name AS home_short,
+        at.id AS away_team_id,
+        at.name AS away_name,
+        at.short_name AS away_short,
+        p.inputs AS pred_inputs,
+        p.probs AS pred_probs,
+        p.picks AS pred_picks,
+        p.metrics AS pred_metrics,
+        p.computed_at AS pred_computed_at
+    FROM fixtures f
+    JOIN leagues l ON l.id = f.league_id
+    JOIN teams ht ON ht.id = f.home_team_id
+    JOIN teams at ON at.id = f.away_team_id
+    LEFT JOIN predictions p
+      ON p.fixture_id = f.id
+     AND p.model_version = %(model_version)s
+"""
+
+
+def _fetch_fixture_rows(cur, limit: int = 50, cursor: Optional[str] = None) -> List[tuple]:
+    params: Dict[str, Any] = {"model_version": MODEL_VERSION, "limit": limit}
+    where_sql = ""
+    if cursor:
+        params["cursor_kickoff"], params["cursor_id"] = decode_cursor(cursor)
+        where_sql = "WHERE " + keyset_clause("asc")
 
-def _fetch_fixture_rows(cur, limit: int = 50) -> List[tuple]:
     cur.execute(
-        """
-        SELECT
-            f.id,
-            f.provider_fixture_id,
-            f.kickoff_at,
-            f.status,
-            f.round,
-            f.league_id,
-            f.season_id,
-            l.name AS league_name,
-            l.country AS league_country,
-            ht.id AS home_team_id,
-            ht.name AS home_name,
-            ht.short_name AS home_short,
-            at.id AS away_team_id,
-            at.name AS away_name,
-            at.short_name AS away_short
-        FROM fixtures f
-        JOIN leagues l ON l.id = f.league_id
-        JOIN teams ht ON ht.id = f.home_team_id
-        JOIN teams at ON at.id = f.away_team_id
-        ORDER BY f.kickoff_at ASC
-        LIMIT %s
+        _FIXTURE_ROW_SQL
+        + f"""
+        {where_sql}
+        ORDER BY f.kickoff_at ASC, f.id ASC
+        LIMIT %(limit)s
         """,
-        (limit,),
+        params,
     )
     return cur.fetchall()
 
@@ -202,102 +229,78 @@ def _fetch_fixture_rows_today(cur) -> List[tuple]:
     end_day = start_day + timedelta(days=1)
 
     cur.execute(
-        """
-        SELECT
-            f.id,
-            f.provider_fixture_id,
-            f.kickoff_at,
-            f.status,
-            f.round,
-            f.league_id,
-            f.season_id,
-            l.name AS league_name,
-            l.country AS league_country,
-            ht.id AS home_team_id,
-            ht.name AS home_name,
-            ht.short_name AS home_short,
-            at.id AS away_team_id,
-            at.name AS away_name,
-            at.short_name AS away_short
-        FROM fixtures f
-        JOIN leagues l ON l.id = f.league_id
-        JOIN teams ht ON ht.id = f.home_team_id
-        JOIN teams at ON at.id = f.away_team_id
-        WHERE f.kickoff_at >= %s
-          AND f.kickoff_at < %s
+        _FIXTURE_ROW_SQL
+        + """
+        WHERE f.kickoff_at >= %(start_day)s
+          AND f.kickoff_at < %(end_day)s
         ORDER BY f.kickoff_at ASC
         """,
-        (start_day, end_day),
+        {"model_version": MODEL_VERSION, "start_day": start_day, "end_day": end_day},
     )
     return cur.fetchall()
 
 
 def _fetch_fixture_row_by_id(cur, fixture_id: str):
     cur.execute(
-        """
-        SELECT
-            f.id,
-            f.provider_fixture_id,
-            f.kickoff_at,
-            f.status,
-            f.round,
-            f.league_id,
-            f.season_id,
-            l.name AS league_name,
-            l.country AS league_country,
-            ht.id AS home_team_id,
-            ht.name AS home_name,
-            ht.short_name AS home_short,
-            at.id AS away_team_id,
-            at.name AS away_name,
-            at.short_name AS away_short
-        FROM fixtures f
-        JOIN leagues l ON l.id = f.league_id
-        JOIN teams ht ON ht.id = f.home_team_id
-        JOIN teams at ON at.id = f.away_team_id
-        WHERE f.id = %s
+        _FIXTURE_ROW_SQL
+        + """
+        WHERE f.id = %(fixture_id)s
         LIMIT 1
         """,
-        (fixture_id,),
+        {"model_version": MODEL_VERSION, "fixture_id": fixture_id},
     )
     return cur.fetchone()
 
 
-def _fetch_past_matches_for_league(
+def _fetch_league_history(
     cur,
     league_id: str,
-    before_kickoff: datetime,
-    limit: int = 400,
+    first_kickoff: datetime,
+    last_kickoff: datetime,
+    limit: int = _PAST_MATCHES_LIMIT,
 ) -> List[Dict[str, Any]]:
+    """
+    Istoricul unei ligi suficient pentru toate meciurile cu kickoff în
+    [first_kickoff, last_kickoff]: tot ce s-a terminat în fereastră plus
+    ultimele `limit` meciuri dinainte de first_kickoff. Ordine cronologică.
+    """
     cur.execute(
         """
-        SELECT
-            home_team_id,
-            away_team_id,
-            home_goals,
-            away_goals,
-            kickoff_at
-        FROM fixtures
-        WHERE league_id = %s
-          AND kickoff_at < %s
-          AND home_goals IS NOT NULL
-          AND away_goals IS NOT NULL
-        ORDER BY kickoff_at DESC
-        LIMIT %s
+        (
+            SELECT home_team_id, away_team_id, home_goals, away_goals, kickoff_at
+            FROM fixtures
+            WHERE league_id = %(league_id)s
+              AND kickoff_at >= %(first)s
+              AND kickoff_at < %(last)s
+              AND home_goals IS NOT NULL
+              AND away_goals IS NOT NULL
+        )
+        UNION ALL
+        (
+            SELECT home_team_id, away_team_id, home_goals, away_goals, kickoff_at
+            FROM fixtures
+            WHERE league_id = %(league_id)s
+              AND kickoff_at < %(first)s
+              AND home_goals IS NOT NULL
+              AND away_goals IS NOT NULL
+            ORDER BY kickoff_at DESC
+            LIMIT %(limit)s
+        )
+        ORDER BY kickoff_at ASC
         """,
-        (league_id, before_kickoff, limit),
+        {"league_id": league_id, "first": first_kickoff, "last": last_kickoff, "limit": limit},
     )
     rows = cur.fetchall()
 
     out: List[Dict[str, Any]] = []
-    for r in reversed(rows):
+    for r in rows:
         out.append(
             {
                 "home_team_id": r[0],
                 "away_team_id": r[1],
                 "home_goals": r[2],
                 "away_goals": r[3],
-                "kickoff_at": r[4].isoformat() if hasattr(r[4], "isoformat") else r[4],
+                "kickoff_at": r[4],
             }
         )
     return out
@@ -307,40 +310,110 @@ def _fetch_past_matches_for_league(
 # MODEL CORE
 # =========================================================
 
-def _build_prediction_from_fixture_row(cur, row: tuple) -> Dict[str, Any]:
-    fixture_id = str(row[0])
-    provider_fixture_id = row[1]
-    kickoff_at = row[2]
-    status = row[3]
-    round_name = row[4]
-    league_id = str(row[5])
-    season_id = str(row[6]) if row[6] is not None else None
-    league_name = row[7] or ""
-    league_country = row[8] or ""
-    home_team_id = _safe_int(row[9])
-    home_name = row[10] or "Home"
-    home_short = row[11]
-    away_team_id = _safe_int(row[12])
-    away_name = row[13] or "Away"
-    away_short = row[14]
+def _parse_fixture_row(row: tuple) -> Dict[str, Any]:
+    return {
+        "fixture_id": str(row[0]),
+        "provider_fixture_id": row[1],
+        "kickoff_at": row[2],
+        "status": row[3],
+        "round": row[4],
+        "league_id": str(row[5]),
+        "season_id": str(row[6]) if row[6] is not None else None,
+        "league_name": row[7] or "",
+        "league_country": row[8] or "",
+        "home_team_id": _safe_int(row[9]),
+        "home_name": row[10] or "Home",
+        "home_short": row[11],
+        "away_team_id": _safe_int(row[12]),
+        "away_name": row[13] or "Away",
+        "away_short": row[14],
+    }
 
-    kickoff_iso = kickoff_at.isoformat() if hasattr(kickoff_at, "isoformat") else str(kickoff_at)
 
-    baselines = _league_baselines(cur, league_id)
-    past_matches = _fetch_past_matches_for_league(cur, league_id=league_id, before_kickoff=kickoff_at, limit=400)
+def _stored_prediction(row: tuple) -> Optional[Dict[str, Any]]:
+    """
+    Predicția precalculată din tabela predictions, dacă rândul o are.
+    """
+    if len(row) < 20 or not row[16]:
+        return None
+    return {
+        "model_version": MODEL_VERSION,
+        "inputs": row[15] or {},
+        "probs": row[16],
+        "picks": row[17] or {},
+        "metrics": row[18] or {},
+        "computed_at": row[19],
+    }
 
-    pred = compute_prediction_for_fixture(
-        fixture={
-            "home_team_id": home_team_id,
-            "away_team_id": away_team_id,
-        },
-        past_matches=past_matches,
-        league_avg_goals=baselines["league_avg_goals"],
-        league_scored_avg=baselines["league_scored_avg"],
-        home_adv=1.10,
-        cal_binary=None,
-        cal_ovr=None,
-    )
+
+def _expected_goals_for_league(
+    cur,
+    fixtures: List[Dict[str, Any]],
+    baselines: Dict[str, float],
+) -> List[Tuple[float, float, Dict[str, Any]]]:
+    """
+    Expected goals pentru meciurile unei ligi, cu un singur query de istoric.
+    Fiecare meci vede doar ultimele _PAST_MATCHES_LIMIT meciuri dinaintea kickoff-ului;
+    meciurile cu aceeași fereastră de istoric împart LeagueStrengthTable.
+    """
+    kickoffs = [fx["kickoff_at"] for fx in fixtures if fx["kickoff_at"] is not None]
+    history: List[Dict[str, Any]] = []
+    if kickoffs:
+        history = _fetch_league_history(
+            cur,
+            fixtures[0]["league_id"],
+            first_kickoff=min(kickoffs),
+            last_kickoff=max(kickoffs),
+        )
+    history_kickoffs = [m["kickoff_at"] for m in history]
+
+    tables: Dict[Tuple[int, int], LeagueStrengthTable] = {}
+    out: List[Tuple[float, float, Dict[str, Any]]] = []
+    for fx in fixtures:
+        end = bisect_left(history_kickoffs, fx["kickoff_at"]) if fx["kickoff_at"] is not None else 0
+        start = max(0, end - _PAST_MATCHES_LIMIT)
+
+        strengths = tables.get((start, end))
+        if strengths is None:
+            strengths = tables[(start, end)] = LeagueStrengthTable(history[start:end], half_life_matches=20.0)
+
+        out.append(
+            expected_goals_for_fixture(
+                {
+                    "home_team_id": fx["home_team_id"],
+                    "away_team_id": fx["away_team_id"],
+                },
+                [],
+                league_avg_goals=baselines["league_avg_goals"],
+                league_scored_avg=baselines["league_scored_avg"],
+                home_adv=1.10,
+                strengths=strengths,
+            )
+        )
+    return out
+
+
+def _format_prediction_item(fx: Dict[str, Any], pred: Dict[str, Any], source: str) -> Dict[str, Any]:
+    fixture_id = fx["fixture_id"]
+    provider_fixture_id = fx["provider_fixture_id"]
+    kickoff_at = fx["kickoff_at"]
+    status = fx["status"]
+    round_name = fx["round"]
+    league_id = fx["league_id"]
+    season_id = fx["season_id"]
+    league_name = fx["league_name"]
+    league_country = fx["league_country"]
+    home_team_id = fx["home_team_id"]
+    home_name = fx["home_name"]
+    home_short = fx["home_short"]
+    away_team_id = fx["away_team_id"]
+    away_name = fx["away_name"]
+    away_short = fx["away_short"]
+
+    kickoff_iso = kickoff_at.isoformat() if hasattr(kickoff_at, "isoformat") else str(kickoff_at)
+
+    computed_at = pred.get("computed_at")
+    computed_iso = computed_at.isoformat() if hasattr(computed_at, "isoformat") else computed_at
 
     probs = pred.get("probs", {}) or {}
     inputs = pred.get("inputs", {}) or {}
@@ -395,6 +468,8 @@ def _build_prediction_from_fixture_row(cur, row: tuple) -> Dict[str, Any]:
             "away_xg": away_xg,
             "avg_goals_league": _round2(inputs.get("league_avg_goals", 0.0)),
             "avg_scored_team_baseline": _round2(inputs.get("base", 0.0)),
+            "source": source,
+            "computed_at": computed_iso,
         },
         "markets": {
             "1x2": {
@@ -451,8 +526,132 @@ def _build_prediction_from_fixture_row(cur, row: tuple) -> Dict[str, Any]:
     }
 
 
+def _compute_predictions(cur, fixtures: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Calcul on-the-fly în batch: meciurile sunt grupate pe ligă, baseline-urile
+    vin dintr-un singur query, iar istoricul dintr-un query per ligă (L + 1 round-trips).
+    """
+    by_league: Dict[str, List[int]] = {}
+    for idx, fx in enumerate(fixtures):
+        by_league.setdefault(fx["league_id"], []).append(idx)
+
+    baselines = _fetch_league_baselines(cur, list(by_league.keys()))
+
+    expected: List[Any] = [None] * len(fixtures)
+    for league_id, idxs in by_league.items():
+        league_expected = _expected_goals_for_league(cur, [fixtures[i] for i in idxs], baselines[league_id])
+        for i, e in zip(idxs, league_expected):
+            expected[i] = e
+
+    # calibrare per ligă din snapshot-ul procesului (fără citire din DB per request)
+    calibration = get_calibration_snapshot()
+    league_cal = {lid: calibration.for_league(MODEL_VERSION, lid) for lid in by_league}
+
+    # toate meciurile sunt scorate într-un singur batch vectorizat
+    preds = predictions_from_expected_goals(
+        expected,
+        calibrations=[league_cal[fx["league_id"]] for fx in fixtures],
+    )
+
+    computed_at = datetime.now(timezone.utc)
+    for pred in preds:
+        pred["computed_at"] = computed_at
+    return preds
+
+
 def _serialize_items(cur, rows: List[tuple]) -> List[Dict[str, Any]]:
-    return [_build_prediction_from_fixture_row(cur, r) for r in rows]
+    """
+    Servește predicțiile stocate de predictions_job; calculează pe loc doar
+    pentru meciurile care nu au încă rând în tabela predictions.
+    """
+    fixtures = [_parse_fixture_row(r) for r in rows]
+    preds = [_stored_prediction(r) for r in rows]
+    sources = ["precomputed" if p is not None else "live" for p in preds]
+
+    missing = [i for i, p in enumerate(preds) if p is None]
+    if missing:
+        live = _compute_predictions(cur, [fixtures[i] for i in missing])
+        for i, pred in zip(missing, live):
+            preds[i] = pred
+
+    return [
+        _format_prediction_item(fx, pred, source)
+        for fx, pred, source in zip(fixtures, preds, sources)
+    ]
+
+
+# =========================================================
+# BUILDERS (rulate o singură dată per cheie, prin single_flight)
+# =========================================================
+
+def _build_predictions(limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            # un rând în plus ca să știm dacă există pagina următoare
+            rows = _fetch_fixture_rows(cur, limit=limit + 1, cursor=cursor)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            items = _serialize_items(cur, rows)
+
+    return {
+        "count": len(items),
+        "next_cursor": encode_cursor(rows[-1][2], rows[-1][0]) if has_more else None,
+        "items": items,
+    }
+
+
+def _build_predictions_today() -> Dict[str, Any]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            rows = _fetch_fixture_rows_today(cur)
+            items = _serialize_items(cur, rows)
+
+    return {
+        "count": len(items),
+        "items": items,
+    }
+
+
+def _build_top_predictions(limit: int) -> Dict[str, Any]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            rows = _fetch_fixture_rows(cur, limit=200)
+            items = _serialize_items(cur, rows)
+
+    items.sort(key=lambda x: x["top_pick"]["confidence"], reverse=True)
+    items = items[:limit]
+
+    return {
+        "count": len(items),
+        "items": items,
+    }
+
+
+def _build_prediction_by_fixture(fixture_id: str) -> Dict[str, Any]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            row = _fetch_fixture_row_by_id(cur, fixture_id)
+            if not row:
+                raise HTTPException(status_code=404, detail="Fixture not found")
+
+            return _serialize_items(cur, [row])[0]
+
+
+def _refresh_predictions_key(key: str) -> Dict[str, Any]:
+    """
+    Refresher SWR pentru cheile predictions:* (vezi app.core.cache.register_refresher).
+    """
+    parts = key.split(":")
+    if parts[1] == "today":
+        return _build_predictions_today()
+    if parts[1] == "top":
+        return _build_top_predictions(int(parts[2]))
+    if parts[1] == "fixture":
+        return _build_prediction_by_fixture(parts[2])
+    return _build_predictions(int(parts[1]), parts[2] if len(parts) > 2 else None)
+
+
+register_refresher("predictions:", _refresh_predictions_key, soft_ttl=_CACHE_TTL_SECONDS)
 
 
 # =========================================================
@@ -460,24 +659,23 @@ def _serialize_items(cur, rows: List[tuple]) -> List[Dict[str, Any]]:
 # =========================================================
 
 @router.get("")
-def list_predictions(limit: int = Query(50, ge=1, le=200)) -> Dict[str, Any]:
-    cache_key = f"predictions:{limit}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
+def list_predictions(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor din răspunsul anterior"),
+) -> Dict[str, Any]:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    key = f"predictions:{limit}:{cursor}" if cursor else f"predictions:{limit}"
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                rows = _fetch_fixture_rows(cur, limit=limit)
-                items = _serialize_items(cur, rows)
-
-        result = {
-            "count": len(items),
-            "items": items,
-        }
-        _cache_set(cache_key, result)
-        return result
+        return single_flight(
+            key,
+            lambda: _build_predictions(limit, cursor),
+            ttl_seconds=_CACHE_TTL_SECONDS,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -486,23 +684,12 @@ def list_predictions(limit: int = Query(50, ge=1, le=200)) -> Dict[str, Any]:
 
 @router.get("/today")
 def list_predictions_today() -> Dict[str, Any]:
-    cache_key = "predictions:today"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                rows = _fetch_fixture_rows_today(cur)
-                items = _serialize_items(cur, rows)
-
-        result = {
-            "count": len(items),
-            "items": items,
-        }
-        _cache_set(cache_key, result)
-        return result
+        return single_flight(
+            "predictions:today",
+            _build_predictions_today,
+            ttl_seconds=_CACHE_TTL_SECONDS,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -511,26 +698,12 @@ def list_predictions_today() -> Dict[str, Any]:
 
 @router.get("/top")
 def list_top_predictions(limit: int = Query(20, ge=1, le=100)) -> Dict[str, Any]:
-    cache_key = f"predictions:top:{limit}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                rows = _fetch_fixture_rows(cur, limit=200)
-                items = _serialize_items(cur, rows)
-
-        items.sort(key=lambda x: x["top_pick"]["confidence"], reverse=True)
-        items = items[:limit]
-
-        result = {
-            "count": len(items),
-            "items": items,
-        }
-        _cache_set(cache_key, result)
-        return result
+        return single_flight(
+            f"predictions:top:{limit}",
+            lambda: _build_top_predictions(limit),
+            ttl_seconds=_CACHE_TTL_SECONDS,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -539,22 +712,12 @@ def list_top_predictions(limit: int = Query(20, ge=1, le=100)) -> Dict[str, Any]
 
 @router.get("/by-fixture/{fixture_id}")
 def prediction_by_fixture(fixture_id: str) -> Dict[str, Any]:
-    cache_key = f"predictions:fixture:{fixture_id}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                row = _fetch_fixture_row_by_id(cur, fixture_id)
-                if not row:
-                    raise HTTPException(status_code=404, detail="Fixture not found")
-
-                item = _build_prediction_from_fixture_row(cur, row)
-
-        _cache_set(cache_key, item)
-        return item
+        return single_flight(
+            f"predictions:fixture:{fixture_id}",
+            lambda: _build_prediction_by_fixture(fixture_id),
+            ttl_seconds=_CACHE_TTL_SECONDS,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -1,7 +1,8 @@
 import os
-import httpx
 from typing import Optional, Any, Dict
 
+from app.core.http_client import aget_json
+
 API_KEY = os.getenv("API_FOOTBALL_KEY")
 BASE_URL = "https://v3.football.api-sports.io"
 
@@ -11,10 +12,7 @@ def _headers() -> Dict[str, str]:
     return {"x-apisports-key": API_KEY}
 
 async def _get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(f"{BASE_URL}/{path}", params=params, headers=_headers())
-        r.raise_for_status()
-        return r.json()
+    return await aget_json(f"{BASE_URL}/{path}", params=params, headers=_headers(), timeout=30)
 
 async def fetch_fixtures(
     league: int,
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple, Any, Union
+
+import numpy as np
+
+_EPS = 1e-6
 
 
 def _sigmoid(z: float) -> float:
@@ -23,18 +28,63 @@ class PlattBinary:
     # p_cal = sigmoid(a*logit(p)+b)
     a: float
     b: float
+    # diagnostic de la fit (nu se serializează)
+    iterations: int = field(default=0, compare=False)
+    logloss: float | None = field(default=None, compare=False)
 
     def apply(self, p: float) -> float:
         p = _clamp(p)
         logit = math.log(p / (1.0 - p))
         return _clamp(_sigmoid(self.a * logit + self.b))
 
+    def apply_batch(self, p: np.ndarray) -> np.ndarray:
+        z = self.a * _logit_array(p) + self.b
+        return np.clip(0.5 * (1.0 + np.tanh(0.5 * z)), _EPS, 1.0 - _EPS)
+
+
+@dataclass
+class IsotonicBinary:
+    """
+    Calibrare monotonă (non-parametrică) pentru piețe binare: funcție în trepte
+    dată de breakpoints x (crescătoare) și valorile y, interpolată liniar între ele.
+    """
+
+    x: Sequence[float]
+    y: Sequence[float]
+    logloss: float | None = field(default=None, compare=False)
+
+    def apply(self, p: float) -> float:
+        x, y = self.x, self.y
+        if not x:
+            return _clamp(p)
+        # căutare binară în breakpoints
+        i = bisect_right(x, p)
+        if i == 0:
+            return _clamp(y[0])
+        if i == len(x):
+            return _clamp(y[-1])
+        x0, x1 = x[i - 1], x[i]
+        t = (p - x0) / (x1 - x0) if x1 > x0 else 0.0
+        return _clamp(y[i - 1] + t * (y[i] - y[i - 1]))
+
+    def apply_batch(self, p: np.ndarray) -> np.ndarray:
+        if not self.x:
+            return np.clip(np.asarray(p, dtype=float), _EPS, 1.0 - _EPS)
+        # np.interp face aceeași căutare binară, vectorizat
+        out = np.interp(np.asarray(p, dtype=float), self.x, self.y)
+        return np.clip(out, _EPS, 1.0 - _EPS)
+
+
+BinaryCalibrator = Union[PlattBinary, IsotonicBinary]
+
 
 @dataclass
 class PlattOVR:
     # one-vs-rest for multiclass using logits; normalize
     a: float
     b: float
+    iterations: int = field(default=0, compare=False)
+    logloss: float | None = field(default=None, compare=False)
 
     def apply_probs(self, probs: Dict[str, float]) -> Dict[str, float]:
         # apply same (a,b) to each class logit then renormalize
@@ -49,98 +99,189 @@ class PlattOVR:
         return {k: _clamp(v / s) for k, v in scores.items()}
 
 
+def _logit_array(p: np.ndarray) -> np.ndarray:
+    p = np.clip(np.asarray(p, dtype=float), _EPS, 1.0 - _EPS)
+    return np.log(p / (1.0 - p))
+
+
+def _objective(x: np.ndarray, y: np.ndarray, a: float, b: float, l2: float) -> float:
+    # logloss însumat + l2/2 * (a^2 + b^2), stabil numeric: log(1+e^z) - y*z
+    z = a * x + b
+    return float(np.sum(np.logaddexp(0.0, z) - y * z) + 0.5 * l2 * (a * a + b * b))
+
+
+def _fit_logistic_1d(
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    l2: float,
+    max_iter: int,
+    tol: float,
+) -> Tuple[float, float, int, float]:
+    """
+    Newton-Raphson (IRLS) pe (a, b) pentru sigmoid(a*x+b); Hessiana e 2x2.
+    Pas înjumătățit dacă obiectivul nu scade (date aproape separabile).
+    Returnează (a, b, iterații, logloss mediu).
+    """
+    a, b = 1.0, 0.0
+    obj = _objective(x, y, a, b, l2)
+    iterations = 0
+
+    for iterations in range(1, max_iter + 1):
+        z = a * x + b
+        q = 0.5 * (1.0 + np.tanh(0.5 * z))  # sigmoid stabil
+        r = q - y
+        w = np.maximum(q * (1.0 - q), 1e-12)
+
+        ga = float(r @ x) + l2 * a
+        gb = float(r.sum()) + l2 * b
+        haa = float(w @ (x * x)) + l2
+        hab = float(w @ x)
+        hbb = float(w.sum()) + l2
+
+        det = haa * hbb - hab * hab
+        if det <= 1e-12:
+            break
+        da = (hbb * ga - hab * gb) / det
+        db = (haa * gb - hab * ga) / det
+
+        step = 1.0
+        while True:
+            na, nb = a - step * da, b - step * db
+            new_obj = _objective(x, y, na, nb, l2)
+            if new_obj <= obj or step < 1e-4:
+                break
+            step *= 0.5
+
+        a, b = na, nb
+        improvement = obj - new_obj
+        obj = new_obj
+        if max(abs(step * da), abs(step * db)) < tol or abs(improvement) < tol * max(1.0, abs(obj)):
+            break
+
+    q = np.clip(0.5 * (1.0 + np.tanh(0.5 * (a * x + b))), _EPS, 1.0 - _EPS)
+    logloss = float(-np.mean(y * np.log(q) + (1.0 - y) * np.log(1.0 - q)))
+    return a, b, iterations, logloss
+
+
 def fit_platt_binary(
     preds: List[float],
     labels: List[int],
     *,
-    lr: float = 0.05,
-    steps: int = 700,
     l2: float = 1e-3,
+    max_iter: int = 50,
+    tol: float = 1e-8,
 ) -> PlattBinary:
     """
-    Fit p_cal = sigmoid(a*logit(p)+b) by minimizing logloss.
+    Fit p_cal = sigmoid(a*logit(p)+b) by minimizing logloss (Newton, vectorizat).
     preds: list of probabilities (0..1)
     labels: list of 0/1
     """
     assert len(preds) == len(labels) and len(preds) > 0
 
-    a, b = 1.0, 0.0
-
-    for _ in range(steps):
-        ga = 0.0
-        gb = 0.0
-        for p, y in zip(preds, labels):
-            p = _clamp(p)
-            x = math.log(p / (1.0 - p))  # logit
-            q = _sigmoid(a * x + b)
-            # d/dw logloss
-            ga += (q - y) * x
-            gb += (q - y)
-        # L2 regularization
-        ga += l2 * a
-        gb += l2 * b
-
-        a -= lr * ga / len(preds)
-        b -= lr * gb / len(preds)
-
-    return PlattBinary(a=a, b=b)
+    x = _logit_array(preds)
+    y = np.asarray(labels, dtype=float)
+    a, b, iterations, logloss = _fit_logistic_1d(x, y, l2=l2, max_iter=max_iter, tol=tol)
+    return PlattBinary(a=a, b=b, iterations=iterations, logloss=logloss)
 
 
 def fit_platt_ovr(
     probs_list: List[Dict[str, float]],
     true_labels: List[str],
     *,
-    lr: float = 0.04,
-    steps: int = 800,
     l2: float = 1e-3,
+    max_iter: int = 50,
+    tol: float = 1e-8,
 ) -> PlattOVR:
     """
     Simplified: fit one shared (a,b) applied to each class logit; normalize after.
-    This is cheap and usually improves calibration.
+    Toate perechile (meci, clasă) intră într-un singur fit binar.
     """
     assert len(probs_list) == len(true_labels) and len(probs_list) > 0
 
-    a, b = 1.0, 0.0
-
     # list of keys from first sample
     keys = list(probs_list[0].keys())
+    default = 1.0 / len(keys)
+
+    p = np.array([[float(probs.get(k, default)) for k in keys] for probs in probs_list], dtype=float)
+    y = np.array([[1.0 if k == y_true else 0.0 for k in keys] for y_true in true_labels], dtype=float)
+
+    a, b, iterations, logloss = _fit_logistic_1d(
+        _logit_array(p).ravel(), y.ravel(), l2=l2, max_iter=max_iter, tol=tol
+    )
+    return PlattOVR(a=a, b=b, iterations=iterations, logloss=logloss)
 
-    for _ in range(steps):
-        ga = 0.0
-        gb = 0.0
-        for probs, y_true in zip(probs_list, true_labels):
-            # compute per-class "soft" targets (1 for true, 0 rest)
-            for k in keys:
-                y = 1.0 if k == y_true else 0.0
-                p = _clamp(float(probs.get(k, 1.0 / len(keys))))
-                x = math.log(p / (1.0 - p))
-                q = _sigmoid(a * x + b)
-                ga += (q - y) * x
-                gb += (q - y)
-
-        ga += l2 * a
-        gb += l2 * b
-        denom = max(1, len(probs_list) * len(keys))
-        a -= lr * ga / denom
-        b -= lr * gb / denom
-
-    return PlattOVR(a=a, b=b)
-
-
-def serialize_calibration(binary: Dict[str, PlattBinary], ovr: PlattOVR | None) -> Dict[str, Any]:
+
+def fit_isotonic_binary(preds: List[float], labels: List[int]) -> IsotonicBinary:
+    """
+    Pool-adjacent-violators: sortare după p, apoi o singură trecere O(n) cu o stivă
+    de blocuri care se unesc cât timp media lor nu e crescătoare.
+    Fiecare bloc păstrează capetele (x_min, x_max) -> breakpoints compacte.
+    """
+    assert len(preds) == len(labels) and len(preds) > 0
+
+    p = np.clip(np.asarray(preds, dtype=float), _EPS, 1.0 - _EPS)
+    y = np.asarray(labels, dtype=float)
+
+    # predicțiile egale formează de la început un singur bloc
+    xs, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=y, minlength=len(xs))
+
+    block_sum: List[float] = []
+    block_w: List[float] = []
+    block_lo: List[float] = []
+    block_hi: List[float] = []
+    for xv, sv, wv in zip(xs.tolist(), sums.tolist(), counts.tolist()):
+        block_sum.append(sv)
+        block_w.append(wv)
+        block_lo.append(xv)
+        block_hi.append(xv)
+        while len(block_sum) > 1 and block_sum[-2] * block_w[-1] >= block_sum[-1] * block_w[-2]:
+            sv2, wv2, hi2 = block_sum.pop(), block_w.pop(), block_hi.pop()
+            block_lo.pop()
+            block_sum[-1] += sv2
+            block_w[-1] += wv2
+            block_hi[-1] = hi2
+
+    bx: List[float] = []
+    by: List[float] = []
+    for sv, wv, lo, hi in zip(block_sum, block_w, block_lo, block_hi):
+        v = _clamp(sv / wv)
+        bx.append(lo)
+        by.append(v)
+        if hi > lo:
+            bx.append(hi)
+            by.append(v)
+
+    model = IsotonicBinary(x=bx, y=by)
+    q = model.apply_batch(p)
+    model.logloss = float(-np.mean(y * np.log(q) + (1.0 - y) * np.log(1.0 - q)))
+    return model
+
+
+def serialize_calibration(binary: Dict[str, BinaryCalibrator], ovr: PlattOVR | None) -> Dict[str, Any]:
     out = {"binary": {}, "ovr": None}
     for name, model in binary.items():
-        out["binary"][name] = {"a": model.a, "b": model.b}
+        if isinstance(model, IsotonicBinary):
+            out["binary"][name] = {"type": "isotonic", "x": list(model.x), "y": list(model.y)}
+        else:
+            out["binary"][name] = {"a": model.a, "b": model.b}
     if ovr is not None:
         out["ovr"] = {"a": ovr.a, "b": ovr.b}
     return out
 
 
-def load_calibration(params: Dict[str, Any]) -> Tuple[Dict[str, PlattBinary], PlattOVR | None]:
-    binary = {}
+def load_calibration(params: Dict[str, Any]) -> Tuple[Dict[str, BinaryCalibrator], PlattOVR | None]:
+    """
+    binary: per piață {"a", "b"} (Platt, implicit) sau {"type": "isotonic", "x", "y"}.
+    """
+    binary: Dict[str, BinaryCalibrator] = {}
     b = (params or {}).get("binary") or {}
     for name, v in b.items():
-        binary[name] = PlattBinary(a=float(v["a"]), b=float(v["b"]))
+        if v.get("type") == "isotonic":
+            binary[name] = IsotonicBinary(x=[float(t) for t in v["x"]], y=[float(t) for t in v["y"]])
+        else:
+            binary[name] = PlattBinary(a=float(v["a"]), b=float(v["b"]))
     o = (params or {}).get("ovr")
     ovr = None
     if o:
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.db import get_conn
+from app.services.calibration import BinaryCalibrator, PlattOVR, load_calibration
+
+# cât servește un proces snapshot-ul curent fără să verifice versiunea din DB
+CALIBRATION_POLL_SECONDS = float(os.getenv("CALIBRATION_POLL_SECONDS", "60"))
+
+# piețele din params: binary -> gg / ou25, ovr -> 1x2
+MARKET_1X2 = "1x2"
+
+# (model_version, league_id sau None = global, market)
+CalibrationKey = Tuple[str, Optional[str], str]
+
+
+@dataclass(frozen=True)
+class CalibrationSnapshot:
+    """
+    Calibrările încărcate la un moment dat, imutabile; o reîncărcare creează
+    un snapshot nou, iar request-urile în curs îl folosesc pe cel vechi.
+    """
+
+    version: Optional[Tuple[Any, ...]] = None
+    entries: Mapping[CalibrationKey, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, model_version: str, league_id: Any, market: str) -> Any:
+        league_key = None if league_id is None else str(league_id)
+        found = self.entries.get((model_version, league_key, market))
+        if found is None and league_key is not None:
+            found = self.entries.get((model_version, None, market))
+        return found
+
+    def for_league(
+        self, model_version: str, league_id: Any
+    ) -> Tuple[Dict[str, BinaryCalibrator], Optional[PlattOVR]]:
+        """
+        (cal_binary, cal_ovr) pentru o ligă: calibrarea ligii, altfel cea globală.
+        """
+        league_key = None if league_id is None else str(league_id)
+        markets = {
+            market
+            for (mv, lg, market) in self.entries
+            if mv == model_version and market != MARKET_1X2 and lg in (None, league_key)
+        }
+        cal_binary: Dict[str, BinaryCalibrator] = {m: self.get(model_version, league_id, m) for m in markets}
+        return cal_binary, self.get(model_version, league_id, MARKET_1X2)
+
+
+def _has_league_column(cur) -> bool:
+    cur.execute(
+        """
+        select exists(
+          select 1 from information_schema.columns
+          where table_name = 'model_calibration' and column_name = 'league_id'
+        )
+        """
+    )
+    return bool(cur.fetchone()[0])
+
+
+def _version(cur) -> Tuple[Any, ...]:
+    # ieftin: un rând nou / șters sau un updated_at nou schimbă versiunea
+    cur.execute("select count(*), max(updated_at) from model_calibration")
+    return tuple(cur.fetchone())
+
+
+def _load_snapshot(cur, version: Tuple[Any, ...]) -> CalibrationSnapshot:
+    league_expr = "league_id::text" if _has_league_column(cur) else "null::text"
+    cur.execute(
+        f"""
+        select model_version, {league_expr}, params
+        from model_calibration
+        order by updated_at asc nulls first
+        """
+    )
+
+    entries: Dict[CalibrationKey, Any] = {}
+    for model_version, league_id, params in cur.fetchall():
+        if isinstance(params, str):
+            params = json.loads(params)
+        params = params or {}
+        # calibrările per ligă pot sta și în params["leagues"] (scrise de evaluation_job)
+        scoped = [(league_id, params)]
+        if league_id is None:
+            scoped += [(str(lid), p) for lid, p in (params.get("leagues") or {}).items()]
+
+        for lg, lg_params in scoped:
+            cal_binary, cal_ovr = load_calibration(lg_params or {})
+            for market, model in cal_binary.items():
+                entries[(model_version, lg, market)] = model
+            if cal_ovr is not None:
+                entries[(model_version, lg, MARKET_1X2)] = cal_ovr
+
+    return CalibrationSnapshot(version=version, entries=MappingProxyType(entries))
+
+
+_snapshot = CalibrationSnapshot()
+_checked_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def _stale() -> bool:
+    return _checked_at is None or time.monotonic() - _checked_at >= CALIBRATION_POLL_SECONDS
+
+
+def get_calibration_snapshot(*, force: bool = False) -> CalibrationSnapshot:
+    """
+    Snapshot-ul curent al procesului. O dată la CALIBRATION_POLL_SECONDS un singur
+    thread verifică versiunea (count + max(updated_at)) și reîncarcă doar dacă s-a
+    schimbat; celelalte thread-uri servesc între timp snapshot-ul existent.
+    """
+    global _snapshot, _checked_at
+
+    if not force and not _stale():
+        return _snapshot
+
+    # prima încărcare așteaptă; refresh-urile ulterioare nu blochează request-uri
+    if not _lock.acquire(blocking=force or _checked_at is None):
+        return _snapshot
+    try:
+        if force or _stale():
+            try:
+                with get_conn() as conn:
+                    with conn.cursor() as cur:
+                        version = _version(cur)
+                        if version != _snapshot.version:
+                            _snapshot = _load_snapshot(cur, version)
+            except Exception:
+                # DB indisponibil: rămâne snapshot-ul vechi, reîncercăm la următorul poll
+                pass
+            _checked_at = time.monotonic()
+    finally:
+        _lock.release()
+
+    return _snapshot
+
+
+def invalidate_calibration() -> None:
+    """
+    Forțează verificarea versiunii la următorul acces (ex: după salvarea unei calibrări).
+    """
+    global _checked_at
+    if _checked_at is not None:
+        _checked_at = time.monotonic() - CALIBRATION_POLL_SECONDS
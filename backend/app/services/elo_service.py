@@ -1,71 +1,464 @@
+import struct
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
 from app.db import get_conn
 
 
 BASE_ELO = 1500
 K = 20
 
+# doar meciurile terminate intră în Elo; scorurile live (parțiale) nu mută checkpoint-ul
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+
+# câte meciuri aduce cursorul server-side per round trip
+REPLAY_FETCH_SIZE = 5000
+
+
+def _rating_quantizer(cur) -> Callable[[float], float]:
+    """
+    Replay-ul vechi scria rating-ul după fiecare meci și îl recitea, deci
+    valoarea trecea prin tipul coloanei team_elo.elo_rating. Reproducem aceeași
+    rotunjire ca rezultatul să fie identic.
+    """
+    cur.execute(
+        """
+        select data_type, numeric_scale
+        from information_schema.columns
+        where table_schema = 'public' and table_name = 'team_elo' and column_name = 'elo_rating'
+        """
+    )
+    row = cur.fetchone()
+    data_type, scale = (row[0], row[1]) if row else ("double precision", None)
+
+    if data_type == "real":
+        return lambda x: struct.unpack("f", struct.pack("f", x))[0]
+
+    if data_type in ("integer", "bigint", "smallint"):
+        scale = 0
+    elif data_type != "numeric" or scale is None:
+        return lambda x: x
+
+    # numeric(p, s) / integer: Postgres rotunjește half away from zero
+    step = Decimal(1).scaleb(-int(scale))
+    return lambda x: float(Decimal(repr(x)).quantize(step, rounding=ROUND_HALF_UP))
+
+
+def _ensure_checkpoint_columns(cur) -> None:
+    """
+    team_elo ține, per echipă, ultimul meci aplicat; checkpoint-ul global e maximul.
+    """
+    cur.execute(
+        """
+        select column_name
+        from information_schema.columns
+        where table_schema = 'public' and table_name = 'team_elo'
+          and column_name in ('last_kickoff_at', 'last_fixture_id')
+        """
+    )
+    existing = {r[0] for r in cur.fetchall()}
+    if "last_kickoff_at" not in existing:
+        cur.execute("alter table team_elo add column if not exists last_kickoff_at timestamptz")
+    if "last_fixture_id" not in existing:
+        cur.execute("alter table team_elo add column if not exists last_fixture_id uuid")
+
+
+def _column_type(cur, table: str, column: str) -> str:
+    cur.execute(
+        """
+        select format_type(a.atttypid, a.atttypmod)
+        from pg_attribute a
+        where a.attrelid = %s::regclass and a.attname = %s and not a.attisdropped
+        """,
+        (table, column),
+    )
+    return cur.fetchone()[0]
+
+
+def _ensure_history_table(cur) -> None:
+    """
+    team_elo_history: rating-ul fiecărei echipe înainte și după fiecare meci,
+    în ordinea replay-ului. Indexul (team_id, kickoff_at, fixture_id) servește
+    lookup-urile "rating la momentul T" (elo_as_of).
+    """
+    cur.execute("select to_regclass('public.team_elo_history') is not null")
+    if cur.fetchone()[0]:
+        return
+
+    team_type = _column_type(cur, "team_elo", "team_id")
+    fixture_type = _column_type(cur, "fixtures", "id")
+    cur.execute(
+        f"""
+        create table if not exists team_elo_history (
+          fixture_id {fixture_type} not null,
+          team_id {team_type} not null,
+          opponent_id {team_type},
+          kickoff_at timestamptz not null,
+          is_home boolean not null,
+          rating_before double precision not null,
+          rating_after double precision not null,
+          primary key (fixture_id, team_id)
+        )
+        """
+    )
+    cur.execute(
+        """
+        create index if not exists idx_team_elo_history_team_time
+        on team_elo_history (team_id, kickoff_at, fixture_id)
+        """
+    )
+
+
+def _replay(
+    matches: Iterable[Tuple[Any, Any, Any, Any, int, int]],
+    ratings: Dict[Any, float],
+    quantize: Callable[[float], float] = lambda x: x,
+    last_match: Optional[Dict[Any, Tuple[Any, Any]]] = None,
+    history: Optional[List[tuple]] = None,
+) -> Dict[Any, float]:
+    """
+    Elo K=20 peste meciuri (fixture_id, kickoff_at, home, away, hg, ag) în ordine
+    cronologică; actualizează ratings (și last_match: team -> (kickoff_at, fixture_id)) pe loc.
+    history primește rândurile pentru team_elo_history (câte unul per echipă per meci).
+    """
+    for fixture_id, kickoff_at, home_id, away_id, hg, ag in matches:
+        home_elo = ratings.get(home_id, float(BASE_ELO))
+        away_elo = ratings.get(away_id, float(BASE_ELO))
+
+        expected_home = 1 / (1 + 10 ** ((away_elo - home_elo) / 400))
+        expected_away = 1 / (1 + 10 ** ((home_elo - away_elo) / 400))
+
+        if hg > ag:
+            score_home, score_away = 1, 0
+        elif hg < ag:
+            score_home, score_away = 0, 1
+        else:
+            score_home, score_away = 0.5, 0.5
+
+        ratings[home_id] = quantize(home_elo + K * (score_home - expected_home))
+        ratings[away_id] = quantize(away_elo + K * (score_away - expected_away))
+
+        if last_match is not None:
+            last_match[home_id] = last_match[away_id] = (kickoff_at, fixture_id)
+
+        if history is not None:
+            history.append((fixture_id, home_id, away_id, kickoff_at, True, home_elo, ratings[home_id]))
+            history.append((fixture_id, away_id, home_id, kickoff_at, False, away_elo, ratings[away_id]))
+
+    return ratings
+
+
+_MATCHES_SQL = """
+    select
+        id,
+        kickoff_at,
+        home_team_id,
+        away_team_id,
+        home_goals,
+        away_goals
+    from fixtures
+    where home_goals is not null
+      and away_goals is not null
+      and status = any(%(finished)s)
+      {after}
+    order by kickoff_at, id
+"""
+
+
+def _replay_from_db(conn, ratings, quantize, last_match, checkpoint=None, history=None) -> int:
+    """
+    Replay peste un cursor server-side; cu checkpoint doar meciurile de după el.
+    Returnează numărul de meciuri aplicate.
+    """
+    after = "and (kickoff_at, id) > (%(after_kickoff)s, %(after_id)s)" if checkpoint else ""
+    params: Dict[str, Any] = {"finished": FINISHED_STATUSES}
+    if checkpoint:
+        params["after_kickoff"], params["after_id"] = checkpoint
+    applied = 0
+
+    def counted(rows):
+        nonlocal applied
+        for r in rows:
+            applied += 1
+            yield r
+
+    with conn.cursor(name="elo_replay") as matches:
+        matches.itersize = REPLAY_FETCH_SIZE
+        matches.execute(_MATCHES_SQL.format(after=after), params)
+        _replay(counted(matches), ratings, quantize, last_match, history)
+    return applied
+
+
+_HISTORY_COLUMNS = "fixture_id, team_id, opponent_id, kickoff_at, is_home, rating_before, rating_after"
+
+
+_HISTORY_VALUES = ["opponent_id", "kickoff_at", "is_home", "rating_before", "rating_after"]
+
+
+def _upsert_history_sql(source: str) -> str:
+    # rândurile identice nu sunt rescrise (nici tuple noi, nici WAL)
+    return f"""
+        insert into team_elo_history ({_HISTORY_COLUMNS}) {source}
+        on conflict (fixture_id, team_id) do update set
+            {", ".join(f"{c} = excluded.{c}" for c in _HISTORY_VALUES)}
+        where ({", ".join(f"team_elo_history.{c}" for c in _HISTORY_VALUES)})
+              is distinct from ({", ".join(f"excluded.{c}" for c in _HISTORY_VALUES)})
+    """
 
-def rebuild_team_elo():
 
+def _write_history(cur, history: List[tuple]) -> None:
+    """
+    Incremental: meciurile de după checkpoint doar se adaugă.
+    """
+    if not history:
+        return
+    execute_values(cur, _upsert_history_sql("values %s"), history, page_size=5000)
+
+
+def _merge_history(cur, history: List[tuple]) -> Dict[str, int]:
+    """
+    Rebuild: istoricul din replay intră în _stage_team_elo_history, apoi se șterg
+    doar rândurile care nu mai există (meci anulat / corectat) și se scriu doar
+    cele noi sau schimbate. Rândurile neatinse rămân pe loc, deci elo_as_of
+    citește aceleași valori în timpul rebuild-ului.
+    """
+    cur.execute(
+        """
+        create temp table if not exists _stage_team_elo_history
+        on commit drop
+        as select * from team_elo_history with no data
+        """
+    )
+    if history:
+        execute_values(
+            cur,
+            f"insert into _stage_team_elo_history ({_HISTORY_COLUMNS}) values %s",
+            history,
+            page_size=5000,
+        )
+
+    cur.execute(
+        """
+        delete from team_elo_history h
+        where not exists (
+            select 1 from _stage_team_elo_history s
+            where s.fixture_id = h.fixture_id and s.team_id = h.team_id
+        )
+        """
+    )
+    deleted = cur.rowcount
+
+    cur.execute(_upsert_history_sql(f"select {_HISTORY_COLUMNS} from _stage_team_elo_history"))
+    return {"deleted": deleted, "written": cur.rowcount}
+
+
+def rebuild_team_elo() -> Dict[str, Any]:
+    """
+    Recalculează team_elo din toate meciurile terminate: replay în memorie peste
+    un cursor server-side, apoi o singură scriere a rating-urilor finale
+    (împreună cu checkpoint-ul per echipă).
+    """
     with get_conn() as conn:
         with conn.cursor() as cur:
+            _ensure_checkpoint_columns(cur)
+            _ensure_history_table(cur)
+            quantize = _rating_quantizer(cur)
+
+            cur.execute("select id from teams")
+            team_ids = [r[0] for r in cur.fetchall()]
+            ratings: Dict[Any, float] = {tid: quantize(float(BASE_ELO)) for tid in team_ids}
+
+        last_match: Dict[Any, Tuple[Any, Any]] = {}
+        history: List[tuple] = []
+        applied = _replay_from_db(conn, ratings, quantize, last_match, history=history)
+
+        with conn.cursor() as cur:
+            # istoricul e derivat din replay: la rebuild se aplică doar diferențele
+            history_result = _merge_history(cur, history)
 
             cur.execute("delete from team_elo")
 
-            cur.execute("""
-            insert into team_elo (team_id, elo_rating, updated_at)
-            select id, %s, now()
-            from teams
-            """, (BASE_ELO,))
-
-            cur.execute("""
-            select
-                home_team_id,
-                away_team_id,
-                home_goals,
-                away_goals
-            from fixtures
-            where home_goals is not null
-            order by kickoff_at
-            """)
-
-            matches = cur.fetchall()
-
-            for home_id, away_id, hg, ag in matches:
-
-                cur.execute(
-                    "select elo_rating from team_elo where team_id=%s",
-                    (home_id,)
-                )
-                home_elo = float(cur.fetchone()[0])
-
-                cur.execute(
-                    "select elo_rating from team_elo where team_id=%s",
-                    (away_id,)
-                )
-                away_elo = float(cur.fetchone()[0])
-
-                expected_home = 1 / (1 + 10 ** ((away_elo - home_elo) / 400))
-                expected_away = 1 / (1 + 10 ** ((home_elo - away_elo) / 400))
-
-                if hg > ag:
-                    score_home, score_away = 1, 0
-                elif hg < ag:
-                    score_home, score_away = 0, 1
-                else:
-                    score_home, score_away = 0.5, 0.5
-
-                new_home = home_elo + K * (score_home - expected_home)
-                new_away = away_elo + K * (score_away - expected_away)
-
-                cur.execute(
-                    "update team_elo set elo_rating=%s where team_id=%s",
-                    (new_home, home_id),
-                )
-
-                cur.execute(
-                    "update team_elo set elo_rating=%s where team_id=%s",
-                    (new_away, away_id),
-                )
+            # doar echipele din teams (ca înainte: team_elo e populat din teams)
+            execute_values(
+                cur,
+                "insert into team_elo (team_id, elo_rating, last_kickoff_at, last_fixture_id, updated_at) values %s",
+                [(tid, ratings[tid], *last_match.get(tid, (None, None))) for tid in team_ids],
+                template="(%s, %s, %s, %s, now())",
+                page_size=1000,
+            )
 
         conn.commit()
+
+    return {"mode": "full", "matches_applied": applied, "teams": len(team_ids), "history": history_result}
+
+
+def _checkpoint(cur) -> Optional[Tuple[Any, Any]]:
+    cur.execute(
+        """
+        select last_kickoff_at, last_fixture_id
+        from team_elo
+        where last_kickoff_at is not null
+        order by last_kickoff_at desc, last_fixture_id desc
+        limit 1
+        """
+    )
+    row = cur.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def _touches_history(cur, fixture_ids: List[str], checkpoint: Tuple[Any, Any]) -> bool:
+    """
+    Un meci terminat modificat la/înainte de checkpoint (rezultat corectat sau venit
+    târziu) sau orice meci modificat deja aplicat (în team_elo_history, indiferent
+    de kickoff-ul nou: un kickoff mutat după checkpoint l-ar aplica a doua oară)
+    schimbă replay-ul -> e nevoie de rebuild complet. Modificările meciurilor
+    neterminate și neaplicate (scor live) nu ating Elo.
+    """
+    cur.execute(
+        """
+        select exists(
+          select 1
+          from fixtures f
+          where f.id = any(%(ids)s::uuid[])
+            and (
+              exists (select 1 from team_elo_history h where h.fixture_id = f.id)
+              or (
+                (f.kickoff_at, f.id) <= (%(kickoff)s, %(id)s)
+                and f.status = any(%(finished)s)
+                and f.home_goals is not null
+                and f.away_goals is not null
+              )
+            )
+        )
+        """,
+        {"ids": list(fixture_ids), "kickoff": checkpoint[0], "id": checkpoint[1], "finished": FINISHED_STATUSES},
+    )
+    return bool(cur.fetchone()[0])
+
+
+def update_team_elo(changed_fixture_ids: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+    """
+    Aplică doar meciurile terminate (FINISHED_STATUSES) după checkpoint. changed_fixture_ids
+    vine de la sync_results / sync_fixtures / live sync: un meci terminat la/înainte de
+    checkpoint forțează rebuild complet; unul neterminat e no-op.
+    Rezultatul e identic cu rebuild_team_elo().
+    """
+    changed = [str(x) for x in (changed_fixture_ids or [])]
+    result: Optional[Dict[str, Any]] = None
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            _ensure_checkpoint_columns(cur)
+            _ensure_history_table(cur)
+            conn.commit()
+
+            checkpoint = _checkpoint(cur)
+            full = checkpoint is None or (bool(changed) and _touches_history(cur, changed, checkpoint))
+
+        if not full:
+            with conn.cursor() as cur:
+                quantize = _rating_quantizer(cur)
+
+                cur.execute("select team_id, elo_rating from team_elo")
+                ratings: Dict[Any, float] = {tid: float(r) for tid, r in cur.fetchall()}
+
+                # echipe apărute după ultimul rebuild
+                cur.execute("select id from teams")
+                all_teams = {r[0] for r in cur.fetchall()}
+                new_teams = [tid for tid in all_teams if tid not in ratings]
+                for tid in new_teams:
+                    ratings[tid] = quantize(float(BASE_ELO))
+
+            last_match: Dict[Any, Tuple[Any, Any]] = {}
+            history: List[tuple] = []
+            applied = _replay_from_db(conn, ratings, quantize, last_match, checkpoint, history)
+
+            with conn.cursor() as cur:
+                # append-only: doar meciurile de după checkpoint
+                _write_history(cur, history)
+
+            # doar echipele din teams, ca la rebuild
+            rows = [(tid, ratings[tid], *last_match[tid]) for tid in last_match if tid in all_teams]
+            rows += [(tid, ratings[tid], None, None) for tid in new_teams if tid not in last_match]
+
+            if rows:
+                with conn.cursor() as cur:
+                    # staging cu tipurile din team_elo, apoi update + insert pentru echipele noi
+                    cur.execute(
+                        """
+                        create temp table if not exists _stage_team_elo
+                        on commit drop
+                        as select team_id, elo_rating, last_kickoff_at, last_fixture_id
+                        from team_elo with no data
+                        """
+                    )
+                    execute_values(
+                        cur,
+                        "insert into _stage_team_elo (team_id, elo_rating, last_kickoff_at, last_fixture_id) values %s",
+                        rows,
+                        page_size=1000,
+                    )
+                    cur.execute(
+                        """
+                        update team_elo t
+                        set elo_rating = s.elo_rating,
+                            last_kickoff_at = s.last_kickoff_at,
+                            last_fixture_id = s.last_fixture_id,
+                            updated_at = now()
+                        from _stage_team_elo s
+                        where t.team_id = s.team_id
+                        """
+                    )
+                    cur.execute(
+                        """
+                        insert into team_elo (team_id, elo_rating, last_kickoff_at, last_fixture_id, updated_at)
+                        select s.team_id, s.elo_rating, s.last_kickoff_at, s.last_fixture_id, now()
+                        from _stage_team_elo s
+                        where not exists (select 1 from team_elo t where t.team_id = s.team_id)
+                        """
+                    )
+
+            conn.commit()
+
+            result = {
+                "mode": "incremental",
+                "matches_applied": applied,
+                "teams_updated": len(last_match),
+                "checkpoint": [str(checkpoint[0]), str(checkpoint[1])],
+            }
+
+    if result is None:
+        return rebuild_team_elo()
+    return result
+
+
+def elo_as_of(cur, team_ids: Iterable[Any], as_of) -> Dict[Any, float]:
+    """
+    Rating-ul fiecărei echipe înainte de momentul as_of (ex: kickoff-ul unui meci
+    din backtest): rating_after al ultimului meci cu kickoff_at < as_of, sau BASE_ELO.
+    Un index seek per echipă pe (team_id, kickoff_at, fixture_id).
+    """
+    ids = list(dict.fromkeys(team_ids))
+    if not ids:
+        return {}
+
+    team_type = _column_type(cur, "team_elo_history", "team_id")
+    cur.execute(
+        f"""
+        select t.team_id, h.rating_after
+        from unnest(%s::{team_type}[]) as t(team_id)
+        left join lateral (
+            select rating_after
+            from team_elo_history h
+            where h.team_id = t.team_id
+              and h.kickoff_at < %s
+            order by h.kickoff_at desc, h.fixture_id desc
+            limit 1
+        ) h on true
+        """,
+        (ids, as_of),
+    )
+    by_text = {str(tid): (float(r) if r is not None else float(BASE_ELO)) for tid, r in cur.fetchall()}
+    return {tid: by_text.get(str(tid), float(BASE_ELO)) for tid in ids}
@@ -1,32 +1,322 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
+import numpy as np
 
-def _clamp(p: float, eps: float = 1e-6) -> float:
+_EPS = 1e-6
+
+# bins de reliability (probabilitate prezisă 0..1 în RELIABILITY_BINS intervale egale)
+RELIABILITY_BINS = 10
+
+
+def _clamp(p: float, eps: float = _EPS) -> float:
     return max(eps, min(1.0 - eps, p))
 
 
-def brier_binary(preds: List[float], labels: List[int]) -> float:
-    if not preds:
-        return 0.0
-    s = 0.0
-    for p, y in zip(preds, labels):
-        p = _clamp(float(p))
-        s += (p - float(y)) ** 2
-    return s / len(preds)
+def _bin_index(p: float, n_bins: int) -> int:
+    return min(int(p * n_bins), n_bins - 1)
 
 
-def logloss_binary(preds: List[float], labels: List[int]) -> float:
-    if not preds:
-        return 0.0
-    s = 0.0
-    for p, y in zip(preds, labels):
+class _Reliability:
+    """
+    Reliability diagram incremental: per bin numărul de eșantioane, suma
+    probabilităților prezise și suma rezultatelor. Mergeable.
+    """
+
+    def __init__(self, n_bins: int = RELIABILITY_BINS):
+        self.n_bins = n_bins
+        self.count = np.zeros(n_bins, dtype=np.int64)
+        self.sum_p = np.zeros(n_bins, dtype=float)
+        self.sum_y = np.zeros(n_bins, dtype=float)
+
+    def add(self, p: float, y: float) -> None:
+        i = _bin_index(p, self.n_bins)
+        self.count[i] += 1
+        self.sum_p[i] += p
+        self.sum_y[i] += y
+
+    def add_batch(self, p: np.ndarray, y: np.ndarray) -> None:
+        idx = np.minimum((p * self.n_bins).astype(np.int64), self.n_bins - 1)
+        self.count += np.bincount(idx, minlength=self.n_bins)
+        self.sum_p += np.bincount(idx, weights=p, minlength=self.n_bins)
+        self.sum_y += np.bincount(idx, weights=y, minlength=self.n_bins)
+
+    def merge(self, other: "_Reliability") -> None:
+        if other.n_bins != self.n_bins:
+            raise ValueError("reliability bins diferite")
+        self.count += other.count
+        self.sum_p += other.sum_p
+        self.sum_y += other.sum_y
+
+    def ece(self) -> float:
+        n = int(self.count.sum())
+        if n == 0:
+            return 0.0
+        mask = self.count > 0
+        gap = np.abs(self.sum_p[mask] - self.sum_y[mask])
+        # sum_k n_k/n * |avg_p_k - avg_y_k| = sum_k |sum_p_k - sum_y_k| / n
+        return float(gap.sum() / n)
+
+    def bins(self) -> List[Dict[str, Any]]:
+        out = []
+        for i in range(self.n_bins):
+            c = int(self.count[i])
+            out.append(
+                {
+                    "lo": i / self.n_bins,
+                    "hi": (i + 1) / self.n_bins,
+                    "n": c,
+                    "avg_p": float(self.sum_p[i] / c) if c else None,
+                    "freq": float(self.sum_y[i] / c) if c else None,
+                }
+            )
+        return out
+
+
+class BinaryAccumulator:
+    """
+    Metrici pentru o piață binară, agregate în memorie constantă:
+    Brier, log-loss, accuracy (prag 0.5), reliability / ECE.
+    add() per rând (ex: cursor server-side), add_batch() pe array-uri NumPy,
+    merge() pentru rezultate din procese diferite.
+    """
+
+    def __init__(self, n_bins: int = RELIABILITY_BINS):
+        self.n = 0
+        self.brier_sum = 0.0
+        self.logloss_sum = 0.0
+        self.correct = 0
+        self.reliability = _Reliability(n_bins)
+
+    def add(self, p: float, y: int) -> None:
         p = _clamp(float(p))
         y = int(y)
-        s += -(y * math.log(p) + (1 - y) * math.log(1.0 - p))
-    return s / len(preds)
+        self.n += 1
+        self.brier_sum += (p - y) ** 2
+        self.logloss_sum += -(y * math.log(p) + (1 - y) * math.log(1.0 - p))
+        self.correct += 1 if (p >= 0.5) == (y == 1) else 0
+        self.reliability.add(p, y)
+
+    def add_batch(self, preds: Sequence[float], labels: Sequence[int]) -> None:
+        p = np.clip(np.asarray(preds, dtype=float), _EPS, 1.0 - _EPS)
+        y = np.asarray(labels, dtype=float)
+        if p.shape != y.shape:
+            raise ValueError("preds și labels trebuie să aibă aceeași lungime")
+        self.n += int(p.size)
+        self.brier_sum += float(np.sum((p - y) ** 2))
+        self.logloss_sum += float(-np.sum(y * np.log(p) + (1.0 - y) * np.log(1.0 - p)))
+        self.correct += int(np.sum((p >= 0.5) == (y == 1.0)))
+        self.reliability.add_batch(p, y)
+
+    def merge(self, other: "BinaryAccumulator") -> "BinaryAccumulator":
+        self.n += other.n
+        self.brier_sum += other.brier_sum
+        self.logloss_sum += other.logloss_sum
+        self.correct += other.correct
+        self.reliability.merge(other.reliability)
+        return self
+
+    def brier(self) -> float:
+        return self.brier_sum / self.n if self.n else 0.0
+
+    def logloss(self) -> float:
+        return self.logloss_sum / self.n if self.n else 0.0
+
+    def accuracy(self) -> float:
+        return self.correct / self.n if self.n else 0.0
+
+    def result(self, *, with_bins: bool = False) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "n": self.n,
+            "brier": round(self.brier(), 6),
+            "logloss": round(self.logloss(), 6),
+            "accuracy": round(self.accuracy(), 6),
+            "ece": round(self.reliability.ece(), 6),
+        }
+        if with_bins:
+            out["reliability"] = self.reliability.bins()
+        return out
+
+
+class MulticlassAccumulator:
+    """
+    Ca BinaryAccumulator, pentru 1X2 etc. Clasele sunt fixate explicit (o clasă
+    lipsă dintr-un eșantion contează cu p≈0, adică eps după clamp).
+    Reliability / ECE pe probabilitatea clasei alese (top-1).
+    """
+
+    def __init__(self, classes: Sequence[str], n_bins: int = RELIABILITY_BINS):
+        self.classes = list(classes)
+        self._index = {k: i for i, k in enumerate(self.classes)}
+        self.n = 0
+        self.brier_sum = 0.0
+        self.logloss_sum = 0.0
+        self.correct = 0
+        self.reliability = _Reliability(n_bins)
+
+    def add(self, probs: Dict[str, float], label: str) -> None:
+        self.n += 1
+        for k in self.classes:
+            p = _clamp(float(probs.get(k, 0.0)))
+            t = 1.0 if k == label else 0.0
+            self.brier_sum += (p - t) ** 2
+        self.logloss_sum += -math.log(_clamp(float(probs.get(label, _EPS))))
+
+        # la egalitate câștigă prima clasă, ca max() pe chei
+        best = max(self.classes, key=lambda k: float(probs.get(k, 0.0)))
+        hit = 1.0 if best == label else 0.0
+        self.correct += int(hit)
+        self.reliability.add(_clamp(float(probs.get(best, 0.0))), hit)
+
+    def add_batch(self, probs: np.ndarray, labels: Sequence[str]) -> None:
+        """
+        probs: matrice (n, len(classes)) în ordinea self.classes.
+        """
+        P = np.asarray(probs, dtype=float)
+        if P.ndim != 2 or P.shape[1] != len(self.classes) or P.shape[0] != len(labels):
+            raise ValueError("probs trebuie să fie (n, len(classes))")
+        y = np.array([self._index.get(lbl, -1) for lbl in labels], dtype=np.int64)
+        rows = np.arange(P.shape[0])
+
+        Pc = np.clip(P, _EPS, 1.0 - _EPS)
+        T = np.zeros_like(P)
+        known = y >= 0
+        T[rows[known], y[known]] = 1.0
+
+        self.n += int(P.shape[0])
+        self.brier_sum += float(np.sum((Pc - T) ** 2))
+        p_true = np.where(known, Pc[rows, np.maximum(y, 0)], _EPS)
+        self.logloss_sum += float(-np.sum(np.log(p_true)))
+
+        best = np.argmax(P, axis=1)
+        hit = (best == y).astype(float)
+        self.correct += int(hit.sum())
+        self.reliability.add_batch(Pc[rows, best], hit)
+
+    def merge(self, other: "MulticlassAccumulator") -> "MulticlassAccumulator":
+        if other.classes != self.classes:
+            raise ValueError("clase diferite")
+        self.n += other.n
+        self.brier_sum += other.brier_sum
+        self.logloss_sum += other.logloss_sum
+        self.correct += other.correct
+        self.reliability.merge(other.reliability)
+        return self
+
+    def brier(self) -> float:
+        return self.brier_sum / self.n if self.n else 0.0
+
+    def logloss(self) -> float:
+        return self.logloss_sum / self.n if self.n else 0.0
+
+    def accuracy(self) -> float:
+        return self.correct / self.n if self.n else 0.0
+
+    def result(self, *, with_bins: bool = False) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "n": self.n,
+            "brier": round(self.brier(), 6),
+            "logloss": round(self.logloss(), 6),
+            "accuracy": round(self.accuracy(), 6),
+            "ece": round(self.reliability.ece(), 6),
+        }
+        if with_bins:
+            out["reliability"] = self.reliability.bins()
+        return out
+
+
+class RoiAccumulator:
+    """
+    ROI pe piață pentru pariuri simulate: miză, returnat (miză * cotă la câștig).
+    """
+
+    def __init__(self):
+        # market -> [bets, wins, staked, returned]
+        self._markets: Dict[str, List[float]] = {}
+
+    def add(self, market: str, odds: float, won: bool, stake: float = 1.0) -> None:
+        m = self._markets.get(market)
+        if m is None:
+            m = self._markets[market] = [0, 0, 0.0, 0.0]
+        m[0] += 1
+        m[2] += stake
+        if won:
+            m[1] += 1
+            m[3] += stake * float(odds)
+
+    def add_batch(
+        self,
+        market: str,
+        odds: Sequence[float],
+        won: Sequence[bool],
+        stake: Optional[Sequence[float]] = None,
+    ) -> None:
+        o = np.asarray(odds, dtype=float)
+        w = np.asarray(won, dtype=bool)
+        s = np.ones_like(o) if stake is None else np.asarray(stake, dtype=float)
+        m = self._markets.get(market)
+        if m is None:
+            m = self._markets[market] = [0, 0, 0.0, 0.0]
+        m[0] += int(o.size)
+        m[1] += int(w.sum())
+        m[2] += float(s.sum())
+        m[3] += float(np.sum(s * o * w))
+
+    def merge(self, other: "RoiAccumulator") -> "RoiAccumulator":
+        for market, (bets, wins, staked, returned) in other._markets.items():
+            m = self._markets.get(market)
+            if m is None:
+                m = self._markets[market] = [0, 0, 0.0, 0.0]
+            m[0] += bets
+            m[1] += wins
+            m[2] += staked
+            m[3] += returned
+        return self
+
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for market, (bets, wins, staked, returned) in sorted(self._markets.items()):
+            out[market] = {
+                "bets": int(bets),
+                "wins": int(wins),
+                "staked": round(staked, 4),
+                "returned": round(returned, 4),
+                "profit": round(returned - staked, 4),
+                "roi": round((returned - staked) / staked, 6) if staked else 0.0,
+            }
+        return out
+
+
+def _classes(probs_list: Iterable[Dict[str, float]], true_labels: Iterable[str]) -> List[str]:
+    # reuniunea claselor din toate eșantioanele (în ordinea apariției), nu doar din primul
+    seen: Dict[str, None] = {}
+    for probs in probs_list:
+        for k in probs:
+            seen.setdefault(k, None)
+    for y in true_labels:
+        seen.setdefault(y, None)
+    return list(seen)
+
+
+def _multiclass(probs_list: List[Dict[str, float]], true_labels: List[str]) -> MulticlassAccumulator:
+    acc = MulticlassAccumulator(_classes(probs_list, true_labels))
+    for probs, y in zip(probs_list, true_labels):
+        acc.add(probs, y)
+    return acc
+
+
+def brier_binary(preds: List[float], labels: List[int]) -> float:
+    acc = BinaryAccumulator()
+    acc.add_batch(preds, labels)
+    return acc.brier()
+
+
+def logloss_binary(preds: List[float], labels: List[int]) -> float:
+    acc = BinaryAccumulator()
+    acc.add_batch(preds, labels)
+    return acc.logloss()
 
 
 def accuracy_from_probs(probs_list: List[Dict[str, float]], true_labels: List[str]) -> float:
@@ -41,25 +331,11 @@ def accuracy_from_probs(probs_list: List[Dict[str, float]], true_labels: List[st
 
 def brier_multiclass(probs_list: List[Dict[str, float]], true_labels: List[str]) -> float:
     """
-    Multiclass Brier: mean over samples of sum_k (p_k - y_k)^2
+    Multiclass Brier: mean over samples of sum_k (p_k - y_k)^2,
+    peste toate clasele întâlnite (o clasă lipsă dintr-un eșantion contează cu p≈0).
     """
-    if not probs_list:
-        return 0.0
-    s = 0.0
-    keys = list(probs_list[0].keys())
-    for probs, y in zip(probs_list, true_labels):
-        for k in keys:
-            p = _clamp(float(probs.get(k, 0.0)))
-            t = 1.0 if k == y else 0.0
-            s += (p - t) ** 2
-    return s / len(probs_list)
+    return _multiclass(probs_list, true_labels).brier()
 
 
 def logloss_multiclass(probs_list: List[Dict[str, float]], true_labels: List[str]) -> float:
-    if not probs_list:
-        return 0.0
-    s = 0.0
-    for probs, y in zip(probs_list, true_labels):
-        p = _clamp(float(probs.get(y, 1e-6)))
-        s += -math.log(p)
-    return s / len(probs_list)
+    return _multiclass(probs_list, true_labels).logloss()
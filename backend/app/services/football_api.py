@@ -1,5 +1,6 @@
 import os
-import requests
+
+from app.core.http_client import get_json
 
 
 API_BASE_URL = os.getenv("FOOTBALL_API_BASE_URL", "").rstrip("/")
@@ -26,11 +27,42 @@ def get_fixtures(league_id: str, season: int, from_date: str, to_date: str):
         "to": to_date,
     }
 
-    response = requests.get(
-        url,
-        headers=_headers(),
-        params=params,
-        timeout=30,
-    )
-    response.raise_for_status()
-    return response.json()
+    return get_json(url, headers=_headers(), params=params, timeout=30)
+
+
+def get_fixtures_by_ids(fixture_ids):
+    """
+    API-Football acceptă până la 20 de id-uri per request (ids=1-2-3).
+    """
+    if not API_BASE_URL:
+        raise RuntimeError("FOOTBALL_API_BASE_URL is missing")
+    if not API_KEY:
+        raise RuntimeError("FOOTBALL_API_KEY is missing")
+
+    url = f"{API_BASE_URL}/fixtures"
+    params = {"ids": "-".join(str(i) for i in fixture_ids)}
+    return get_json(url, headers=_headers(), params=params, timeout=30)
+
+
+def get_leagues():
+    if not API_BASE_URL:
+        raise RuntimeError("FOOTBALL_API_BASE_URL is missing")
+    if not API_KEY:
+        raise RuntimeError("FOOTBALL_API_KEY is missing")
+
+    url = f"{API_BASE_URL}/leagues"
+    return get_json(url, headers=_headers(), timeout=30)
+
+
+def get_teams(league_id: str, season: int):
+    if not API_BASE_URL:
+        raise RuntimeError("FOOTBALL_API_BASE_URL is missing")
+    if not API_KEY:
+        raise RuntimeError("FOOTBALL_API_KEY is missing")
+
+    url = f"{API_BASE_URL}/teams"
+    params = {
+        "league": league_id,
+        "season": season,
+    }
+    return get_json(url, headers=_headers(), params=params, timeout=30)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.cache import redis_client
+from app.core.http_client import aclose_async_client, arequest, retry_after_seconds
+
+FOOTBALL_API_BASE_URL = os.getenv("FOOTBALL_API_BASE_URL", "https://v3.football.api-sports.io")
+FOOTBALL_API_KEY = os.getenv("FOOTBALL_API_KEY", "")
+FOOTBALL_API_HOST = os.getenv("FOOTBALL_API_HOST", "v3.football.api-sports.io")
+
+# cota planului API-Football (free: 10/min, 100/zi)
+FOOTBALL_API_PER_MINUTE = int(os.getenv("FOOTBALL_API_PER_MINUTE", "10"))
+FOOTBALL_API_PER_DAY = int(os.getenv("FOOTBALL_API_PER_DAY", "100"))
+# câte request-uri pot fi în zbor simultan (în limita cotei)
+FOOTBALL_API_CONCURRENCY = int(os.getenv("FOOTBALL_API_CONCURRENCY", "5"))
+# peste atât nu așteptăm un token (ex: cota zilnică epuizată) -> QuotaExhausted
+FOOTBALL_API_MAX_WAIT = float(os.getenv("FOOTBALL_API_MAX_WAIT", "120"))
+FOOTBALL_API_RETRIES = int(os.getenv("FOOTBALL_API_RETRIES", "3"))
+# contorul zilnic partajat (Redis) între rulări și workeri; cheia expiră după zi
+FOOTBALL_API_QUOTA_KEY_PREFIX = os.getenv("FOOTBALL_API_QUOTA_KEY_PREFIX", "football_api:quota")
+
+
+class QuotaExhausted(RuntimeError):
+    pass
+
+
+class FootballApiError(RuntimeError):
+    pass
+
+
+class _Bucket:
+    def __init__(self, capacity: int, period_seconds: float):
+        self.capacity = float(max(1, capacity))
+        self.rate = self.capacity / period_seconds  # tokens / secundă
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+# setează contorul la valoarea raportată de API doar dacă e mai mare (atomic)
+_RAISE_TO_SCRIPT = """
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+  redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return 0
+"""
+
+
+class DailyQuota:
+    """
+    Cota zilnică partajată: INCR pe o cheie per zi UTC, verificat înainte de fiecare
+    request, deci limita ține între rulările jobului și între workeri.
+    Fără Redis (sau la o eroare Redis) rămâne doar găleata zilnică din proces.
+    """
+
+    def __init__(self, per_day: int, client: Any = None, prefix: str = FOOTBALL_API_QUOTA_KEY_PREFIX):
+        self.per_day = max(1, per_day)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, now: datetime) -> str:
+        return f"{self.prefix}:{now.strftime('%Y-%m-%d')}"
+
+    @staticmethod
+    def _ttl(now: datetime) -> int:
+        # până la sfârșitul zilei UTC + o zi de rezervă pentru ceasuri decalate
+        midnight = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
+        return int((midnight - now).total_seconds()) + 86400
+
+    def take(self) -> Optional[bool]:
+        """
+        True dacă request-ul încape în cotă, False dacă e epuizată,
+        None dacă Redis nu e disponibil.
+        """
+        if self.client is None:
+            return None
+        now = datetime.now(timezone.utc)
+        key = self._key(now)
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, self._ttl(now))
+            used = int(pipe.execute()[0])
+        except Exception:
+            return None
+        if used > self.per_day:
+            return False
+        return True
+
+    def sync_used(self, remaining: float) -> None:
+        # API-ul raportează cât a rămas din cota contului (inclusiv apeluri din afara jobului)
+        if self.client is None:
+            return
+        now = datetime.now(timezone.utc)
+        used = max(0, self.per_day - int(remaining))
+        try:
+            self.client.eval(_RAISE_TO_SCRIPT, 1, self._key(now), used, self._ttl(now))
+        except Exception:
+            pass
+
+
+class TokenBucketLimiter:
+    """
+    Două găleți (pe minut și pe zi); un request consumă câte un token din ambele.
+    Găleata pe minut e per proces; cota zilnică e verificată și în DailyQuota
+    (Redis), partajată între rulări și workeri.
+    """
+
+    def __init__(
+        self,
+        per_minute: int,
+        per_day: int,
+        max_wait: float = FOOTBALL_API_MAX_WAIT,
+        daily_quota: Optional[DailyQuota] = None,
+    ):
+        self.minute = _Bucket(per_minute, 60.0)
+        self.day = _Bucket(per_day, 86400.0)
+        self.max_wait = max_wait
+        self.daily_quota = daily_quota
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.minute.refill(now)
+                self.day.refill(now)
+                wait = max(self.minute.wait_time(), self.day.wait_time())
+                if wait <= 0:
+                    if self.daily_quota is not None:
+                        allowed = await asyncio.to_thread(self.daily_quota.take)
+                        if allowed is False:
+                            raise QuotaExhausted("API-Football daily quota exhausted (shared counter)")
+                    self.minute.tokens -= 1.0
+                    self.day.tokens -= 1.0
+                    return
+                if wait > self.max_wait:
+                    raise QuotaExhausted(f"API-Football quota exhausted (next token in {wait:.0f}s)")
+                await asyncio.sleep(wait)
+
+    def sync_remaining(self, headers: httpx.Headers) -> None:
+        """
+        Aliniază gălețile la ce raportează API-ul (cota e partajată cu alte apeluri).
+        """
+        for bucket, name in (
+            (self.minute, "x-ratelimit-remaining"),
+            (self.day, "x-ratelimit-requests-remaining"),
+        ):
+            try:
+                remaining = float(headers[name])
+            except (KeyError, ValueError):
+                continue
+            bucket.tokens = min(bucket.tokens, remaining)
+            if bucket is self.day and self.daily_quota is not None:
+                self.daily_quota.sync_used(remaining)
+
+    def penalize(self, seconds: float) -> None:
+        # după un 429, niciun request nu pleacă până trece Retry-After
+        self.minute.tokens = min(self.minute.tokens, 1.0 - seconds * self.minute.rate)
+
+
+class FootballFetcher:
+    """
+    Client asincron API-Football: concurență limitată + token bucket + Retry-After,
+    peste clientul HTTP partajat (app.core.http_client).
+    Folosire: async with FootballFetcher() as f: await f.get("/fixtures", {...})
+    """
+
+    def __init__(
+        self,
+        *,
+        per_minute: int = FOOTBALL_API_PER_MINUTE,
+        per_day: int = FOOTBALL_API_PER_DAY,
+        concurrency: int = FOOTBALL_API_CONCURRENCY,
+        retries: int = FOOTBALL_API_RETRIES,
+    ):
+        if not FOOTBALL_API_KEY:
+            raise FootballApiError("FOOTBALL_API_KEY lipsește")
+        self.limiter = TokenBucketLimiter(per_minute, per_day, daily_quota=DailyQuota(per_day, redis_client))
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.retries = max(0, retries)
+        self.requests = 0
+        self.throttled = 0
+        self.base_url = FOOTBALL_API_BASE_URL.rstrip("/")
+        self.headers = {
+            "x-apisports-key": FOOTBALL_API_KEY,
+            "x-rapidapi-key": FOOTBALL_API_KEY,
+            "x-rapidapi-host": FOOTBALL_API_HOST,
+        }
+
+    async def __aenter__(self) -> "FootballFetcher":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        # clientul e per event loop; jobul îl închide înainte să se termine asyncio.run()
+        await aclose_async_client()
+
+    async def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        url = f"{self.base_url}/{path.lstrip('/')}"
+
+        for attempt in range(self.retries + 1):
+            async with self.semaphore:
+                await self.limiter.acquire()
+                self.requests += 1
+                # retry-urile pentru 429 trec prin limiter, nu prin backoff-ul clientului
+                resp = await arequest("GET", url, params=params, headers=self.headers, retries=0)
+            self.limiter.sync_remaining(resp.headers)
+
+            if resp.status_code == 429 and attempt < self.retries:
+                self.throttled += 1
+                delay = retry_after_seconds(resp.headers.get("retry-after"))
+                self.limiter.penalize(60.0 if delay is None else delay)
+                continue
+
+            if resp.status_code >= 400:
+                raise FootballApiError(f"Football API error {resp.status_code}: {resp.text[:200]}")
+
+            data = resp.json()
+            if not isinstance(data, dict):
+                raise FootballApiError("Răspuns invalid de la Football API")
+            return data
+
+        raise FootballApiError("Football API error 429: Too many requests")
+
+    async def next_fixtures_for_league(
+        self,
+        league_id: int,
+        season: int,
+        next_count: int = 10,
+        max_pages: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Următoarele meciuri NS ale ligii (max_pages pagini): prima pagină, apoi
+        (dacă mai trebuie) restul paginilor în paralel, după paging.total.
+        """
+        params = {
+            "league": league_id,
+            "season": season,
+            "status": "NS",
+            "from": datetime.now(timezone.utc).date().isoformat(),
+        }
+
+        first = await self.get("/fixtures", {**params, "page": 1})
+        fixtures: List[Dict[str, Any]] = list(first.get("response", []) or [])
+        if not fixtures or len(fixtures) >= next_count:
+            return fixtures[:next_count]
+
+        total_pages = int((first.get("paging") or {}).get("total") or 1)
+        pages = range(2, min(total_pages, max_pages) + 1)
+        rest = await asyncio.gather(*(self.get("/fixtures", {**params, "page": p}) for p in pages))
+        for payload in rest:
+            fixtures.extend(payload.get("response", []) or [])
+
+        return fixtures[:next_count]
+
+
+async def fetch_next_fixtures(
+    league_ids: List[int],
+    season: int,
+    next_count: int = 10,
+) -> Dict[int, Any]:
+    """
+    Toate ligile în paralel (în limita cotei). Rezultat: league_id -> listă de
+    fixtures sau excepția apărută pentru liga respectivă.
+    """
+    async with FootballFetcher() as fetcher:
+        results = await asyncio.gather(
+            *(fetcher.next_fixtures_for_league(lid, season, next_count) for lid in league_ids),
+            return_exceptions=True,
+        )
+    return dict(zip(league_ids, results))
@@ -1,8 +1,8 @@
 import os
-import httpx
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from app.core.http_client import aget_json
 from app.db import get_conn
 
 API_KEY = os.getenv("API_FOOTBALL_KEY")
@@ -25,10 +25,7 @@ async def ingest_upcoming(days: int = 7, league_provider_id: Optional[int] = Non
     if league_provider_id is not None:
         params["league"] = str(league_provider_id)
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(f"{BASE_URL}/fixtures", headers=headers, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    data = await aget_json(f"{BASE_URL}/fixtures", headers=headers, params=params, timeout=30)
 
     conn = get_conn()
     cur = conn.cursor()
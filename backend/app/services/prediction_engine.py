@@ -2,10 +2,23 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# o singură implementare Platt (fit + apply + serializare) pentru job-uri și API
+from app.services.calibration import BinaryCalibrator, PlattOVR
 
 MODEL_VERSION = "engine_pro_pp"
 
+MAX_GOALS = 10
+MAX_GOALS_HT = 6
+HT_GOALS_SHARE = 0.45
+TOP_SCORELINES = 7
+
+HTFT_KEYS = ("H/H", "H/D", "H/A", "D/H", "D/D", "D/A", "A/H", "A/D", "A/A")
+
 
 def _clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
@@ -15,52 +28,73 @@ def _clamp_p(p: float, eps: float = 1e-6) -> float:
     return max(eps, min(1.0 - eps, p))
 
 
-def _poisson_pmf(lam: float, k: int) -> float:
-    lam = max(0.0001, lam)
-    return math.exp(-lam) * (lam ** k) / math.factorial(k)
+@lru_cache(maxsize=None)
+def _factorials(max_goals: int) -> np.ndarray:
+    return np.array([math.factorial(k) for k in range(max_goals + 1)], dtype=float)
 
 
-def _score_matrix(lam_home: float, lam_away: float, max_goals: int = 10) -> List[List[float]]:
-    mat: List[List[float]] = []
-    for i in range(max_goals + 1):
-        row: List[float] = []
-        pi = _poisson_pmf(lam_home, i)
-        for j in range(max_goals + 1):
-            row.append(pi * _poisson_pmf(lam_away, j))
-        mat.append(row)
+def _poisson_pmf_batch(lam: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    Returnează matricea (N, max_goals + 1) cu P(X = k) pentru fiecare lambda.
+    """
+    lam = np.maximum(0.0001, np.asarray(lam, dtype=float))
+    k = np.arange(max_goals + 1)
+    return np.exp(-lam)[:, None] * (lam[:, None] ** k) / _factorials(max_goals)
+
 
-    s = sum(sum(r) for r in mat)
-    if s > 0:
-        for i in range(len(mat)):
-            for j in range(len(mat[i])):
-                mat[i][j] /= s
+def _score_matrix_batch(lam_home: np.ndarray, lam_away: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    Matricele de scor (N, G, G) normalizate, G = max_goals + 1.
+    """
+    mat = _poisson_pmf_batch(lam_home, max_goals)[:, :, None] * _poisson_pmf_batch(lam_away, max_goals)[:, None, :]
+    s = mat.sum(axis=(1, 2), keepdims=True)
+    np.divide(mat, s, out=mat, where=s > 0)
     return mat
 
 
-def _sum_region(mat: List[List[float]], cond) -> float:
-    s = 0.0
-    for i in range(len(mat)):
-        for j in range(len(mat[i])):
-            if cond(i, j):
-                s += mat[i][j]
-    return s
+@lru_cache(maxsize=None)
+def _region_masks(max_goals: int) -> np.ndarray:
+    """
+    Măști (G*G, 5) pentru regiunile matricei de scor, în ordinea:
+    1, X, 2, GG, U2.5. Un singur matmul dă toate piețele pentru N meciuri.
+    """
+    i, j = np.indices((max_goals + 1, max_goals + 1))
+    masks = np.stack(
+        [
+            i > j,
+            i == j,
+            i < j,
+            (i >= 1) & (j >= 1),
+            (i + j) <= 2,
+        ],
+        axis=-1,
+    )
+    return masks.reshape(-1, masks.shape[-1]).astype(float)
 
 
-def _top_scorelines(mat: List[List[float]], topn: int = 7) -> List[Dict[str, Any]]:
-    items: List[Tuple[float, int, int]] = []
-    for i in range(len(mat)):
-        for j in range(len(mat[i])):
-            items.append((mat[i][j], i, j))
-    items.sort(reverse=True, key=lambda t: t[0])
+def _region_probs(mat: np.ndarray) -> np.ndarray:
+    n, g, _ = mat.shape
+    return mat.reshape(n, g * g) @ _region_masks(g - 1)
 
-    out: List[Dict[str, Any]] = []
-    for p, i, j in items[:topn]:
+
+def _top_scorelines_batch(mat: np.ndarray, topn: int = 7) -> List[List[Dict[str, Any]]]:
+    n, g, _ = mat.shape
+    flat = mat.reshape(n, g * g)
+    # stable => la egalitate păstrează ordinea (i, j) ca sortarea Python
+    order = np.argsort(-flat, axis=1, kind="stable")[:, :topn]
+    top_p = np.take_along_axis(flat, order, axis=1)
+
+    out: List[List[Dict[str, Any]]] = []
+    for idx_row, p_row in zip(order.tolist(), top_p.tolist()):
         out.append(
-            {
-                "home_goals": i,
-                "away_goals": j,
-                "p": round(p, 6),
-            }
+            [
+                {
+                    "home_goals": idx // g,
+                    "away_goals": idx % g,
+                    "p": round(p, 6),
+                }
+                for idx, p in zip(idx_row, p_row)
+            ]
         )
     return out
 
@@ -90,6 +124,63 @@ class TeamStrength:
     defense: float
 
 
+class LeagueStrengthTable:
+    """
+    Agregate ponderate (goluri marcate / primite) pentru toate echipele dintr-o ligă.
+    Istoricul e parcurs o singură dată; lookup-urile ulterioare sunt O(1).
+
+    matches: meciurile ligii în ordine cronologică (cel mai recent ultimul).
+    """
+
+    def __init__(self, matches: List[Dict[str, Any]], half_life_matches: float = 20.0):
+        self.half_life_matches = half_life_matches
+        self._agg: Dict[int, List[float]] = {}
+
+        n = len(matches)
+        log2 = math.log(2)
+        half_life = max(1e-6, half_life_matches)
+        for idx, m in enumerate(matches):
+            try:
+                h = int(m["home_team_id"])
+                a = int(m["away_team_id"])
+            except Exception:
+                continue
+
+            hg = int(m.get("home_goals") or 0)
+            ag = int(m.get("away_goals") or 0)
+
+            age = (n - 1 - idx)
+            w = math.exp(-log2 * (age / half_life))
+
+            self._add(h, w, hg, ag)
+            if a != h:
+                self._add(a, w, ag, hg)
+
+    def _add(self, team_id: int, w: float, scored: int, conceded: int) -> None:
+        agg = self._agg.get(team_id)
+        if agg is None:
+            agg = self._agg[team_id] = [0.0, 0.0, 0.0]
+        agg[0] += w
+        agg[1] += w * scored
+        agg[2] += w * conceded
+
+    def __contains__(self, team_id: int) -> bool:
+        return team_id in self._agg
+
+    def __len__(self) -> int:
+        return len(self._agg)
+
+    def get(self, team_id: int) -> Tuple[float, float, float]:
+        """
+        Returnează (avg scored, avg conceded, suma ponderilor); (0, 0, 0) dacă echipa lipsește.
+        """
+        agg = self._agg.get(team_id)
+        if agg is None or agg[0] <= 0:
+            return 0.0, 0.0, 0.0
+        w_sum, s_scored, s_conceded = agg
+        return s_scored / w_sum, s_conceded / w_sum, w_sum
+
+
 def compute_team_strengths(
     matches: List[Dict[str, Any]],
     team_id: int,
@@ -100,40 +191,10 @@ def compute_team_strengths(
     - avg goals scored ponderat
     - avg goals conceded ponderat
     - suma ponderilor
-    """
-    w_sum = 0.0
-    s_scored = 0.0
-    s_conceded = 0.0
-
-    n = len(matches)
-    for idx, m in enumerate(matches):
-        age = (n - 1 - idx)
-        w = math.exp(-math.log(2) * (age / max(1e-6, half_life_matches)))
-
-        try:
-            h = int(m["home_team_id"])
-            a = int(m["away_team_id"])
-        except Exception:
-            continue
 
-        hg = int(m.get("home_goals") or 0)
-        ag = int(m.get("away_goals") or 0)
-
-        if team_id == h:
-            scored, conceded = hg, ag
-        elif team_id == a:
-            scored, conceded = ag, hg
-        else:
-            continue
-
-        w_sum += w
-        s_scored += w * scored
-        s_conceded += w * conceded
-
-    if w_sum <= 0:
-        return 0.0, 0.0, 0.0
-
-    return s_scored / w_sum, s_conceded / w_sum, w_sum
+    Pentru mai multe echipe din aceeași ligă folosește LeagueStrengthTable direct.
+    """
+    return LeagueStrengthTable(matches, half_life_matches=half_life_matches).get(team_id)
 
 
 def strengths_from_form(
@@ -187,121 +248,77 @@ def build_expected_goals(
     return lam_home, lam_away, inputs
 
 
-def predict_markets_raw(lam_home: float, lam_away: float) -> Dict[str, Any]:
-    mat = _score_matrix(lam_home, lam_away, max_goals=10)
-
-    p_home = _sum_region(mat, lambda i, j: i > j)
-    p_draw = _sum_region(mat, lambda i, j: i == j)
-    p_away = _sum_region(mat, lambda i, j: i < j)
-
-    p_gg = _sum_region(mat, lambda i, j: i >= 1 and j >= 1)
-    p_u25 = _sum_region(mat, lambda i, j: (i + j) <= 2)
-    p_o25 = 1.0 - p_u25
-
-    p_1x = p_home + p_draw
-    p_x2 = p_draw + p_away
-    p_12 = p_home + p_away
-
-    lam_h_ht = lam_home * 0.45
-    lam_a_ht = lam_away * 0.45
-    mat_ht = _score_matrix(lam_h_ht, lam_a_ht, max_goals=6)
-
-    p_ht_h = _sum_region(mat_ht, lambda i, j: i > j)
-    p_ht_d = _sum_region(mat_ht, lambda i, j: i == j)
-    p_ht_a = _sum_region(mat_ht, lambda i, j: i < j)
-
-    htft = {
-        "H/H": p_ht_h * p_home,
-        "H/D": p_ht_h * p_draw,
-        "H/A": p_ht_h * p_away,
-        "D/H": p_ht_d * p_home,
-        "D/D": p_ht_d * p_draw,
-        "D/A": p_ht_d * p_away,
-        "A/H": p_ht_a * p_home,
-        "A/D": p_ht_a * p_draw,
-        "A/A": p_ht_a * p_away,
-    }
-
-    s = sum(htft.values())
-    if s > 0:
-        for k in list(htft.keys()):
-            htft[k] /= s
-
-    return {
-        "1x2": {
-            "1": p_home,
-            "X": p_draw,
-            "2": p_away,
-        },
-        "double_chance": {
-            "1X": p_1x,
-            "X2": p_x2,
-            "12": p_12,
-        },
-        "gg": {
-            "GG": p_gg,
-            "NG": 1.0 - p_gg,
-        },
-        "ou25": {
-            "O2.5": p_o25,
-            "U2.5": p_u25,
-        },
-        "ht": {
-            "HT1": p_ht_h,
-            "HTX": p_ht_d,
-            "HT2": p_ht_a,
-        },
-        "htft": htft,
-        "top_scorelines": _top_scorelines(mat, topn=7),
-    }
-
-
-class PlattBinary:
+def predict_markets_batch(
+    lam_home: Sequence[float],
+    lam_away: Sequence[float],
+) -> List[Dict[str, Any]]:
     """
-    Calibrare simplă pentru piețe binare.
-    Momentan fallback liniar-identitate dacă nu ai parametri antrenați.
+    Scorează N meciuri dintr-o singură trecere vectorizată.
+    Întoarce câte un dict per meci, cu aceeași formă ca predict_markets_raw.
     """
+    lam_h = np.asarray(lam_home, dtype=float).reshape(-1)
+    lam_a = np.asarray(lam_away, dtype=float).reshape(-1)
+    if lam_h.shape != lam_a.shape:
+        raise ValueError("lam_home și lam_away trebuie să aibă aceeași lungime")
+    if lam_h.size == 0:
+        return []
 
-    def __init__(self, a: float = 1.0, b: float = 0.0):
-        self.a = a
-        self.b = b
+    mat = _score_matrix_batch(lam_h, lam_a, MAX_GOALS)
+    ft = _region_probs(mat)
 
-    def apply(self, p: float) -> float:
-        p = _clamp_p(float(p))
-        logit = math.log(p / (1.0 - p))
-        z = self.a * logit + self.b
-        out = 1.0 / (1.0 + math.exp(-z))
-        return _clamp_p(out)
+    mat_ht = _score_matrix_batch(lam_h * HT_GOALS_SHARE, lam_a * HT_GOALS_SHARE, MAX_GOALS_HT)
+    ht = _region_probs(mat_ht)[:, :3]
 
+    # HT/FT ca produs HT (1/X/2) x FT (1/X/2), renormalizat
+    htft = (ht[:, :, None] * ft[:, None, :3]).reshape(-1, 9)
+    s = htft.sum(axis=1, keepdims=True)
+    np.divide(htft, s, out=htft, where=s > 0)
 
-class PlattOVR:
-    """
-    Calibrare multiclasă one-vs-rest.
-    primește dict cu probabilități și întoarce dict recalibrat.
-    """
+    top = _top_scorelines_batch(mat, topn=TOP_SCORELINES)
 
-    def __init__(self, class_params: Optional[Dict[str, Tuple[float, float]]] = None):
-        self.class_params = class_params or {}
+    out: List[Dict[str, Any]] = []
+    for n, (p_home, p_draw, p_away, p_gg, p_u25) in enumerate(ft.tolist()):
+        p_ht_h, p_ht_d, p_ht_a = ht[n].tolist()
+        out.append(
+            {
+                "1x2": {
+                    "1": p_home,
+                    "X": p_draw,
+                    "2": p_away,
+                },
+                "double_chance": {
+                    "1X": p_home + p_draw,
+                    "X2": p_draw + p_away,
+                    "12": p_home + p_away,
+                },
+                "gg": {
+                    "GG": p_gg,
+                    "NG": 1.0 - p_gg,
+                },
+                "ou25": {
+                    "O2.5": 1.0 - p_u25,
+                    "U2.5": p_u25,
+                },
+                "ht": {
+                    "HT1": p_ht_h,
+                    "HTX": p_ht_d,
+                    "HT2": p_ht_a,
+                },
+                "htft": dict(zip(HTFT_KEYS, htft[n].tolist())),
+                "top_scorelines": top[n],
+            }
+        )
+    return out
 
-    def apply_probs(self, probs: Dict[str, float]) -> Dict[str, float]:
-        out: Dict[str, float] = {}
-        for k, v in probs.items():
-            a, b = self.class_params.get(k, (1.0, 0.0))
-            p = _clamp_p(float(v))
-            logit = math.log(p / (1.0 - p))
-            z = a * logit + b
-            out[k] = _clamp_p(1.0 / (1.0 + math.exp(-z)))
 
-        s = sum(out.values())
-        if s > 0:
-            out = {k: _clamp_p(v / s) for k, v in out.items()}
-        return out
+def predict_markets_raw(lam_home: float, lam_away: float) -> Dict[str, Any]:
+    return predict_markets_batch([lam_home], [lam_away])[0]
 
 
 def _apply_calibration(
     probs: Dict[str, Any],
     *,
-    cal_binary: Optional[Dict[str, PlattBinary]] = None,
+    cal_binary: Optional[Dict[str, BinaryCalibrator]] = None,
     cal_ovr: Optional[PlattOVR] = None,
 ) -> Dict[str, Any]:
     """
@@ -334,34 +351,30 @@ def _apply_calibration(
     return probs
 
 
-def compute_prediction_for_fixture(
+def expected_goals_for_fixture(
     fixture: Dict[str, Any],
     past_matches: List[Dict[str, Any]],
     *,
     league_avg_goals: float,
     league_scored_avg: float,
     home_adv: float = 1.10,
-    cal_binary: Optional[Dict[str, PlattBinary]] = None,
-    cal_ovr: Optional[PlattOVR] = None,
-) -> Dict[str, Any]:
+    strengths: Optional[LeagueStrengthTable] = None,
+) -> Tuple[float, float, Dict[str, Any]]:
     """
     fixture trebuie să conțină:
     - home_team_id
     - away_team_id
+
+    strengths: tabela precalculată pentru past_matches (refolosită între meciurile ligii).
     """
     home_id = int(fixture["home_team_id"])
     away_id = int(fixture["away_team_id"])
 
-    h_sc, h_conc, h_w = compute_team_strengths(
-        past_matches,
-        home_id,
-        half_life_matches=20.0,
-    )
-    a_sc, a_conc, a_w = compute_team_strengths(
-        past_matches,
-        away_id,
-        half_life_matches=20.0,
-    )
+    if strengths is None:
+        strengths = LeagueStrengthTable(past_matches, half_life_matches=20.0)
+
+    h_sc, h_conc, h_w = strengths.get(home_id)
+    a_sc, a_conc, a_w = strengths.get(away_id)
 
     if h_w <= 0:
         h_sc, h_conc = league_scored_avg, league_scored_avg
@@ -371,7 +384,7 @@ def compute_prediction_for_fixture(
     home_strength = strengths_from_form(h_sc, h_conc, league_scored_avg)
     away_strength = strengths_from_form(a_sc, a_conc, league_scored_avg)
 
-    lam_home, lam_away, inputs = build_expected_goals(
+    return build_expected_goals(
         league_avg_goals=league_avg_goals,
         home_strength=home_strength,
         away_strength=away_strength,
@@ -379,7 +392,14 @@ def compute_prediction_for_fixture(
         shrink=0.65,
     )
 
-    probs = predict_markets_raw(lam_home, lam_away)
+
+def _finalize_prediction(
+    probs: Dict[str, Any],
+    inputs: Dict[str, Any],
+    *,
+    cal_binary: Optional[Dict[str, BinaryCalibrator]] = None,
+    cal_ovr: Optional[PlattOVR] = None,
+) -> Dict[str, Any]:
     probs = _apply_calibration(
         probs,
         cal_binary=cal_binary,
@@ -410,3 +430,84 @@ def compute_prediction_for_fixture(
         "picks": picks,
         "metrics": metrics,
     }
+
+
+def predictions_from_expected_goals(
+    expected: Sequence[Tuple[float, float, Dict[str, Any]]],
+    *,
+    cal_binary: Optional[Dict[str, BinaryCalibrator]] = None,
+    cal_ovr: Optional[PlattOVR] = None,
+    calibrations: Optional[Sequence[Tuple[Dict[str, BinaryCalibrator], Optional[PlattOVR]]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    expected: listă de (lambda_home, lambda_away, inputs), ca din build_expected_goals.
+    Toate piețele se calculează într-un singur batch.
+    calibrations: (cal_binary, cal_ovr) per meci (ex: per ligă); altfel aceeași pentru toate.
+    """
+    if not expected:
+        return []
+
+    probs_list = predict_markets_batch(
+        [e[0] for e in expected],
+        [e[1] for e in expected],
+    )
+    if calibrations is None:
+        calibrations = [(cal_binary, cal_ovr)] * len(expected)
+    return [
+        _finalize_prediction(probs, inputs, cal_binary=cb, cal_ovr=co)
+        for probs, (_, _, inputs), (cb, co) in zip(probs_list, expected, calibrations)
+    ]
+
+
+def compute_predictions_for_fixtures(
+    fixtures: Sequence[Dict[str, Any]],
+    past_matches: List[Dict[str, Any]],
+    *,
+    league_avg_goals: float,
+    league_scored_avg: float,
+    home_adv: float = 1.10,
+    cal_binary: Optional[Dict[str, BinaryCalibrator]] = None,
+    cal_ovr: Optional[PlattOVR] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Varianta batch pentru mai multe meciuri din aceeași ligă (același istoric).
+    """
+    strengths = LeagueStrengthTable(past_matches, half_life_matches=20.0)
+    expected = [
+        expected_goals_for_fixture(
+            fx,
+            past_matches,
+            league_avg_goals=league_avg_goals,
+            league_scored_avg=league_scored_avg,
+            home_adv=home_adv,
+            strengths=strengths,
+        )
+        for fx in fixtures
+    ]
+    return predictions_from_expected_goals(expected, cal_binary=cal_binary, cal_ovr=cal_ovr)
+
+
+def compute_prediction_for_fixture(
+    fixture: Dict[str, Any],
+    past_matches: List[Dict[str, Any]],
+    *,
+    league_avg_goals: float,
+    league_scored_avg: float,
+    home_adv: float = 1.10,
+    cal_binary: Optional[Dict[str, BinaryCalibrator]] = None,
+    cal_ovr: Optional[PlattOVR] = None,
+) -> Dict[str, Any]:
+    """
+    fixture trebuie să conțină:
+    - home_team_id
+    - away_team_id
+    """
+    return compute_predictions_for_fixtures(
+        [fixture],
+        past_matches,
+        league_avg_goals=league_avg_goals,
+        league_scored_avg=league_scored_avg,
+        home_adv=home_adv,
+        cal_binary=cal_binary,
+        cal_ovr=cal_ovr,
+    )[0]
@@ -1,124 +1,280 @@
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from psycopg2.extras import execute_values
+
 from app.db import get_conn
 
+# coloanele calculate (fără cheia team_id, league_id, season_id și updated_at)
+_STAT_COLUMNS = [
+    "matches_played",
+    "wins",
+    "draws",
+    "losses",
+    "goals_for",
+    "goals_against",
+    "home_matches",
+    "home_wins",
+    "home_draws",
+    "home_losses",
+    "home_goals_for",
+    "home_goals_against",
+    "away_matches",
+    "away_wins",
+    "away_draws",
+    "away_losses",
+    "away_goals_for",
+    "away_goals_against",
+    "btts_hits",
+    "over25_hits",
+    "clean_sheets",
+    "failed_to_score",
+    "form_last5_points",
+    "form_last5_wins",
+    "form_last5_draws",
+    "form_last5_losses",
+    "form_last5_goals_for",
+    "form_last5_goals_against",
+]
+
+_GROUP_MATCH = """
+    {a}.team_id = {b}.team_id
+    and {a}.league_id is not distinct from {b}.league_id
+    and {a}.season_id is not distinct from {b}.season_id
+"""
+
+# agregarea per (team, league, season); {scope} restrânge meciurile la grupurile atinse.
+# rn = 1 e cel mai recent meci al echipei în grup -> form_last5_* din rn <= 5
+_AGGREGATE_SQL = """
+select
+    t.team_id,
+    t.league_id,
+    t.season_id,
+    count(*) as matches_played,
+    sum(case when t.points = 3 then 1 else 0 end) as wins,
+    sum(case when t.points = 1 then 1 else 0 end) as draws,
+    sum(case when t.points = 0 then 1 else 0 end) as losses,
+    sum(t.gf) as goals_for,
+    sum(t.ga) as goals_against,
+
+    sum(case when t.is_home then 1 else 0 end) as home_matches,
+    sum(case when t.is_home and t.points = 3 then 1 else 0 end) as home_wins,
+    sum(case when t.is_home and t.points = 1 then 1 else 0 end) as home_draws,
+    sum(case when t.is_home and t.points = 0 then 1 else 0 end) as home_losses,
+    sum(case when t.is_home then t.gf else 0 end) as home_goals_for,
+    sum(case when t.is_home then t.ga else 0 end) as home_goals_against,
+
+    sum(case when not t.is_home then 1 else 0 end) as away_matches,
+    sum(case when not t.is_home and t.points = 3 then 1 else 0 end) as away_wins,
+    sum(case when not t.is_home and t.points = 1 then 1 else 0 end) as away_draws,
+    sum(case when not t.is_home and t.points = 0 then 1 else 0 end) as away_losses,
+    sum(case when not t.is_home then t.gf else 0 end) as away_goals_for,
+    sum(case when not t.is_home then t.ga else 0 end) as away_goals_against,
+
+    sum(case when t.gf > 0 and t.ga > 0 then 1 else 0 end) as btts_hits,
+    sum(case when t.gf + t.ga > 2 then 1 else 0 end) as over25_hits,
+    sum(case when t.ga = 0 then 1 else 0 end) as clean_sheets,
+    sum(case when t.gf = 0 then 1 else 0 end) as failed_to_score,
+
+    sum(case when t.rn <= 5 then t.points else 0 end) as form_last5_points,
+    sum(case when t.rn <= 5 and t.points = 3 then 1 else 0 end) as form_last5_wins,
+    sum(case when t.rn <= 5 and t.points = 1 then 1 else 0 end) as form_last5_draws,
+    sum(case when t.rn <= 5 and t.points = 0 then 1 else 0 end) as form_last5_losses,
+    sum(case when t.rn <= 5 then t.gf else 0 end) as form_last5_goals_for,
+    sum(case when t.rn <= 5 then t.ga else 0 end) as form_last5_goals_against
+
+from (
+
+    select
+        m.*,
+        row_number() over (
+            partition by m.team_id, m.league_id, m.season_id
+            order by m.kickoff_at desc nulls last, m.fixture_id desc
+        ) as rn
+
+    from (
+
+        select
+            f.id as fixture_id,
+            f.kickoff_at,
+            f.home_team_id as team_id,
+            f.league_id,
+            f.season_id,
+            true as is_home,
+            f.home_goals as gf,
+            f.away_goals as ga,
+            case
+                when f.home_goals > f.away_goals then 3
+                when f.home_goals = f.away_goals then 1
+                else 0
+            end as points
+
+        from fixtures f
+        where f.home_goals is not null
+        {home_scope}
+
+        union all
+
+        select
+            f.id,
+            f.kickoff_at,
+            f.away_team_id,
+            f.league_id,
+            f.season_id,
+            false,
+            f.away_goals,
+            f.home_goals,
+            case
+                when f.away_goals > f.home_goals then 3
+                when f.away_goals = f.home_goals then 1
+                else 0
+            end
+
+        from fixtures f
+        where f.home_goals is not null
+        {away_scope}
+
+    ) m
+
+) t
+
+group by
+    t.team_id,
+    t.league_id,
+    t.season_id
+"""
+
+_SCOPE = """
+        and exists (
+            select 1 from _stats_groups g
+            where g.team_id = f.{side}_team_id
+              and g.league_id is not distinct from f.league_id
+              and g.season_id is not distinct from f.season_id
+        )
+"""
+
 
-def rebuild_team_stats():
+def _create_groups(cur, fixture_ids, extra_groups: Iterable[Sequence[Any]] = ()) -> int:
+    """
+    Grupurile (team, league, season) atinse de meciurile modificate: ambele echipe,
+    plus extra_groups (grupurile vechi ale meciurilor mutate, din sync_fixtures).
+    """
+    cur.execute(
+        """
+        create temp table if not exists _stats_groups
+        on commit drop
+        as
+        select home_team_id as team_id, league_id, season_id
+        from fixtures where id = any(%(ids)s::uuid[]) and home_team_id is not null
+        union
+        select away_team_id, league_id, season_id
+        from fixtures where id = any(%(ids)s::uuid[]) and away_team_id is not null
+        """,
+        {"ids": list(fixture_ids)},
+    )
+
+    extra = [tuple(g) for g in extra_groups]
+    if extra:
+        # tipurile coloanelor vin din fixtures; un grup duplicat nu schimbă scope-ul
+        execute_values(cur, "insert into _stats_groups (team_id, league_id, season_id) values %s", extra)
+
+    cur.execute("select count(*) from (select distinct * from _stats_groups) g")
+    return cur.fetchone()[0]
+
+
+def _merge_stats(cur, scoped: bool) -> Dict[str, int]:
+    """
+    Agregare în _stage_team_stats, apoi update pe loc doar unde valorile diferă,
+    insert pentru grupurile noi și delete pentru grupurile rămase fără meciuri.
+    Tabela nu e golită niciodată: cititorii văd datele vechi până la commit.
+    """
+    home_scope = _SCOPE.format(side="home") if scoped else ""
+    away_scope = _SCOPE.format(side="away") if scoped else ""
+
+    cur.execute(
+        "create temp table if not exists _stage_team_stats on commit drop as "
+        + _AGGREGATE_SQL.format(home_scope=home_scope, away_scope=away_scope)
+    )
+
+    cols = ", ".join(_STAT_COLUMNS)
+    staged = ", ".join(f"s.{c}" for c in _STAT_COLUMNS)
+
+    cur.execute(
+        f"""
+        update team_stats ts
+        set ({cols}, updated_at) = ({staged}, now())
+        from _stage_team_stats s
+        where {_GROUP_MATCH.format(a="ts", b="s")}
+          and ({", ".join(f"ts.{c}" for c in _STAT_COLUMNS)}) is distinct from ({staged})
+        """
+    )
+    updated = cur.rowcount
+
+    cur.execute(
+        f"""
+        insert into team_stats (team_id, league_id, season_id, {cols}, updated_at)
+        select s.team_id, s.league_id, s.season_id, {staged}, now()
+        from _stage_team_stats s
+        where not exists (
+            select 1 from team_stats ts
+            where {_GROUP_MATCH.format(a="ts", b="s")}
+        )
+        """
+    )
+    inserted = cur.rowcount
+
+    group_scope = (
+        f"and exists (select 1 from _stats_groups g where {_GROUP_MATCH.format(a='g', b='ts')})"
+        if scoped
+        else ""
+    )
+    cur.execute(
+        f"""
+        delete from team_stats ts
+        where not exists (
+            select 1 from _stage_team_stats s
+            where {_GROUP_MATCH.format(a="s", b="ts")}
+        )
+        {group_scope}
+        """
+    )
+    deleted = cur.rowcount
+
+    return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+
+def rebuild_team_stats() -> Dict[str, Any]:
 
     with get_conn() as conn:
         with conn.cursor() as cur:
+            result = _merge_stats(cur, scoped=False)
+
+        conn.commit()
+
+    return {"mode": "full", **result}
+
 
-            cur.execute("delete from team_stats")
-
-            cur.execute("""
-            insert into team_stats (
-                team_id,
-                league_id,
-                season_id,
-                matches_played,
-                wins,
-                draws,
-                losses,
-                goals_for,
-                goals_against,
-                home_matches,
-                home_wins,
-                home_draws,
-                home_losses,
-                home_goals_for,
-                home_goals_against,
-                away_matches,
-                away_wins,
-                away_draws,
-                away_losses,
-                away_goals_for,
-                away_goals_against,
-                btts_hits,
-                over25_hits,
-                clean_sheets,
-                failed_to_score,
-                form_last5_points,
-                form_last5_wins,
-                form_last5_draws,
-                form_last5_losses,
-                form_last5_goals_for,
-                form_last5_goals_against,
-                updated_at
-            )
-            select
-                t.team_id,
-                t.league_id,
-                t.season_id,
-                count(*) as matches_played,
-                sum(case when t.points = 3 then 1 else 0 end) as wins,
-                sum(case when t.points = 1 then 1 else 0 end) as draws,
-                sum(case when t.points = 0 then 1 else 0 end) as losses,
-                sum(t.gf),
-                sum(t.ga),
-
-                sum(case when t.is_home then 1 else 0 end),
-                sum(case when t.is_home and t.points = 3 then 1 else 0 end),
-                sum(case when t.is_home and t.points = 1 then 1 else 0 end),
-                sum(case when t.is_home and t.points = 0 then 1 else 0 end),
-                sum(case when t.is_home then t.gf else 0 end),
-                sum(case when t.is_home then t.ga else 0 end),
-
-                sum(case when not t.is_home then 1 else 0 end),
-                sum(case when not t.is_home and t.points = 3 then 1 else 0 end),
-                sum(case when not t.is_home and t.points = 1 then 1 else 0 end),
-                sum(case when not t.is_home and t.points = 0 then 1 else 0 end),
-                sum(case when not t.is_home then t.gf else 0 end),
-                sum(case when not t.is_home then t.ga else 0 end),
-
-                sum(case when t.gf > 0 and t.ga > 0 then 1 else 0 end),
-                sum(case when t.gf + t.ga > 2 then 1 else 0 end),
-                sum(case when t.ga = 0 then 1 else 0 end),
-                sum(case when t.gf = 0 then 1 else 0 end),
-
-                0,0,0,0,0,0,
-
-                now()
-
-            from (
-
-                select
-                    f.home_team_id as team_id,
-                    f.league_id,
-                    f.season_id,
-                    true as is_home,
-                    f.home_goals as gf,
-                    f.away_goals as ga,
-                    case
-                        when f.home_goals > f.away_goals then 3
-                        when f.home_goals = f.away_goals then 1
-                        else 0
-                    end as points
-
-                from fixtures f
-                where f.home_goals is not null
-
-                union all
-
-                select
-                    f.away_team_id,
-                    f.league_id,
-                    f.season_id,
-                    false,
-                    f.away_goals,
-                    f.home_goals,
-                    case
-                        when f.away_goals > f.home_goals then 3
-                        when f.away_goals = f.home_goals then 1
-                        else 0
-                    end
-
-                from fixtures f
-                where f.home_goals is not null
-
-            ) t
-
-            group by
-                t.team_id,
-                t.league_id,
-                t.season_id
-            """)
+def update_team_stats(
+    changed_fixture_ids: Optional[Iterable[Any]] = None,
+    extra_groups: Optional[Iterable[Sequence[Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Recalculează doar grupurile (team, league, season) ale meciurilor modificate
+    și extra_groups (team, league, season) -> ex: grupul vechi al unui meci mutat.
+    None -> rebuild complet; listă goală -> nimic de făcut.
+    """
+    if changed_fixture_ids is None:
+        return rebuild_team_stats()
+
+    changed = [str(x) for x in changed_fixture_ids]
+    extra = [tuple(g) for g in (extra_groups or [])]
+    if not changed and not extra:
+        return {"mode": "incremental", "groups": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            groups = _create_groups(cur, changed, extra)
+            result = _merge_stats(cur, scoped=True)
 
         conn.commit()
+
+    return {"mode": "incremental", "groups": groups, **result}
@@ -1,4 +1,5 @@
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Tuple
 
 
 def today_str() -> str:
@@ -7,3 +8,14 @@ def today_str() -> str:
 
 def days_from_today(days: int) -> str:
     return (date.today() + timedelta(days=days)).isoformat()
+
+
+def utc_day_range(frm: date, to: date) -> Tuple[datetime, datetime]:
+    """
+    Zilele [frm, to] inclusiv ca interval semi-deschis de timestamptz UTC:
+    kickoff_at >= start AND kickoff_at < end (folosește indexul pe kickoff_at,
+    spre deosebire de kickoff_at::date).
+    """
+    start = datetime.combine(frm, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, end
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from app.core.cache import build_cache_key, tiered_cache_get, tiered_cache_set
+
+COUNT_CACHE_TTL_SECONDS = 300
+
+
+def encode_cursor(kickoff_at: Any, row_id: Any) -> str:
+    """
+    Cursor opac pentru paginare keyset pe (kickoff_at, id).
+    """
+    k = kickoff_at.isoformat() if hasattr(kickoff_at, "isoformat") else str(kickoff_at)
+    raw = json.dumps([k, str(row_id)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Inversul lui encode_cursor; ValueError dacă cursorul e invalid.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        k, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(k), str(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def keyset_clause(order: str, alias: str = "f") -> str:
+    """
+    Condiția WHERE pentru rândurile de după cursor; parametri: cursor_kickoff, cursor_id.
+    Trebuie folosită cu ORDER BY {alias}.kickoff_at, {alias}.id în aceeași direcție.
+    """
+    op = ">" if order == "asc" else "<"
+    return f"({alias}.kickoff_at, {alias}.id) {op} (%(cursor_kickoff)s::timestamptz, %(cursor_id)s::uuid)"
+
+
+def cached_count(cur, sql: str, params: Dict[str, Any], *, key_prefix: str, ttl_seconds: int = COUNT_CACHE_TTL_SECONDS) -> int:
+    """
+    COUNT(*) memorat în cache pe combinația de filtre, ca paginile să nu-l reexecute.
+    """
+    key = build_cache_key(key_prefix, {k: str(v) for k, v in params.items()})
+    cached = tiered_cache_get(key)
+    if cached is not None:
+        return int(cached)
+
+    cur.execute(sql, params)
+    total = int(cur.fetchone()[0])
+    tiered_cache_set(key, total, ttl_seconds=ttl_seconds)
+    return total
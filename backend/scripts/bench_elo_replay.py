@@ -0,0 +1,148 @@
+"""
+Benchmark: replay-ul Elo vechi (SELECT + UPDATE per meci, câte un round trip
+pe statement) vs replay-ul în memorie din elo_service._replay, pe aceleași meciuri.
+
+Tabela team_elo e simulată în memorie: fiecare statement așteaptă --rtt-ms, iar
+valoarea scrisă trece prin tipul coloanei elo_rating, ca în Postgres. Rating-urile
+finale trebuie să fie identice (replay-ul nou rotunjește prin _rating_quantizer).
+
+    cd backend && python scripts/bench_elo_replay.py --matches 6000 --teams 100 --rtt-ms 0.5
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.elo_service import BASE_ELO, K, _rating_quantizer, _replay  # noqa: E402
+
+# (data_type, numeric_scale) din information_schema -> cum stochează Postgres valoarea
+COLUMN_TYPES: Dict[str, Tuple[str, Any]] = {
+    "float8": ("double precision", None),
+    "real": ("real", None),
+    "numeric(8,2)": ("numeric", 2),
+}
+
+
+def _store(data_type: str, scale: Any) -> Callable[[float], Any]:
+    """
+    Ce citește înapoi replay-ul vechi după UPDATE: psycopg2 trimite repr(float),
+    coloana îl convertește la tipul ei.
+    """
+    if data_type == "real":
+        return lambda x: struct.unpack("f", struct.pack("f", x))[0]
+    if data_type == "numeric":
+        step = Decimal(1).scaleb(-scale)
+        return lambda x: Decimal(repr(float(x))).quantize(step, rounding=ROUND_HALF_UP)
+    return float
+
+
+class _ColumnTypeCursor:
+    """Răspunde doar la query-ul din _rating_quantizer."""
+
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return self.row
+
+
+def _make_matches(n_matches: int, n_teams: int, seed: int) -> Tuple[List[int], List[tuple]]:
+    rng = random.Random(seed)
+    teams = list(range(1, n_teams + 1))
+    matches = []
+    for i in range(n_matches):
+        home, away = rng.sample(teams, 2)
+        # (fixture_id, kickoff_at, home, away, hg, ag), deja în ordine cronologică
+        matches.append((i, i // 3, home, away, rng.randint(0, 4), rng.randint(0, 4)))
+    return teams, matches
+
+
+def _legacy_replay(teams, matches, store, rtt: float) -> Tuple[Dict[int, Any], int]:
+    """
+    Bucla veche din rebuild_team_elo: 2 SELECT + 2 UPDATE per meci.
+    Returnează (team_elo, round trips).
+    """
+    table: Dict[int, Any] = {t: store(float(BASE_ELO)) for t in teams}
+    round_trips = 0
+
+    def statement():
+        nonlocal round_trips
+        round_trips += 1
+        if rtt:
+            time.sleep(rtt)
+
+    for _, _, home_id, away_id, hg, ag in matches:
+        statement()
+        home_elo = float(table[home_id])
+        statement()
+        away_elo = float(table[away_id])
+
+        expected_home = 1 / (1 + 10 ** ((away_elo - home_elo) / 400))
+        expected_away = 1 / (1 + 10 ** ((home_elo - away_elo) / 400))
+
+        if hg > ag:
+            score_home, score_away = 1, 0
+        elif hg < ag:
+            score_home, score_away = 0, 1
+        else:
+            score_home, score_away = 0.5, 0.5
+
+        statement()
+        table[home_id] = store(home_elo + K * (score_home - expected_home))
+        statement()
+        table[away_id] = store(away_elo + K * (score_away - expected_away))
+
+    return table, round_trips
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=6000)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=0.2, help="latența simulată per statement")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    teams, matches = _make_matches(args.matches, args.teams, args.seed)
+    rtt = args.rtt_ms / 1000.0
+    ok = True
+
+    for label, (data_type, scale) in COLUMN_TYPES.items():
+        store = _store(data_type, scale)
+
+        t0 = time.perf_counter()
+        legacy, round_trips = _legacy_replay(teams, matches, store, rtt)
+        legacy_ms = (time.perf_counter() - t0) * 1000
+
+        quantize = _rating_quantizer(_ColumnTypeCursor((data_type, scale)))
+        t0 = time.perf_counter()
+        ratings = _replay(matches, {t: quantize(float(BASE_ELO)) for t in teams}, quantize)
+        replay_ms = (time.perf_counter() - t0) * 1000
+
+        # ce ar scrie rebuild-ul nou în coloană
+        stored = {t: store(r) for t, r in ratings.items()}
+        identical = stored == legacy
+        ok = ok and identical
+        max_diff = max(abs(float(stored[t]) - float(legacy[t])) for t in teams)
+
+        print(
+            f"{label:13s} legacy {legacy_ms:9.1f} ms ({round_trips} round trips) | "
+            f"in-memory {replay_ms:7.1f} ms | x{legacy_ms / max(replay_ms, 1e-9):.0f} | "
+            f"identical={identical} max_diff={max_diff}"
+        )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
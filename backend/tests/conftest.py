@@ -0,0 +1,5 @@
+import os
+import sys
+
+# testele importă pachetul app din backend/, indiferent de unde rulează pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,194 @@
+"""
+Regresie pe planurile query-urilor fierbinți din fixtures: fiecare trebuie să
+poată folosi indexurile din db_init._HOT_INDEXES (fără Seq Scan pe fixtures).
+
+Query-urile nu sunt copiate aici: rulăm codul din routes printr-un cursor care
+face EXPLAIN pe exact SQL-ul și parametrii primiți, apoi execută query-ul.
+
+Rulează doar cu DATABASE_URL setat (o bază cu schema și indexurile aplicate):
+
+    DATABASE_URL=postgres://... python -m pytest tests/test_query_plans.py
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Set
+
+import pytest
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="DATABASE_URL nu e setat")
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []) or []:
+        yield from _nodes(child)
+
+
+class _ExplainCursor:
+    """
+    Cursorul real, dar fiecare execute() salvează întâi planul (EXPLAIN FORMAT JSON)
+    al aceluiași SQL cu aceiași parametri.
+    """
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.plans: List[List[Dict[str, Any]]] = []
+
+    def execute(self, sql, params=None):
+        self._cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        raw = self._cur.fetchone()[0]
+        doc = json.loads(raw) if isinstance(raw, str) else raw
+        self.plans.append(list(_nodes(doc[0]["Plan"])))
+        self._cur.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Conn:
+    def __init__(self, cur: _ExplainCursor):
+        self._cur = cur
+
+    def cursor(self, *args, **kwargs):
+        return self._cur
+
+
+@pytest.fixture(scope="module")
+def conn():
+    c = psycopg2.connect(DATABASE_URL)
+    try:
+        yield c
+    finally:
+        c.rollback()
+        c.close()
+
+
+@pytest.fixture
+def cur(conn) -> Iterator[_ExplainCursor]:
+    with conn.cursor() as c:
+        # pe o bază mică un Seq Scan e mai ieftin oricum; fără el planner-ul tot
+        # alege Seq Scan dacă niciun index nu se potrivește, deci testul rămâne valid
+        c.execute("SET LOCAL enable_seqscan = off")
+        yield _ExplainCursor(c)
+    # un query eșuat nu lasă tranzacția abortată pentru testul următor
+    conn.rollback()
+
+
+@pytest.fixture
+def routes_conn(monkeypatch, cur):
+    """get_conn() din routes întoarce conexiunea testului, cu cursorul EXPLAIN."""
+    import app.routes.fixtures as fixtures_routes
+
+    @contextmanager
+    def get_conn():
+        yield _Conn(cur)
+
+    monkeypatch.setattr(fixtures_routes, "get_conn", get_conn)
+    return cur
+
+
+@pytest.fixture(scope="module")
+def sample(conn) -> Dict[str, Any]:
+    with conn.cursor() as c:
+        c.execute(
+            """
+            SELECT f.league_id, l.provider_league_id, f.kickoff_at, f.id
+            FROM fixtures f
+            JOIN leagues l ON l.id = f.league_id
+            WHERE f.kickoff_at IS NOT NULL
+            ORDER BY f.kickoff_at DESC
+            LIMIT 1
+            """
+        )
+        row = c.fetchone()
+    if row is None:
+        pytest.skip("fixtures e gol")
+
+    league_id, provider_league_id, kickoff_at, fixture_id = row
+    return {
+        "league_id": league_id,
+        "provider_league_id": provider_league_id,
+        "kickoff_at": kickoff_at,
+        "fixture_id": fixture_id,
+    }
+
+
+def _assert_uses_indexes(plans: List[List[Dict[str, Any]]], expected: Set[str]) -> None:
+    assert plans, "niciun query executat"
+    for nodes in plans:
+        scans = [n for n in nodes if n.get("Relation Name") == "fixtures"]
+        assert scans, "planul nu citește din fixtures"
+
+        seq = [n for n in scans if n["Node Type"] == "Seq Scan"]
+        assert not seq, f"Seq Scan pe fixtures: {seq}"
+
+        # un Bitmap Index Scan nu are Relation Name, doar Index Name
+        used = {n["Index Name"] for n in nodes if n.get("Index Name")}
+        assert used & expected, f"indexuri folosite {used}, așteptat unul din {expected}"
+
+
+def _day(ts) -> str:
+    return ts.date().isoformat()
+
+
+def test_league_listing(routes_conn, sample):
+    from app.routes.fixtures import _build_fixtures_page
+
+    k = sample["kickoff_at"]
+    _build_fixtures_page(
+        page=1,
+        per_page=50,
+        provider_league_id=sample["provider_league_id"],
+        date_from=_day(k - timedelta(days=30)),
+        date_to=_day(k),
+        order="asc",
+        include_total=False,
+    )
+    _assert_uses_indexes(routes_conn.plans, {"idx_fixtures_league_kickoff", "idx_fixtures_kickoff_id"})
+
+
+def test_global_keyset_page(routes_conn, sample):
+    from app.routes.fixtures import _build_fixtures_page
+    from app.utils.pagination import encode_cursor
+
+    k = sample["kickoff_at"]
+    _build_fixtures_page(
+        page=1,
+        per_page=50,
+        provider_league_id=None,
+        date_from=_day(k - timedelta(days=30)),
+        date_to=_day(k),
+        order="asc",
+        cursor=encode_cursor(k - timedelta(days=7), sample["fixture_id"]),
+        include_total=False,
+    )
+    _assert_uses_indexes(routes_conn.plans, {"idx_fixtures_kickoff_id"})
+
+
+def test_predictions_keyset_page(cur, sample):
+    from app.routes.predictions import _fetch_fixture_rows
+    from app.utils.pagination import encode_cursor
+
+    _fetch_fixture_rows(cur, limit=50, cursor=encode_cursor(sample["kickoff_at"], sample["fixture_id"]))
+    _assert_uses_indexes(cur.plans, {"idx_fixtures_kickoff_id"})
+
+
+def test_finished_history(cur, sample):
+    from app.routes.predictions import _fetch_league_history
+
+    k = sample["kickoff_at"]
+    _fetch_league_history(cur, sample["league_id"], first_kickoff=k - timedelta(days=7), last_kickoff=k)
+    _assert_uses_indexes(cur.plans, {"idx_fixtures_finished_league_kickoff", "idx_fixtures_league_kickoff"})